@@ -0,0 +1,104 @@
+from pathlib import Path
+import argparse
+import time
+import sys
+
+BENCHMARKS = Path(__file__).resolve().parent
+FIXTURES = BENCHMARKS / "fixtures"
+sys.path.insert(0, str(BENCHMARKS.parent / "scraping"))
+
+import extractors
+import legacy_parsers
+from parser_backend import PARSER_BACKENDS, make_soup, resolve_backend
+
+
+def read_fixture(name):
+    with open(FIXTURES / name, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def time_pair(before, after, soups, rounds, repeats=6):
+    # Best of `repeats` runs of each, in ms per page. The order flips every run so neither side
+    # always gets the cold caches
+    best = {before: None, after: None}
+    for repeat in range(repeats):
+        order = (before, after) if repeat % 2 == 0 else (after, before)
+        for extract in order:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                extract(*soups)
+            elapsed = (time.perf_counter() - start) / rounds * 1000
+            best[extract] = elapsed if best[extract] is None else min(best[extract], elapsed)
+    return best[before], best[after]
+
+
+def time_soup(pages, backend, rounds):
+    # Best of 3 runs of building the soups of one page, in ms
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in pages:
+                make_soup(html, backend)
+        elapsed = (time.perf_counter() - start) / rounds * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(rounds, backend):
+    backend = resolve_backend(backend)
+
+    # page -> (before, after, HTML of the page)
+    pages = {
+        "match": (
+            legacy_parsers.extract_match,
+            extractors.extract_match,
+            (read_fixture("match.html"),),
+        ),
+        "team": (
+            legacy_parsers.extract_team,
+            extractors.extract_team,
+            (read_fixture("team.html"),),
+        ),
+        "player": (
+            legacy_parsers.extract_player,
+            extractors.extract_player,
+            (
+                read_fixture("player_stats.html"),
+                read_fixture("player_individual.html"),
+            ),
+        ),
+    }
+
+    # Soups get built once, the timed calls only run the old and new extractors on the same ones
+    print(f"old and single-pass extractors on {backend}")
+    print(
+        f"{'page':<8}{'soup (ms)':>12}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}"
+    )
+    for page, (before, after, htmls) in pages.items():
+        soups = tuple(make_soup(html, backend) for html in htmls)
+        if before(*soups) != after(*soups):
+            print(f"{page:<8} before and after return different records!")
+            continue
+        soup_ms = time_soup(htmls, backend, rounds)
+        before_ms, after_ms = time_pair(before, after, soups, rounds)
+        print(
+            f"{page:<8}{soup_ms:>12.2f}{before_ms:>14.2f}{after_ms:>14.2f}{before_ms / after_ms:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-page time of the old and the new extractors, on soups that are built once"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=50, help="extractor calls per page and run"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=PARSER_BACKENDS,
+        default="html.parser",
+        help="parser backend of the soups, the old and the new extractors both run on it",
+    )
+    args = parser.parse_args()
+    main(args.rounds, args.backend)
@@ -0,0 +1,324 @@
+from datetime import datetime, timezone
+from pathlib import Path
+import subprocess
+import statistics
+import tempfile
+import platform
+import argparse
+import json
+import time
+import sys
+
+BENCHMARKS = Path(__file__).resolve().parent
+FIXTURES = BENCHMARKS / "fixtures"
+sys.path.insert(0, str(BENCHMARKS.parent / "scraping"))
+
+import async_get_recent_match_urls
+import async_get_team_urls
+import async_get_match_data
+import async_get_team_data
+import async_get_player_data
+import extractors
+from parser_backend import PARSER_BACKENDS, make_soup, resolve_backend
+import pandas as pd
+
+# Amount of URLs/records for the distribute_* and save benchmarks
+MATCH_AMOUNT = 10_000
+TEAM_AMOUNT = 1_000
+RECORD_AMOUNT = 1_000
+
+
+def read_fixture(name):
+    with open(FIXTURES / name, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_benchmark(name, module, record, output_format, workdir):
+    records = [record] * RECORD_AMOUNT
+    return (
+        "save",
+        f"{name} save_data {output_format} ({RECORD_AMOUNT} records)",
+        lambda: module.save_data(records, workdir / f"{name}_data.csv", output_format),
+    )
+
+
+def build_benchmarks(backend, workdir):
+    # (group, name, function without arguments), everything only needs the fixtures
+    results_html = read_fixture("results.html")
+    ranking_html = read_fixture("ranking.html")
+    match_html = read_fixture("match.html")
+    team_html = read_fixture("team.html")
+    player_html = read_fixture("player_stats.html")
+    individual_html = read_fixture("player_individual.html")
+
+    # Sections get located once, like the page parsers do, so the extractors are timed on their own
+    match_soup = make_soup(match_html, backend)
+    teamsBox = match_soup.select_one("div.teamsBox")
+    timeAndEvent = match_soup.select_one("div.timeAndEvent")
+    maps_grid = match_soup.select_one("div.maps")
+    teams = extractors.get_teams(teamsBox)
+    team_1, team_2 = teams[0][0], teams[1][0]
+    team_soup = make_soup(team_html, backend)
+    player_soup = make_soup(player_html, backend)
+    individual_soup = make_soup(individual_html, backend)
+    sections = extractors.get_role_sections(player_soup)
+
+    match_urls = pd.DataFrame(
+        {
+            "match_url": [
+                f"https://www.hltv.org/matches/{2_380_000 + i}/a-vs-b"
+                for i in range(MATCH_AMOUNT)
+            ]
+        }
+    )
+    team_urls = pd.DataFrame(
+        {
+            "team_url": [
+                f"https://www.hltv.org/team/{i}/team{i}" for i in range(TEAM_AMOUNT)
+            ],
+            "player_urls": [
+                str(
+                    [
+                        f"https://www.hltv.org/player/{i * 5 + j}/player{i * 5 + j}"
+                        for j in range(5)
+                    ]
+                )
+                for i in range(TEAM_AMOUNT)
+            ],
+        }
+    )
+    match_done = set(match_urls["match_url"][::2])  # half of the work is in the journal already
+    offsets_done = set(range(0, MATCH_AMOUNT, 200))
+
+    match_record = extractors.parse_match(match_html, backend)
+    team_record = extractors.parse_team(team_html, backend)
+    player_record = extractors.parse_player(
+        player_html, individual_html, backend
+    )
+
+    return [
+        # Tree building on its own, the part the backend changes
+        ("soup", "results", lambda: make_soup(results_html, backend)),
+        ("soup", "ranking", lambda: make_soup(ranking_html, backend)),
+        ("soup", "match", lambda: make_soup(match_html, backend)),
+        ("soup", "team", lambda: make_soup(team_html, backend)),
+        ("soup", "player_stats", lambda: make_soup(player_html, backend)),
+        ("soup", "player_individual", lambda: make_soup(individual_html, backend)),
+        # Whole pages, HTML -> record
+        (
+            "page",
+            "parse_results",
+            lambda: async_get_recent_match_urls.parse_results(results_html, backend),
+        ),
+        (
+            "page",
+            "parse_ranking",
+            lambda: async_get_team_urls.parse_ranking(ranking_html, -1, backend),
+        ),
+        ("page", "parse_match", lambda: extractors.parse_match(match_html, backend)),
+        ("page", "parse_team", lambda: extractors.parse_team(team_html, backend)),
+        (
+            "page",
+            "parse_player",
+            lambda: extractors.parse_player(
+                player_html, individual_html, backend
+            ),
+        ),
+        # Single extractors on an already parsed page
+        ("match", "get_teams", lambda: extractors.get_teams(teamsBox)),
+        ("match", "get_date", lambda: extractors.get_date(timeAndEvent)),
+        ("match", "get_hour", lambda: extractors.get_hour(timeAndEvent)),
+        ("match", "get_event", lambda: extractors.get_event(timeAndEvent)),
+        ("match", "get_mode", lambda: extractors.get_mode(maps_grid)),
+        (
+            "match",
+            "get_maps_info",
+            lambda: extractors.get_maps_info(maps_grid, team_1, team_2),
+        ),
+        (
+            "team",
+            "get_avg_player_age",
+            lambda: extractors.get_avg_player_age(team_soup),
+        ),
+        ("team", "get_player_urls", lambda: extractors.get_player_urls(team_soup)),
+        ("team", "get_coach_url", lambda: extractors.get_coach_url(team_soup)),
+        (
+            "team",
+            "get_highlighted_stats",
+            lambda: extractors.get_highlighted_stats(team_soup),
+        ),
+        (
+            "team",
+            "get_map_winrates",
+            lambda: extractors.get_map_winrates(team_soup),
+        ),
+        (
+            "player",
+            "get_overall_stats",
+            lambda: extractors.get_overall_stats(player_soup),
+        ),
+        (
+            "player",
+            "get_role_sections",
+            lambda: extractors.get_role_sections(player_soup),
+        ),
+        (
+            "player",
+            "get_side_stats",
+            lambda: extractors.get_side_stats(sections, "ct"),
+        ),
+        (
+            "player",
+            "get_individual_stats",
+            lambda: extractors.get_individual_stats(individual_soup),
+        ),
+        # Work distribution
+        (
+            "distribute",
+            f"match distribute_urls ({MATCH_AMOUNT} urls)",
+            lambda: async_get_match_data.distribute_urls(match_urls, -1, match_done),
+        ),
+        (
+            "distribute",
+            f"team distribute_urls ({TEAM_AMOUNT} urls)",
+            lambda: async_get_team_data.distribute_urls(team_urls, -1),
+        ),
+        (
+            "distribute",
+            f"player distribute_urls ({TEAM_AMOUNT} teams)",
+            lambda: async_get_player_data.distribute_urls(team_urls, -1),
+        ),
+        (
+            "distribute",
+            f"distribute_offsets ({MATCH_AMOUNT} urls)",
+            lambda: async_get_recent_match_urls.distribute_offsets(
+                MATCH_AMOUNT, 100, offsets_done
+            ),
+        ),
+        # DataFrame + CSV save path, and the typed Parquet output
+        *(
+            save_benchmark(name, module, record, output_format, workdir)
+            for name, module, record in [
+                ("match", async_get_match_data, match_record),
+                ("team", async_get_team_data, team_record),
+                ("player", async_get_player_data, player_record),
+            ]
+            for output_format in ["csv", "parquet"]
+        ),
+    ]
+
+
+def run_benchmark(function, rounds):
+    function()  # warm-up, first call pays for imports and caches
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "rounds": rounds,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "stdev_ms": statistics.stdev(timings) if rounds > 1 else 0.0,
+    }
+
+
+def compare(results, baseline, threshold):
+    # Prints the medians of both runs (to stderr, stdout is for the JSON), returns the benchmarks that got slower than the threshold
+    old = {(r["group"], r["name"]): r for r in baseline["results"]}
+    regressions = []
+    print(
+        f"{'benchmark':<48}{'before (ms)':>13}{'after (ms)':>13}{'ratio':>9}",
+        file=sys.stderr,
+    )
+    for result in results:
+        key = (result["group"], result["name"])
+        if key not in old:
+            continue
+        ratio = result["median_ms"] / old[key]["median_ms"]
+        flag = ""
+        if ratio > threshold:
+            regressions.append(key)
+            flag = "  <- slower"
+        print(
+            f"{result['group'] + ': ' + result['name']:<48}"
+            f"{old[key]['median_ms']:>13.3f}{result['median_ms']:>13.3f}{ratio:>8.2f}x{flag}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main(rounds, backend, output=None, baseline=None, threshold=1.2):
+    backend = resolve_backend(backend)
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks = build_benchmarks(backend, Path(workdir))
+        results = []
+        for group, name, function in benchmarks:
+            result = {"group": group, "name": name}
+            result.update(run_benchmark(function, rounds))
+            results.append(result)
+            print(
+                f"{group + ': ' + name:<48}{result['median_ms']:>10.3f} ms",
+                file=sys.stderr,
+            )
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parser_backend": backend,
+        "results": results,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks of every extractor, the distribute_* helpers and the save path"
+    )
+    parser.add_argument("--rounds", type=int, default=20, help="timed runs per benchmark")
+    parser.add_argument(
+        "--backend",
+        choices=PARSER_BACKENDS,
+        default=async_get_match_data.config["parser_backend"],
+        help="parser backend (default: the one from the config)",
+    )
+    parser.add_argument("--output", help="JSON file to write the results to (default: stdout)")
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="JSON file of an earlier run, exits with 1 if a benchmark got slower",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="median ratio that counts as slower with --compare (default: 1.2)",
+    )
+    args = parser.parse_args()
+    main(args.rounds, args.backend, args.output, args.compare, args.threshold)
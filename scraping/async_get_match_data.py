@@ -1,413 +1,299 @@
-from camoufox.async_api import AsyncCamoufox
-from browserforge.fingerprints import Screen
-from bs4 import BeautifulSoup
-from pathlib import Path
-import pandas as pd
-import asyncio
-import random
-import time
-import json
-import re
-
-config = {
-    "file_to_read": "data/recent_match_urls.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
-    "savefile_location": "data/recent_match_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
-    "match_amount": 20,  # -1 = all - Note: This will probably take a REALLY long time, depending on url amount
-    "headless": True,  # hide the browser
-    "screen": Screen(max_width=1920, max_height=1080),
-    "screen_amount": 1,  # only matters if headless = False
-    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
-    "session_timeout": 1,  # timeout between sessions ([0.8, 1.2] also possible for a random timeout in a range)
-    "use_proxy": False,  # use proxy
-    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
-    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
-    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
-    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
-}
-
-
-class bcolors:  # colors to print in color
-    HEADER = "\033[95m"
-    OKBLUE = "\033[94m"
-    OKCYAN = "\033[96m"
-    SUCCESS = "\033[92m"
-    WARNING = "\033[93m"
-    FAIL = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-
-def status(msg, color=bcolors.ENDC):
-    print(color + msg + bcolors.ENDC)
-
-
-df = pd.read_csv(config["file_to_read"])
-match_data = []  # List that gets turned into the savefile
-lock = asyncio.Lock()  # lock for thread-safety when writing to data list
-
-if config["use_proxy"]:
-    proxy_list = []
-    with open(config["proxy_location"], "r") as file:
-        for line in file:
-            proxy_list.append(line.strip())
-
-
-# Get random proxy from list
-def get_proxy():
-    proxy = random.choice(proxy_list).split(":")
-    server = proxy[0] + ":" + proxy[1]
-    username = proxy[2]
-    password = proxy[3]
-    proxy_dict = {"server": server, "username": username, "password": password}
-    return proxy_dict
-
-
-def get_team(soup, team_number):
-    teamsBox = soup.select_one("div.teamsBox")
-
-    if teamsBox:
-        if team_number == 1:
-            team_name = teamsBox.select_one("div.team1-gradient div.teamName")
-            if team_name:
-                return team_name.text.strip().replace(" ", "")
-
-        if team_number == 2:
-            team_name = teamsBox.select_one("div.team2-gradient div.teamName")
-            if team_name:
-                return team_name.text.strip().replace(" ", "")
-
-
-def get_score(soup, team_number):
-    teamsBox = soup.select_one("div.teamsBox")
-
-    if teamsBox:
-        if team_number == 1:
-            score = teamsBox.select_one(
-                "div.team1-gradient div.lost, div.team1-gradient div.won"
-            )
-            if score:
-                return score.text.strip()
-
-        if team_number == 2:
-            score = teamsBox.select_one(
-                "div.team2-gradient div.lost, div.team2-gradient div.won"
-            )
-            if score:
-                return score.text.strip()
-
-
-def get_winner(soup, team_1, team_2):
-    teamsBox = soup.select_one("div.teamsBox")
-
-    team_1_gradient = teamsBox.select_one("div.team1-gradient")
-    team_2_gradient = teamsBox.select_one("div.team2-gradient")
-
-    if team_1_gradient and "won" in team_1_gradient.get("class", []):
-        score = team_1
-    elif team_2_gradient and "won" in team_2_gradient.get("class", []):
-        score = team_2
-    elif team_1_gradient.select_one("div.won"):
-        score = team_1
-    elif team_2_gradient.select_one("div.won"):
-        score = team_2
-
-    if teamsBox and score:
-        return score
-
-
-def get_date(soup):
-    timeAndEvent = soup.select_one("div.timeAndEvent")
-
-    if timeAndEvent:
-        date_text = timeAndEvent.select_one("div.date").text.strip()
-
-        if date_text:
-            # Replace (st, nd, rd, th)
-            date_text = (
-                date_text.replace("st", "")
-                .replace("nd", "")
-                .replace("rd", "")
-                .replace("th", "")
-            )
-
-            # Replace "of"
-            date_text = date_text.replace(" of ", " ")
-
-            # Month to number
-            months = {
-                "January": "01",
-                "February": "02",
-                "March": "03",
-                "April": "04",
-                "May": "05",
-                "June": "06",
-                "July": "07",
-                "August": "08",
-                "September": "09",
-                "October": "10",
-                "November": "11",
-                "December": "12",
-            }
-
-            # "1 June 2025" -> ["01", "06", "2025"]
-            parts = date_text.split()
-            day = parts[0].zfill(2)  # add 0 if needed
-            month = months[parts[1]]
-            year = parts[2]
-
-            return f"{day}/{month}/{year}"
-
-
-def get_hour(soup):
-    timeAndEvent = soup.select_one("div.timeAndEvent")
-    if timeAndEvent:
-        time = timeAndEvent.select_one("div.time").text.strip()
-        if time:
-            hour = time.split(":")[0]
-            return hour
-
-
-def get_event(soup):
-    timeAndEvent = soup.select_one("div.timeAndEvent")
-    if timeAndEvent:
-        event = timeAndEvent.select_one("a[href*='/events/']").text.strip()
-        if event:
-            return event
-
-
-def get_mode(soup):
-    maps = soup.select_one("div.maps")
-    if maps:
-        mode = maps.select_one("div.preformatted-text").text.strip()
-        if mode:
-            numbers = re.findall(r"\d+", mode)
-            if numbers:
-                num = numbers[0]  # First number found
-                return f"Bo{num}"
-    return "N/A"
-
-
-def get_maps_info(soup, team_1, team_2):
-    maps_list = []
-    maps_grid = soup.select_one("div.maps")
-    if maps_grid:
-        maps = maps_grid.select("div.mapholder")
-        if maps:
-            for map in maps:
-                if map.select("div.played"):
-                    map_info = {}
-
-                    map_info["map"] = map.select_one("div.mapname").text.strip()
-
-                    results_left = map.select_one("div.results-left, span.results-left")
-                    results_right = map.select_one(
-                        "div.results-right, span.results-right"
-                    )
-
-                    if results_left and "pick" in results_left.get("class", []):
-                        map_info["picked_by"] = team_1
-                    elif results_right and "pick" in results_right.get("class", []):
-                        map_info["picked_by"] = team_2
-                    else:
-                        map_info["picked_by"] = "N/A"
-
-                    if results_left and "won" in results_left.get("class", []):
-                        map_info["winner"] = team_1
-                    elif results_right and "won" in results_right.get("class", []):
-                        map_info["winner"] = team_2
-                    else:
-                        map_info["winner"] = "N/A"
-
-                    if results_left:
-                        score_left = results_left.select_one(
-                            "div.results-team-score"
-                        ).text.strip()
-                    if results_right:
-                        score_right = results_right.select_one(
-                            "div.results-team-score"
-                        ).text.strip()
-
-                    if score_left and score_right:
-                        map_info["score"] = f"{score_left}:{score_right}"
-
-                    maps_list.append(map_info)
-
-    return maps_list
-
-
-async def scrape_match(session_id, headless, url_list):
-    proxy = get_proxy() if config["use_proxy"] else None
-    async with AsyncCamoufox(
-        headless=headless,
-        screen=config["screen"],
-        geoip=True,
-        proxy=proxy,
-    ) as browser:
-        context = await browser.new_context()
-        if config["use_proxy"]:
-            status(
-                f"[+] [Session {session_id}] Successfully connected with proxy ({proxy['server']})",
-                bcolors.OKCYAN,
-            )
-        else:
-            status(
-                f"[+] [Session {session_id}] Successfully started without proxy",
-                bcolors.OKCYAN,
-            )
-
-        # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
-        with open(config["user_agents_location"], "r") as f:
-            user_agents = json.load(f)
-        user_agent_entry = random.choice(user_agents)
-        user_agent = user_agent_entry["ua"]
-        await context.set_extra_http_headers({"User-Agent": user_agent})
-
-        # Auto-login & add necessary cookies
-        with open(config["cookie_location"], "r") as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
-
-        page = await context.new_page()
-
-        for url in url_list:
-            try:
-                start_time = time.perf_counter()
-
-                # Get HTML
-                await page.goto(url)
-                html = await page.inner_html("div.colCon")
-                soup = BeautifulSoup(html, "html.parser")
-
-                team_1 = get_team(soup, 1)
-                team_2 = get_team(soup, 2)
-                score_team_1 = get_score(soup, 1)
-                score_team_2 = get_score(soup, 2)
-                winner = get_winner(soup, team_1, team_2)
-                date = get_date(soup)
-                hour = get_hour(soup)
-                event = get_event(soup)
-                mode = get_mode(soup)
-                maps = get_maps_info(soup, team_1, team_2)
-
-                match_info = {
-                    # "match_url": url,
-                    "team_1": team_1,
-                    "team_2": team_2,
-                    "score_team_1": score_team_1,
-                    "score_team_2": score_team_2,
-                    "winner": winner,
-                    "date": date,
-                    "hour": hour,
-                    "event": event,
-                    "mode": mode,
-                    "maps": maps,
-                }
-
-                """ maps format (not configurable here):
-                "maps": [
-                    {"map": "Dust2", "picked_by": "team_1", "winner": "team_1", "score": "16-14"},
-                    {"map": "Mirage", "picked_by": "team_2", "winner": "team_2", "score": "16-12"},
-                    {"map": "Inferno", "picked_by": "random", "winner": "team_1", "score": "16-10"}
-                ]
-                """
-
-                # thread-safe
-                async with lock:
-                    if match_info not in match_data:
-                        match_data.append(match_info)
-
-                end_time = time.perf_counter()
-                elapsed = end_time - start_time
-
-                status(
-                    f"[+] [Session {session_id}] Successfully scraped match: {team_1} vs {team_2} ({date}) ({len(match_data)} / {config["match_amount"]}) ({elapsed:.2f}s)",
-                    bcolors.SUCCESS,
-                )
-
-                if type(config["session_timeout"]) == list:
-                    await asyncio.sleep(
-                        random.uniform(
-                            config["session_timeout"][0], config["session_timeout"][1]
-                        )
-                    )
-                else:
-                    await asyncio.sleep(config["session_timeout"])
-
-            except Exception as e:
-                status(
-                    f"[-] Session {session_id}: Exception - {e}",
-                    bcolors.FAIL,
-                )
-                break
-
-
-def distribute_urls(
-    df, match_amount=config["match_amount"], session_amount=config["session_amount"]
-):
-    # Create a list of empty lists for each session
-    url_lists = [[] for _ in range(session_amount)]
-
-    # Get all URLs
-    urls = df["match_url"].tolist()
-
-    # Distribute the URLs evenly across the sessions
-    for url in urls[:match_amount]:
-        smallest_list = min(url_lists, key=len)
-        smallest_list.append(url)
-
-    return url_lists
-
-
-async def main():
-    total_start_time = time.perf_counter()
-
-    if config["match_amount"] == -1:
-        status(
-            f"[!] Scraping all matches ({len(df["match_url"])})",
-            bcolors.WARNING,
-        )
-    else:
-        status(f"[!] Scraping {config["match_amount"]} matches", bcolors.WARNING)
-
-    urls_per_session = distribute_urls(
-        df, config["match_amount"], config["session_amount"]
-    )
-
-    tasks = []
-    for i in range(config["session_amount"]):
-
-        if not config["headless"]:
-            is_headless = False if i < config["screen_amount"] else True
-        else:
-            is_headless = True
-
-        tasks.append(
-            asyncio.create_task(
-                scrape_match(
-                    session_id=i,
-                    headless=is_headless,
-                    url_list=urls_per_session[i],
-                )
-            )
-        )
-
-    await asyncio.gather(*tasks)
-
-    total_elapsed = time.perf_counter() - total_start_time
-
-    final_df = pd.DataFrame(match_data)
-    filepath = Path(config["savefile_location"])
-    # Creates directory if it's not existing
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    # Change "to_csv" to something else to save it in a different format (need to change savefile ending too)
-    final_df.to_csv(filepath, index=False)
-
-    status(
-        f"[+] Successfully saved to file ({config["savefile_location"]}) (took {total_elapsed:.2f}s)",
-        bcolors.SUCCESS,
-    )
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import RetryPolicy, make_queue, run_workers
+from dead_letters import DeadLetters
+from checkpoint import Journal
+from html_cache import HtmlCache
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from parse_pool import ParsePool
+from dedup import DedupIndex
+from columnar import write_parquet
+from sqlite_sink import write_sqlite
+from extractors import parse_match
+from pathlib import Path
+import pandas as pd
+import argparse
+import asyncio
+import time
+
+config = {
+    "file_to_read": "data/recent_match_urls.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
+    "savefile_location": "data/recent_match_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
+    "journal_location": "data/recent_match_data.journal.jsonl",  # results get appended here while scraping, used by --resume
+    "journal_batch_size": 20,  # amount of results that get written to the journal at once
+    "dead_letter_location": "data/recent_match_data.dead_letters.jsonl",  # URLs that still failed after all retries, scraped again with --replay (None = not kept)
+    "html_cache_location": "data/html_cache",  # ".../.../html_cache" folder that keeps the raw HTML of every page (needed for --offline), None = disabled
+    "html_cache_ttl": 0,  # seconds a cached page gets reused instead of opening it again (0 = always open the page)
+    "match_amount": 20,  # -1 = all - Note: This will probably take a REALLY long time, depending on url amount
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions take over its work
+    "retry_attempts": 3,  # tries per URL for network errors/challenges, every retry on another session if possible (1 = no retries, parse errors never get retried)
+    "retry_backoff": 2,  # seconds before the first retry, doubles with every retry (+-50% jitter)
+    "retry_backoff_max": 60,  # seconds a retry waits at most
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "output_format": "csv",  # "csv" or "parquet" (typed, flattened columns, needs pyarrow, savefile ending becomes .parquet)
+    "sqlite_location": None,  # "data/hltv.sqlite" = also upsert the records into normalized tables (matches, match_maps, teams, team_map_winrates, players, player_side_stats) keyed on HLTV IDs (None = off)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "parse_workers": 4,  # processes that parse pages while the sessions open the next ones (0 = parse in the main process)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+df = None  # input CSV, gets read in main() so the parsers can be imported without it
+match_data = []  # List that gets turned into the savefile
+lock = asyncio.Lock()  # lock for thread-safety when writing to data list
+log = get_logger("match")  # structured records, written by a background thread
+journal = Journal(config["journal_location"], config["journal_batch_size"])  # on-disk checkpoint
+dead_letters = DeadLetters(config["dead_letter_location"])  # work items that failed for good
+retry_policy = RetryPolicy(
+    config["retry_attempts"], config["retry_backoff"], config["retry_backoff_max"]
+)
+page_cache = HtmlCache(config["html_cache_location"], config["html_cache_ttl"])  # raw HTML of every page
+parse_pool = ParsePool(config["parse_workers"], config["parser_backend"])  # worker processes for the parsers
+match_index = DedupIndex()  # match IDs that are already in match_data
+
+
+def session_started(session):
+    if session.proxy:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully connected with proxy ({session.proxy['server']})",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    else:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully started without proxy",
+            session=session.session_id,
+        )
+
+
+def session_finished(session):
+    if not session.limiter:  # offline, no page got opened
+        return
+    summary = session.limiter.summary(session.proxy_server)
+    if session.blocker:
+        summary += f", {session.blocker.summary()}"
+    if session.proxies and session.proxy:
+        summary += f", proxy: {session.proxies.summary(session.proxy_server)}"
+    log.info(
+        f"[+] [Session {session.session_id}] Finished, {summary}",
+        session=session.session_id,
+        proxy=session.proxy_server,
+    )
+
+
+def session_error(session, url, e, kind="parse", retry_in=None):
+    next_step = "giving up" if retry_in is None else f"retrying in {retry_in:.1f}s"
+    # Retries are only a warning, the item is not lost yet
+    report = log.error if retry_in is None else log.warning
+    report(
+        f"[-] Session {session.session_id}: {kind} error on {url} ({next_step}) - {e}",
+        session=session.session_id,
+        url=url,
+        kind=kind,
+        retry_in=retry_in,
+        error=f"{type(e).__name__}: {e}",
+    )
+
+
+async def scrape_match(session, url):
+    session_id = session.session_id
+
+    start_time = time.perf_counter()
+
+    # Get HTML (from the cache if possible)
+    html = await page_cache.fetch(session, url, "div.colCon")
+    with metrics.timer("parse_seconds", stage="match"):
+        match_info = await parse_pool.run(parse_match, html)
+    match_info = {"match_url": url, **match_info}  # its HLTV ID is the key of the SQLite rows
+
+    # thread-safe
+    async with metrics.locked(lock, stage="match"):
+        if match_index.add(url):
+            match_data.append(match_info)
+        journal.append(url, match_info)
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+    metrics.observe("item_seconds", elapsed, stage="match")
+
+    log.success(
+        f"[+] [Session {session_id}] Successfully scraped match: {match_info['team_1']} vs {match_info['team_2']} ({match_info['date']}) ({len(match_data)} / {config["match_amount"]}) ({elapsed:.2f}s)",
+        session=session_id,
+        url=url,
+        elapsed=elapsed,
+    )
+    return match_info
+
+
+def distribute_urls(df, match_amount=config["match_amount"], done=()):
+    # Get all URLs
+    urls = df["match_url"].tolist()
+    if match_amount != -1:
+        urls = urls[:match_amount]
+
+    # URLs that are already in the journal don't get scraped again
+    urls = [url for url in urls if url not in done]
+
+    # All sessions pull from this queue until it's empty
+    return make_queue(urls)
+
+
+def save_data(
+    data,
+    savefile_location=config["savefile_location"],
+    output_format=config["output_format"],
+    sqlite_location=config["sqlite_location"],
+):
+    # Returns the path of the file that got written
+    filepath = Path(savefile_location)
+    # Creates directory if it's not existing
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    if sqlite_location:
+        # Rows of earlier runs get updated in place, on top of the savefile
+        write_sqlite("match", data, sqlite_location)
+    if output_format == "parquet":
+        # Flattened, typed columns, falls back to CSV if pyarrow is missing
+        parquet_path = filepath.with_suffix(".parquet")
+        if write_parquet("match", data, parquet_path):
+            return parquet_path
+    final_df = pd.DataFrame(data)
+    final_df.to_csv(filepath, index=False)
+    return filepath
+
+
+async def main(pool=None, resume=False, offline=False, replay=False):
+    global df
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+    df = pd.read_csv(config["file_to_read"])
+
+    if config["match_amount"] == -1:
+        log.warning(f"[!] Scraping all matches ({len(df["match_url"])})")
+    else:
+        log.warning(f"[!] Scraping {config["match_amount"]} matches")
+
+    # A pool handed in by the caller stays open for the next stage
+    own_pool = pool is None and not offline
+    page_cache.offline = offline
+    if offline:
+        # Parsers only run on cached pages, no browser gets launched. One session per
+        # parse worker, so the cached pages get parsed on all of them at once
+        sessions = [Session("offline", None, None, None, None, True)] * max(
+            1, config["parse_workers"]
+        )
+    else:
+        if own_pool:
+            pool = BrowserPool(config)
+        await pool.start()
+        sessions = pool.sessions[: config["session_amount"]]
+
+        for session in sessions:
+            session_started(session)
+
+    # Results of an earlier (crashed) run get reused with --resume and --replay
+    done = set()
+    if resume or replay:
+        done, records = journal.load()
+        match_data.extend(records)
+        for url in done:
+            match_index.add(url)
+        log.warning(f"[!] Resuming, {len(done)} matches already done")
+    else:
+        journal.reset()
+        dead_letters.reset()
+
+    # Sessions pull from one shared queue instead of a fixed slice each
+    if replay:
+        # Only what failed for good last time, everything else is in the journal already
+        queue = make_queue(url for url in dead_letters.load() if url not in done)
+        dead_letters.reset()
+        log.warning(f"[!] Replaying {queue.qsize()} failed URLs")
+    else:
+        queue = distribute_urls(df, config["match_amount"], done)
+
+    try:
+        await run_workers(
+            sessions,
+            queue,
+            scrape_match,
+            on_error=session_error,
+            max_errors=config["session_max_errors"],
+            retry=retry_policy,
+            dead_letters=dead_letters,
+        )
+    finally:
+        journal.flush()
+        parse_pool.close()
+        for session in sessions:
+            session_finished(session)
+        if own_pool:
+            await pool.close()
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+
+    savefile = save_data(match_data)
+
+    log.success(
+        f"[+] Successfully saved to file ({savefile}) (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a crashed run, matches that are already in the journal get skipped",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the pages in the HTML cache without opening a browser",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="only scrape the URLs in the dead letter file again, the results get added to the last run",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(resume=args.resume, offline=args.offline, replay=args.replay)
+    )
@@ -1,634 +1,547 @@
-from dateutil.relativedelta import relativedelta
-from camoufox.async_api import AsyncCamoufox
-from browserforge.fingerprints import Screen
-from datetime import datetime
-from bs4 import BeautifulSoup
-from pathlib import Path
-import pandas as pd
-import asyncio
-import random
-import time
-import json
-import ast
-import re
-
-config = {
-    "file_to_read": "data/team_data.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
-    "savefile_location": "data/player_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
-    "team_amount": 10,  # -1 = all # Amount of teams of which the players will get scraped, basically multiply it by 5 to get player amount
-    "headless": True,  # hide the browser
-    "screen": Screen(max_width=1920, max_height=1080),
-    "screen_amount": 1,  # only matters if headless = False
-    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
-    "session_timeout": 1,  # timeout between sessions ([0.8, 1.2] also possible for a random timeout in a range)
-    "use_proxy": False,  # use proxy
-    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
-    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
-    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
-    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
-}
-
-
-class bcolors:  # colors to print in color
-    HEADER = "\033[95m"
-    OKBLUE = "\033[94m"
-    OKCYAN = "\033[96m"
-    SUCCESS = "\033[92m"
-    WARNING = "\033[93m"
-    FAIL = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-
-def status(msg, color=bcolors.ENDC):
-    print(color + msg + bcolors.ENDC)
-
-
-df = pd.read_csv(config["file_to_read"])
-player_data = []  # List that gets turned into the savefile
-lock = asyncio.Lock()  # lock for thread-safety when writing to data list
-
-if config["use_proxy"]:
-    proxy_list = []
-    with open(config["proxy_location"], "r") as file:
-        for line in file:
-            proxy_list.append(line.strip())
-
-
-# Get random proxy from list
-def get_proxy():
-    proxy = random.choice(proxy_list)
-    if config["use_proxy_once"]:
-        proxy_list.remove(proxy)
-    proxy = proxy.split(":")
-    server = proxy[0] + ":" + proxy[1]
-    username = proxy[2]
-    password = proxy[3]
-    proxy_dict = {"server": server, "username": username, "password": password}
-    return proxy_dict
-
-
-def update_player_url(
-    player_url,
-):
-    end_date = datetime.today()
-    start_date = end_date - relativedelta(months=3)
-    end_str = end_date.strftime("%Y-%m-%d")
-    start_str = start_date.strftime("%Y-%m-%d")
-
-    parts = player_url.split("/")
-    if parts:
-        player_id = parts[4]
-        player_name = parts[5]
-        stats_url = f"https://www.hltv.org/stats/players/{player_id}/{player_name}?startDate={start_str}&endDate={end_str}"
-        if stats_url:
-            return stats_url
-
-
-def get_overall_stats(soup):
-
-    featured_rows = soup.select("div.summaryStatBreakdownRow")
-    featured_stats_1 = featured_rows[0].select("div.summaryStatBreakdown")
-    featured_stats_2 = featured_rows[1].select("div.summaryStatBreakdown")
-
-    rating = featured_stats_1[0].select_one("div.summaryStatBreakdownDataValue").text
-    dpr = featured_stats_1[1].select_one("div.summaryStatBreakdownDataValue").text
-    kast = (
-        featured_stats_1[2]
-        .select_one("div.summaryStatBreakdownDataValue")
-        .text.replace("%", "")
-    )
-    impact = featured_stats_2[0].select_one("div.summaryStatBreakdownDataValue").text
-
-    stats_rows = soup.select("div.stats-rows")
-    stats_1 = stats_rows[0].select("div.stats-row")
-    stats_2 = stats_rows[1].select("div.stats-row")
-
-    kills = stats_1[0].select("span")[1].text
-    hs_percentage = stats_1[1].select("span")[1].text.replace("%", "")
-    deaths = stats_1[2].select("span")[1].text
-    kd = stats_1[3].select("span")[1].text
-    adr = stats_1[4].select("span")[1].text
-    grenade_adr = stats_1[5].select("span")[1].text
-    maps_played = stats_1[6].select("span")[1].text
-
-    rounds_played = stats_2[0].select("span")[1].text
-    kr = stats_2[1].select("span")[1].text
-    ar = stats_2[2].select("span")[1].text
-    dr = stats_2[3].select("span")[1].text
-    sbtr = stats_2[4].select("span")[1].text
-    str = stats_2[5].select("span")[1].text
-
-    overall = {
-        "rating": rating,  # Rating 2.1
-        "dpr": dpr,  # Deaths per round
-        "kast": kast,  # Percentage of rounds in which the player either had a kill, assist, survived or was traded
-        "impact": impact,  # Measures the impact made from multikills, opening kills, and clutches
-        "kills": kills,
-        "hs_percentage": hs_percentage,
-        "deaths": deaths,
-        "kd": kd,  # Kills / Deaths
-        "adr": adr,  # Average Damage per Round
-        "grenade_adr": grenade_adr,
-        "maps_played": maps_played,
-        "rounds_played": rounds_played,
-        "kpr": kr,  # Kills / Round
-        "apr": ar,  # Assists / Round
-        "dpr": dr,  # Deaths / Round
-        "saved_by_teammates_pr": sbtr,  # Saved by teammates / round
-        "saved_teammates_pr": str,  # Saved teammates / round
-    }
-
-    return overall
-
-
-async def get_individual_stats(page, url):
-    await page.goto(url)
-    html = await page.inner_html("div.columns")
-    soup = BeautifulSoup(html, "html.parser")
-
-    stats_rows = soup.select("div.stats-rows")
-    boxes_1 = stats_rows[0].select("div.standard-box")
-    boxes_2 = stats_rows[1].select("div.standard-box")
-
-    opening_stats = boxes_1[1].select("div.stats-row")
-    kills = opening_stats[0].select("span")[1].text
-    deaths = opening_stats[1].select("span")[1].text
-    kd = opening_stats[2].select("span")[1].text
-    kill_rating = opening_stats[3].select("span")[1].text
-    win_percent_after_first_kill = (
-        opening_stats[4].select("span")[1].text.replace("%", "")
-    )
-    first_kill_in_won_rounds = opening_stats[5].select("span")[1].text.replace("%", "")
-
-    opening = {
-        "kills": kills,
-        "deaths": deaths,
-        "kd": kd,
-        "kill_rating": kill_rating,
-        "win_percent_after_first_kill": win_percent_after_first_kill,
-        "first_kill_in_won_rounds": first_kill_in_won_rounds,
-    }
-
-    round_stats = boxes_2[0].select("div.stats-row")
-    kill_0 = round_stats[0].select("span")[1].text
-    kill_1 = round_stats[1].select("span")[1].text
-    kill_2 = round_stats[2].select("span")[1].text
-    kill_3 = round_stats[3].select("span")[1].text
-    kill_4 = round_stats[4].select("span")[1].text
-    kill_5 = round_stats[5].select("span")[1].text
-
-    rounds = {
-        "0_kill": kill_0,
-        "1_kill": kill_1,
-        "2_kill": kill_2,
-        "3_kill": kill_3,
-        "4_kill": kill_4,
-        "5_kill": kill_5,
-    }
-
-    weapon_stats = boxes_2[1].select("div.stats-row")
-    rifle = weapon_stats[0].select("span")[1].text
-    sniper = weapon_stats[1].select("span")[1].text
-    smg = weapon_stats[2].select("span")[1].text
-    pistol = weapon_stats[3].select("span")[1].text
-    grenade = weapon_stats[4].select("span")[1].text
-    other = weapon_stats[5].select("span")[1].text
-
-    weapon_kills = {
-        "rifle": rifle,
-        "sniper": sniper,
-        "smg": smg,
-        "pistol": pistol,
-        "grenade": grenade,
-        "other": other,
-    }
-
-    return opening, rounds, weapon_kills
-
-
-def get_side_stats(soup, side):
-
-    stats_container = soup.select_one("div.role-stats-container")
-    if side == "ct":
-        div_class = "stats-side-ct"
-    elif side == "t":
-        div_class = "stats-side-t"
-
-    # Firepower:
-    container = stats_container.select_one("div.role-firepower")
-    overall_container = container.select_one(f"div.{div_class}")
-    f_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    # Stats are not in order as in dictionary, hltv html is left->right->left->right and not from top to bottom and next column
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    f_kpr = stats[0].select_one("div.role-stats-data").text
-    f_rounds_with_kill_pct = (
-        stats[1].select_one("div.role-stats-data").text.replace("%", "")
-    )
-    f_kpr_win = stats[2].select_one("div.role-stats-data").text
-    f_rating = stats[3].select_one("div.role-stats-data").text
-    f_adr = stats[4].select_one("div.role-stats-data").text
-    f_rounds_with_multikill_pct = (
-        stats[5].select_one("div.role-stats-data").text.replace("%", "")
-    )
-    f_adr_win = stats[6].select_one("div.role-stats-data").text
-    f_pistol_rating = stats[7].select_one("div.role-stats-data").text
-
-    firepower = {
-        "overall": f_overall,  # Based on kills, damage, and multi-kills - raw fragging power rating/100
-        "kills_per_round": f_kpr,
-        "kills_per_round_win": f_kpr_win,  # KPR in won rounds only
-        "damage_per_round": f_adr,
-        "damage_per_round_win": f_adr_win,  # ADR in won rounds only
-        "rounds_with_kill_pct": f_rounds_with_kill_pct,  # Percentage of rounds where player got at least one kill
-        "rating_2_1": f_rating,  # HLTV Rating 2.1
-        "multi_kill_rounds_pct": f_rounds_with_multikill_pct,  # Percentage of rounds with 2+ kills
-        "pistol_round_rating": f_pistol_rating,  # Rating 2.1 in pistol rounds only
-    }
-
-    # Entrying:
-    container = stats_container.select_one("div.role-entrying")
-    overall_container = container.select_one(f"div.{div_class}")
-    e_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    e_sbt_pr = stats[0].select_one("div.role-stats-data").text
-    e_td_pr = stats[1].select_one("div.role-stats-data").text
-    e_td_pct = stats[2].select_one("div.role-stats-data").text.replace("%", "")
-    e_odt_pct = stats[3].select_one("div.role-stats-data").text.replace("%", "")
-    e_apr = stats[4].select_one("div.role-stats-data").text
-    e_sr_pct = stats[5].select_one("div.role-stats-data").text.replace("%", "")
-
-    entrying = {
-        "overall": e_overall,  # Based on traded deaths (% and per round) and saves by teammates rating/100
-        "saved_by_teammate_per_round": e_sbt_pr,  # How often teammates save this player per round
-        "traded_deaths_per_round": e_td_pr,  # Deaths that get traded by teammates per round
-        "traded_deaths_pct": e_td_pct,  # Percentage of deaths that get traded
-        "opening_deaths_traded_pct": e_odt_pct,  # Percentage of opening deaths that get traded
-        "assists_per_round": e_apr,
-        "support_rounds_pct": e_sr_pct,  # Percentage of rounds where player provided support
-    }
-
-    # Trading:
-    container = stats_container.select_one("div.role-trading")
-    overall_container = container.select_one(f"div.{div_class}")
-    t_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    t_st_pr = stats[0].select_one("div.role-stats-data").text
-    t_tk_pr = stats[1].select_one("div.role-stats-data").text
-    t_tk_pct = stats[2].select_one("div.role-stats-data").text.replace("%", "")
-    t_ak_pct = stats[3].select_one("div.role-stats-data").text.replace("%", "")
-    t_dpk = stats[4].select_one("div.role-stats-data").text
-
-    trading = {
-        "overall": t_overall,  # Based on trade kills (% and per round) and teammate saves rating/100
-        "saved_teammate_per_round": t_st_pr,  # How often this player saves teammates per round
-        "trade_kills_per_round": t_tk_pr,  # Kills that trade teammate deaths per round
-        "trade_kills_pct": t_tk_pct,  # Percentage of kills that are trades
-        "assisted_kills_pct": t_ak_pct,  # Percentage of kills where player got assist
-        "damage_per_kill": t_dpk,  # Average damage dealt per kill
-    }
-
-    # Opening:
-    container = stats_container.select_one("div.role-opening")
-    overall_container = container.select_one(f"div.{div_class}")
-    o_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    o_ok_pr = stats[0].select_one("div.role-stats-data").text
-    o_od_pr = stats[1].select_one("div.role-stats-data").text
-    o_oa_pct = stats[2].select_one("div.role-stats-data").text.replace("%", "")
-    o_os_pct = stats[3].select_one("div.role-stats-data").text.replace("%", "")
-    o_w_pct_aok = stats[4].select_one("div.role-stats-data").text.replace("%", "")
-    o_apr = stats[5].select_one("div.role-stats-data").text
-
-    opening = {
-        "overall": o_overall,  # Based on opening kills per round and opening attempts rating/100
-        "opening_kills_per_round": o_ok_pr,  # First kills of the round per round
-        "opening_deaths_per_round": o_od_pr,  # First deaths of the round per round
-        "opening_attempts_pct": o_oa_pct,  # Percentage of rounds where player attempts opening duel
-        "opening_success_pct": o_os_pct,  # Success rate in opening duels
-        "win_pct_after_opening_kill": o_w_pct_aok,  # Team win rate after this player gets opening kill
-        "attacks_per_round": o_apr,  # Aggressive actions per round
-    }
-
-    # Clutching:
-    container = stats_container.select_one("div.role-clutching")
-    overall_container = container.select_one(f"div.{div_class}")
-    c_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    c_ppr = stats[0].select_one("div.role-stats-data").text
-    c_la_pct = stats[1].select_one("div.role-stats-data").text.replace("%", "")
-    c_1v1_win_pct = stats[2].select_one("div.role-stats-data").text.replace("%", "")
-    c_ta_pr_s = stats[3].select_one("div.role-stats-data").text
-
-    # turn it into seconds without ending "1m 4s" -> "64"
-    m = re.search(r"(\d+)\s*m", c_ta_pr_s)
-    s_ = re.search(r"(\d+)\s*s", c_ta_pr_s)
-    if m:
-        minutes = int(m.group(1))
-    if s_:
-        seconds = int(s_.group(1))
-    c_ta_pr_s = minutes * 60 + seconds
-
-    c_spr_loss_pct = stats[4].select_one("div.role-stats-data").text.replace("%", "")
-
-    clutching = {
-        "overall": c_overall,  # Based on clutches won and time alive per round rating/100
-        "clutch_points_per_round": c_ppr,  # Clutch situation points per round
-        "last_alive_pct": c_la_pct,  # Percentage of rounds where player is last alive
-        "one_vs_one_win_pct": c_1v1_win_pct,  # Win rate in 1v1 situations
-        "time_alive_per_round_seconds": c_ta_pr_s,  # Average survival time per round in seconds
-        "saves_per_round_loss_pct": c_spr_loss_pct,  # Percentage of lost rounds where player saved
-    }
-
-    # Sniping:
-    container = stats_container.select_one("div.role-sniping")
-    overall_container = container.select_one(f"div.{div_class}")
-    s_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    s_kpr = stats[0].select_one("div.role-stats-data").text
-    s_sk_pct = stats[1].select_one("div.role-stats-data").text.replace("%", "")
-    s_rw_sk_pct = stats[2].select_one("div.role-stats-data").text.replace("%", "")
-    s_rw_smk_pct = stats[3].select_one("div.role-stats-data").text.replace("%", "")
-    s_ok_pr = stats[4].select_one("div.role-stats-data").text
-
-    sniping = {
-        "overall": s_overall,  # Based on AWP/SSG kills and multi-kills rating/100
-        "sniper_kills_per_round": s_kpr,  # AWP/SSG kills per round
-        "sniper_kills_pct": s_sk_pct,  # Percentage of kills with AWP/SSG
-        "rounds_with_sniper_kills_pct": s_rw_sk_pct,  # Percentage of rounds with AWP/SSG kill
-        "sniper_multi_kill_rounds": s_rw_smk_pct,  # Rounds with 2+ AWP/SSG kills per round
-        "sniper_opening_kills_per_round": s_ok_pr,  # Opening kills with AWP/SSG per round
-    }
-
-    # Utility:
-    container = stats_container.select_one("div.role-utility")
-    overall_container = container.select_one(f"div.{div_class}")
-    u_overall = overall_container.select_one("div.row-stats-section-score").text.split(
-        "/"
-    )[0]
-
-    stats = container.select(f"div.role-stats-row.{div_class}")
-    u_dpr = stats[0].select_one("div.role-stats-data").text
-    u_uk_p100r = stats[1].select_one("div.role-stats-data").text
-    u_ft_pr = stats[2].select_one("div.role-stats-data").text
-    u_fa_pr = stats[3].select_one("div.role-stats-data").text
-    u_tof_pr = stats[4].select_one("div.role-stats-data").text
-
-    utility = {
-        "overall": u_overall,  # Based on flashbang stats and grenade damage per round rating/100
-        "utility_damage_per_round": u_dpr,  # HE/Molotov/Incendiary damage per round
-        "utility_kills_per_100_rounds": u_uk_p100r,  # Grenade kills per 100 rounds
-        "flashes_thrown_per_round": u_ft_pr,  # Flashbangs thrown per round
-        "flash_assists_per_round": u_fa_pr,  # Assists from flashbangs per round
-        "time_opponent_flashed_per_round": u_tof_pr,  # Seconds enemies blinded per round
-    }
-
-    return firepower, entrying, trading, opening, clutching, sniping, utility
-
-
-async def scrape_player(session_id, headless, url_list):
-    proxy = get_proxy() if config["use_proxy"] else None
-    async with AsyncCamoufox(
-        headless=headless,
-        screen=config["screen"],
-        geoip=True,
-        proxy=proxy,
-    ) as browser:
-        context = await browser.new_context()
-        if config["use_proxy"]:
-            status(
-                f"[+] [Session {session_id}] Successfully connected with proxy ({proxy['server']})",
-                bcolors.OKCYAN,
-            )
-        else:
-            status(
-                f"[+] [Session {session_id}] Successfully started without proxy",
-                bcolors.OKCYAN,
-            )
-
-        # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
-        with open(config["user_agents_location"], "r") as f:
-            user_agents = json.load(f)
-        user_agent_entry = random.choice(user_agents)
-        user_agent = user_agent_entry["ua"]
-        await context.set_extra_http_headers({"User-Agent": user_agent})
-
-        # Auto-login & add necessary cookies
-        with open(config["cookie_location"], "r") as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
-
-        page = await context.new_page()
-
-        for url in url_list:
-            try:
-                start_time = time.perf_counter()
-
-                stats_url = update_player_url(url)
-                individual_url = stats_url.replace("players/", "players/individual/")
-
-                # Get HTML
-                await page.goto(stats_url)
-                html = await page.inner_html("div.stats-player")
-                soup = BeautifulSoup(html, "html.parser")
-
-                name = (
-                    soup.select_one("h1.summaryNickname").text.strip().replace(" ", "")
-                )
-                country = soup.select_one("img.flag").get("title")
-                team = (
-                    soup.select_one("div.SummaryTeamname a")
-                    .text.strip()
-                    .replace(" ", "")
-                )
-                age = soup.select_one("div.summaryPlayerAge").text.split(" ")[0]
-
-                overall = get_overall_stats(soup)
-
-                opening, rounds, weapon_kills = await get_individual_stats(
-                    page, individual_url
-                )
-
-                (
-                    ct_firepower,
-                    ct_entrying,
-                    ct_trading,
-                    ct_opening,
-                    ct_clutching,
-                    ct_sniping,
-                    ct_utility,
-                ) = get_side_stats(soup, "ct")
-
-                (
-                    t_firepower,
-                    t_entrying,
-                    t_trading,
-                    t_opening,
-                    t_clutching,
-                    t_sniping,
-                    t_utility,
-                ) = get_side_stats(soup, "t")
-
-                player_info = {
-                    "name": name,
-                    "country": country,
-                    "team": team,
-                    "age": age,
-                    "overall": overall,
-                    "opening": opening,
-                    "round": rounds,
-                    "weapon": weapon_kills,
-                    "ct-side": {
-                        "firepower": ct_firepower,
-                        "entrying": ct_entrying,
-                        "trading": ct_trading,
-                        "opening": ct_opening,
-                        "clutching": ct_clutching,
-                        "sniping": ct_sniping,
-                        "utility": ct_utility,
-                    },
-                    "t-side": {
-                        "firepower": t_firepower,
-                        "entrying": t_entrying,
-                        "trading": t_trading,
-                        "opening": t_opening,
-                        "clutching": t_clutching,
-                        "sniping": t_sniping,
-                        "utility": t_utility,
-                    },
-                }
-
-                # thread-safe
-                async with lock:
-                    if player_info not in player_data:
-                        player_data.append(player_info)
-
-                end_time = time.perf_counter()
-                elapsed = end_time - start_time
-
-                if config["team_amount"] == -1:
-                    status(
-                        f"[+] [Session {session_id}] Successfully scraped {name} ({len(player_data)} / {len(df['player_urls']) * 5}) ({elapsed:.2f}s)",
-                        bcolors.SUCCESS,
-                    )
-                else:
-                    status(
-                        f"[+] [Session {session_id}] Successfully scraped {name} ({len(player_data)} / {config["team_amount"] * 5}) ({elapsed:.2f}s)",
-                        bcolors.SUCCESS,
-                    )
-
-                if type(config["session_timeout"]) == list:
-                    await asyncio.sleep(
-                        random.uniform(
-                            config["session_timeout"][0],
-                            config["session_timeout"][1],
-                        )
-                    )
-                else:
-                    await asyncio.sleep(config["session_timeout"])
-
-            except Exception as e:
-                status(
-                    f"[-] Session {session_id}: Exception - {e}",
-                    bcolors.FAIL,
-                )
-                break
-
-
-def distribute_urls(
-    df, team_amount=config["team_amount"], session_amount=config["session_amount"]
-):
-    # Create a list of empty lists for each session
-    url_lists = [[] for _ in range(session_amount)]
-
-    # Get all URLs
-    urls = []
-    url_str_list = df["player_urls"].tolist()
-    for url_list_str in url_str_list:
-        # pandas saves the player_url list as a string, need to make it a list again before looping
-        url_list = ast.literal_eval(url_list_str)
-        for url in url_list:
-            urls.append(url)
-
-    # Distribute the URLs evenly across the sessions
-    for url in urls[: team_amount * 5]:
-        smallest_list = min(url_lists, key=len)
-        smallest_list.append(url)
-
-    return url_lists
-
-
-async def main():
-    total_start_time = time.perf_counter()
-
-    if config["team_amount"] == -1:
-        status(
-            f"[!] Scraping all players from {len(df)} teams",
-            bcolors.WARNING,
-        )
-    else:
-        status(
-            f"[!] Scraping all players from {config['team_amount']} teams",
-            bcolors.WARNING,
-        )
-
-    urls_per_session = distribute_urls(
-        df, config["team_amount"], config["session_amount"]
-    )
-
-    tasks = []
-    for i in range(config["session_amount"]):
-
-        if not config["headless"]:
-            is_headless = False if i < config["screen_amount"] else True
-        else:
-            is_headless = True
-
-        tasks.append(
-            asyncio.create_task(
-                scrape_player(
-                    session_id=i,
-                    headless=is_headless,
-                    url_list=urls_per_session[i],
-                )
-            )
-        )
-
-    await asyncio.gather(*tasks)
-
-    total_elapsed = time.perf_counter() - total_start_time
-
-    final_df = pd.DataFrame(player_data)
-    filepath = Path(config["savefile_location"])
-    # Creates directory if it's not existing
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    # Change "to_csv" to something else to save it in a different format (need to change savefile ending too)
-    final_df.to_csv(filepath, index=False)
-
-    status(
-        f"[+] Successfully saved to file ({config["savefile_location"]}) (took {total_elapsed:.2f}s)",
-        bcolors.SUCCESS,
-    )
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+from dateutil.relativedelta import relativedelta
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import RetryPolicy, make_queue, run_workers
+from dead_letters import DeadLetters
+from checkpoint import Journal
+from html_cache import HtmlCache
+from freshness import FreshnessStore, section_hash
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from parse_pool import ParsePool
+from dedup import DedupIndex
+from columnar import read_table, write_parquet
+from sqlite_sink import write_sqlite
+from urllib.parse import urlencode
+from datetime import date
+from extractors import parse_player
+from pathlib import Path
+import pandas as pd
+import argparse
+import asyncio
+import time
+import json
+import ast
+
+config = {
+    "file_to_read": "data/team_data.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
+    "savefile_location": "data/player_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
+    "journal_location": "data/player_data.journal.jsonl",  # results get appended here while scraping, used by --resume
+    "journal_batch_size": 20,  # amount of results that get written to the journal at once
+    "dead_letter_location": "data/player_data.dead_letters.jsonl",  # URLs that still failed after all retries, scraped again with --replay (None = not kept)
+    "html_cache_location": "data/html_cache",  # ".../.../html_cache" folder that keeps the raw HTML of every page (needed for --offline), None = disabled
+    "html_cache_ttl": 0,  # seconds a cached page gets reused instead of opening it again (0 = always open the page)
+    "freshness_location": "data/player_data.freshness.jsonl",  # last scrape time, section hash and record of every player, fresh players get skipped and unchanged pages don't get parsed again (None = always scrape everything)
+    "freshness_ttl": 43200,  # seconds a player counts as fresh after they got scraped, their pages don't get opened again until then (0 = always open them, only skip the parsing if they didn't change)
+    "window_cache_location": "data/player_windows.freshness.jsonl",  # stats of closed windows (fixed range that ended before today) by their date range/filters, they never get opened again (None = always open them)
+    "player_cache_ttl": 900,  # seconds a player scraped in this run gets reused when their ID comes up again (pipeline/distributed runs, other URL of the same player), without opening or hashing their pages (0 = off)
+    "stat_windows": [  # time windows of the stats, all of a player get scraped on the same session and end up in one record (one savefile row per window)
+        {"name": "3m", "months": 3},  # "months"/"days" = up to today, "start"/"end" = fixed range ("2024-01-01"), optional "maps": ["de_mirage"] and "event": 7148 filters
+    ],
+    "team_amount": 10,  # -1 = all # Amount of teams of which the players will get scraped, every player only once even if they are in more than one roster
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions take over its work
+    "retry_attempts": 3,  # tries per URL for network errors/challenges, every retry on another session if possible (1 = no retries, parse errors never get retried)
+    "retry_backoff": 2,  # seconds before the first retry, doubles with every retry (+-50% jitter)
+    "retry_backoff_max": 60,  # seconds a retry waits at most
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "output_format": "csv",  # "csv" or "parquet" (typed, flattened columns, needs pyarrow, savefile ending becomes .parquet)
+    "sqlite_location": None,  # "data/hltv.sqlite" = also upsert the records into normalized tables (matches, match_maps, teams, team_map_winrates, players, player_side_stats) keyed on HLTV IDs (None = off)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "parse_workers": 4,  # processes that parse pages while the sessions open the next ones (0 = parse in the main process)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+df = None  # input CSV, gets read in main() so the parsers can be imported without it
+player_data = []  # List that gets turned into the savefile
+url_total = "?"  # amount of players in this run, set in main() (unknown while streaming)
+lock = asyncio.Lock()  # lock for thread-safety when writing to data list
+log = get_logger("player")  # structured records, written by a background thread
+journal = Journal(config["journal_location"], config["journal_batch_size"])  # on-disk checkpoint
+dead_letters = DeadLetters(config["dead_letter_location"])  # work items that failed for good
+retry_policy = RetryPolicy(
+    config["retry_attempts"], config["retry_backoff"], config["retry_backoff_max"]
+)
+page_cache = HtmlCache(config["html_cache_location"], config["html_cache_ttl"])  # raw HTML of every page
+freshness = FreshnessStore(config["freshness_location"], config["freshness_ttl"])  # last record of every player
+parse_pool = ParsePool(config["parse_workers"], config["parser_backend"])  # worker processes for the parsers
+player_index = DedupIndex()  # player IDs that are already in player_data
+player_cache = {}  # player ID -> (time, record) of the players scraped in this run
+window_cache = FreshnessStore(config["window_cache_location"], float("inf"), by_url=True)  # stats URL -> record of a closed window
+
+
+def cached_player(key):
+    # Record of a player scraped less than player_cache_ttl seconds ago in this run (e.g. under
+    # the URL of another roster), None = scrape them
+    entry = player_cache.get(key)
+    if entry is None or time.monotonic() - entry[0] > config["player_cache_ttl"]:
+        return None
+    return entry[1]
+
+
+WINDOW_FIELDS = ("start_date", "end_date", "maps", "event")  # of a window, not parsed from its pages
+PROFILE_FIELDS = ("name", "country", "team", "age")  # the same in every window
+
+
+def window_dates(window, today=None):
+    # (start, end) of a stats window, "start"/"end" = fixed range, "months"/"days" = up to today
+    today = today or date.today()
+    if "start" in window:
+        end = date.fromisoformat(window["end"]) if window.get("end") else today
+        return date.fromisoformat(window["start"]), end
+    start = today - relativedelta(
+        months=window.get("months", 0), days=window.get("days", 0)
+    )
+    return start, today
+
+
+def window_closed(window, today=None):
+    # Fixed ranges that ended before today, their stats can't change anymore
+    today = today or date.today()
+    return "start" in window and window_dates(window, today)[1] < today
+
+
+def update_player_url(
+    player_url,
+    window=None,  # first window of the config by default
+):
+    window = window or config["stat_windows"][0]
+    start_date, end_date = window_dates(window)
+    query = {
+        "startDate": start_date.strftime("%Y-%m-%d"),
+        "endDate": end_date.strftime("%Y-%m-%d"),
+    }
+    if window.get("maps"):
+        query["maps"] = window["maps"]
+    if window.get("event"):
+        query["event"] = window["event"]
+
+    parts = player_url.split("/")
+    if parts:
+        player_id = parts[4]
+        player_name = parts[5]
+        stats_url = f"https://www.hltv.org/stats/players/{player_id}/{player_name}?{urlencode(query, doseq=True)}"
+        if stats_url:
+            return stats_url
+
+
+def session_started(session):
+    if session.proxy:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully connected with proxy ({session.proxy['server']})",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    else:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully started without proxy",
+            session=session.session_id,
+        )
+
+
+def session_finished(session):
+    if not session.limiter:  # offline, no page got opened
+        return
+    summary = session.limiter.summary(session.proxy_server)
+    if session.blocker:
+        summary += f", {session.blocker.summary()}"
+    if session.proxies and session.proxy:
+        summary += f", proxy: {session.proxies.summary(session.proxy_server)}"
+    log.info(
+        f"[+] [Session {session.session_id}] Finished, {summary}",
+        session=session.session_id,
+        proxy=session.proxy_server,
+    )
+
+
+def session_error(session, url, e, kind="parse", retry_in=None):
+    next_step = "giving up" if retry_in is None else f"retrying in {retry_in:.1f}s"
+    # Retries are only a warning, the item is not lost yet
+    report = log.error if retry_in is None else log.warning
+    report(
+        f"[-] Session {session.session_id}: {kind} error on {url} ({next_step}) - {e}",
+        session=session.session_id,
+        url=url,
+        kind=kind,
+        retry_in=retry_in,
+        error=f"{type(e).__name__}: {e}",
+    )
+
+
+def combine_windows(records):
+    # Parsed pages of every window (name -> record) -> one record of the player, the stats of
+    # every window under its name. Profile of the page that got parsed last (the newest)
+    profile = list(records.values())[-1]
+    player_info = {field: profile.get(field) for field in PROFILE_FIELDS}
+    player_info["windows"] = {}
+    for window in config["stat_windows"]:
+        start_date, end_date = window_dates(window)
+        stats = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+        for field in ("maps", "event"):
+            if window.get(field):
+                stats[field] = window[field]
+        record = records[window["name"]]
+        stats.update(
+            (key, value) for key, value in record.items() if key not in PROFILE_FIELDS
+        )
+        player_info["windows"][window["name"]] = stats
+    return player_info
+
+
+def window_record(player_info, name):
+    # combine_windows() the other way around, the record of one window
+    record = {field: player_info.get(field) for field in PROFILE_FIELDS}
+    record.update(
+        (key, value)
+        for key, value in player_info["windows"][name].items()
+        if key not in WINDOW_FIELDS
+    )
+    return record
+
+
+def with_windows(player_info):
+    # Records of earlier runs only count if they have the windows of this config
+    names = {window["name"] for window in config["stat_windows"]}
+    if player_info is None or set(player_info.get("windows", ())) != names:
+        return None
+    return player_info
+
+
+def window_rows(data):
+    # One row per player and window for the savefiles, records without windows stay as they are
+    rows = []
+    for player_info in data:
+        if "windows" not in player_info:
+            rows.append(player_info)
+            continue
+        profile = {key: value for key, value in player_info.items() if key != "windows"}
+        for name, stats in player_info["windows"].items():
+            rows.append({**profile, "window": name, **stats})
+    return rows
+
+
+def cache_key(page_url, window):
+    # Same page and window whatever the dates in the URL, so --offline finds the pages of a
+    # rolling window that got cached on an earlier day (but never the pages of another window)
+    spec = {key: value for key, value in window.items() if key != "name"}
+    return f"{page_url.split('?')[0]}#{json.dumps(spec, sort_keys=True)}"
+
+
+async def fetch_pages(session, stats_url, window):
+    individual_url = stats_url.replace("players/", "players/individual/")
+
+    # Get HTML (from the cache if possible), both pages load at the same time in two tabs
+    pages = await asyncio.gather(
+        page_cache.fetch(
+            session, stats_url, "div.stats-player", cache_key(stats_url, window)
+        ),
+        page_cache.fetch(
+            session,
+            individual_url,
+            "div.columns",
+            cache_key(individual_url, window),
+            tab=1,
+        ),
+        return_exceptions=True,  # the other tab gets to finish before the session moves on
+    )
+    for page in pages:
+        if isinstance(page, BaseException):
+            raise page
+    return pages
+
+
+async def scrape_windows(session, url):
+    # Every window of the player one after another on this session, its browser is warm
+    # already. Closed windows come from window_cache without opening their pages
+    records = {}  # window name -> record of its pages
+    fetched = {}  # window name -> (stats URL, closed, html, individual html)
+    for window in config["stat_windows"]:
+        stats_url = update_player_url(url, window)
+        closed = window_closed(window)
+        record = window_cache.fresh(stats_url) if closed else None
+        if record is not None:
+            records[window["name"]] = record
+            continue
+        html, individual_html = await fetch_pages(session, stats_url, window)
+        fetched[window["name"]] = (stats_url, closed, html, individual_html)
+    if not fetched:
+        return combine_windows(records), "closed"
+
+    # Closed windows count with their URL, whether they came from window_cache or not
+    parts = []
+    for window in config["stat_windows"]:
+        name = window["name"]
+        if name in fetched and not fetched[name][1]:
+            parts += [name, *fetched[name][2:]]
+        else:
+            parts += [name, update_player_url(url, window)]
+    digest = section_hash(*parts)
+    # Same sections as last time, the last record is still right
+    player_info = with_windows(freshness.unchanged(url, digest))
+    result = "unchanged"
+    if player_info is None:
+        for name, (_, _, html, individual_html) in fetched.items():
+            with metrics.timer("parse_seconds", stage="player"):
+                records[name] = await parse_pool.run(
+                    parse_player, html, individual_html
+                )
+        player_info = combine_windows(records)
+        result = "parsed"
+    freshness.put(url, digest, player_info)
+    for name, (stats_url, closed, html, individual_html) in fetched.items():
+        if closed:
+            window_cache.put(
+                stats_url,
+                section_hash(html, individual_html),
+                window_record(player_info, name),
+            )
+    return player_info, result
+
+
+async def scrape_player(session, url):
+    session_id = session.session_id
+
+    start_time = time.perf_counter()
+
+    # Already scraped in this run under another URL, or recently enough in an earlier one,
+    # the pages don't get opened at all
+    key = freshness.key(url)
+    player_info = cached_player(key)
+    result = "cached"
+    if player_info is None:
+        player_info = with_windows(freshness.fresh(url))
+        result = "fresh"
+    if player_info is None:
+        player_info, result = await scrape_windows(session, url)
+    player_cache[key] = (time.monotonic(), player_info)
+    metrics.inc("freshness_total", stage="player", result=result)
+    player_info = {"player_url": url, **player_info}  # its HLTV ID is the key of the SQLite rows
+    name = player_info["name"]
+
+    # thread-safe
+    async with metrics.locked(lock, stage="player"):
+        if player_index.add(url):
+            player_data.append(player_info)
+        journal.append(url, player_info)
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+    metrics.observe("item_seconds", elapsed, stage="player")
+
+    log.success(
+        f"[+] [Session {session_id}] Successfully scraped {name} ({len(player_data)} / {url_total}) ({result}) ({elapsed:.2f}s)",
+        session=session_id,
+        url=url,
+        elapsed=elapsed,
+        freshness=result,
+    )
+    return player_info
+
+
+def distribute_urls(df, team_amount=config["team_amount"], done=()):
+    # Rosters of the first team_amount teams, whatever their size
+    if team_amount != -1:
+        df = df.head(team_amount)
+
+    # Players that are already in the journal don't get scraped again, and a player in two
+    # rosters (stand-in, transfer, old team row) only once. Checked by ID, the name part of
+    # the URL can differ
+    scheduled = DedupIndex()
+    for url in done:
+        scheduled.add(url)
+
+    # Get all URLs
+    urls = []
+    url_str_list = df["player_urls"].tolist()
+    for url_list_str in url_str_list:
+        # pandas saves the player_url list as a string, need to make it a list again before looping
+        # (Parquet files keep it as a list)
+        if isinstance(url_list_str, str):
+            url_list = ast.literal_eval(url_list_str)
+        else:
+            url_list = list(url_list_str)
+        for url in url_list:
+            if scheduled.add(url):
+                urls.append(url)
+
+    # All sessions pull from this queue until it's empty
+    return make_queue(urls)
+
+
+def save_data(
+    data,
+    savefile_location=config["savefile_location"],
+    output_format=config["output_format"],
+    sqlite_location=config["sqlite_location"],
+):
+    # Returns the path of the file that got written
+    data = window_rows(data)
+    filepath = Path(savefile_location)
+    # Creates directory if it's not existing
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    if sqlite_location:
+        # Rows of earlier runs get updated in place, on top of the savefile
+        write_sqlite("player", data, sqlite_location)
+    if output_format == "parquet":
+        # Flattened, typed columns, falls back to CSV if pyarrow is missing
+        parquet_path = filepath.with_suffix(".parquet")
+        if write_parquet("player", data, parquet_path):
+            return parquet_path
+    final_df = pd.DataFrame(data)
+    final_df.to_csv(filepath, index=False)
+    return filepath
+
+
+async def main(pool=None, resume=False, offline=False, replay=False, full=False):
+    global df, url_total
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+    # Team data, as CSV or Parquet like the team script writes it with the same output_format
+    df = read_table(config["file_to_read"], config["output_format"])
+
+    if config["team_amount"] == -1:
+        log.warning(f"[!] Scraping all players from {len(df)} teams")
+    else:
+        log.warning(f"[!] Scraping all players from {config['team_amount']} teams")
+
+    # A pool handed in by the caller stays open for the next stage
+    own_pool = pool is None and not offline
+    page_cache.offline = offline
+    for store in (freshness, window_cache):
+        store.offline = offline
+        store.refresh = full
+    if offline:
+        # Parsers only run on cached pages, no browser gets launched. One session per
+        # parse worker, so the cached pages get parsed on all of them at once
+        sessions = [Session("offline", None, None, None, None, True)] * max(
+            1, config["parse_workers"]
+        )
+    else:
+        if own_pool:
+            pool = BrowserPool(config)
+        await pool.start()
+        sessions = pool.sessions[: config["session_amount"]]
+
+        for session in sessions:
+            session_started(session)
+
+    # Results of an earlier (crashed) run get reused with --resume and --replay
+    done = set()
+    if resume or replay:
+        done, records = journal.load()
+        player_data.extend(records)
+        for url in done:
+            player_index.add(url)
+        log.warning(f"[!] Resuming, {len(done)} players already done")
+    else:
+        journal.reset()
+        dead_letters.reset()
+
+    # Sessions pull from one shared queue instead of a fixed slice each
+    if replay:
+        # Only what failed for good last time, everything else is in the journal already
+        queue = make_queue(url for url in dead_letters.load() if url not in done)
+        dead_letters.reset()
+        log.warning(f"[!] Replaying {queue.qsize()} failed URLs")
+    else:
+        queue = distribute_urls(df, config["team_amount"], done)
+        log.warning(f"[!] {queue.qsize()} different players left in their rosters")
+    url_total = len(done) + queue.qsize()
+
+    try:
+        await run_workers(
+            sessions,
+            queue,
+            scrape_player,
+            on_error=session_error,
+            max_errors=config["session_max_errors"],
+            retry=retry_policy,
+            dead_letters=dead_letters,
+        )
+    finally:
+        journal.flush()
+        freshness.compact()
+        window_cache.compact()
+        parse_pool.close()
+        for session in sessions:
+            session_finished(session)
+        if own_pool:
+            await pool.close()
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+
+    savefile = save_data(player_data)
+
+    log.success(
+        f"[+] Successfully saved to file ({savefile}) (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a crashed run, players that are already in the journal get skipped",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the pages in the HTML cache without opening a browser",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="only scrape the URLs in the dead letter file again, the results get added to the last run",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="open and parse every player again, even the fresh/unchanged ones",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            resume=args.resume,
+            offline=args.offline,
+            replay=args.replay,
+            full=args.full,
+        )
+    )
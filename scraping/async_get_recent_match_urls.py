@@ -1,228 +1,487 @@
-from camoufox.async_api import AsyncCamoufox
-from browserforge.fingerprints import Screen
-from bs4 import BeautifulSoup
-from pathlib import Path
-import pandas as pd
-import asyncio
-import random
-import time
-import json
-import math
-
-config = {
-    "savefile_location": "data/recent_match_urls.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
-    "url_amount": 5000,  # amount of urls to scrape, rounded to next 100
-    "headless": True,  # hide browser
-    "screen": Screen(max_width=1920, max_height=1080),
-    "screen_amount": 1,  # only matters if headless = False
-    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
-    "session_timeout": 1,  # timeout between sessions ([0.8, 1.2] also possible for a random timeout in a range)
-    "use_proxy": False,  # use proxy
-    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
-    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
-    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
-    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
-}
-
-
-class bcolors:  # colors to print in color
-    HEADER = "\033[95m"
-    OKBLUE = "\033[94m"
-    OKCYAN = "\033[96m"
-    SUCCESS = "\033[92m"
-    WARNING = "\033[93m"
-    FAIL = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-
-def status(msg, color=bcolors.ENDC):
-    print(color + msg + bcolors.ENDC)
-
-
-if config["url_amount"] > 0:
-    config["url_amount"] = int(math.ceil(config["url_amount"] / 100.0) * 100)
-
-recent_matches_url = "https://www.hltv.org/results"
-match_urls = []  # list for all urls (will get saved to csv)
-lock = asyncio.Lock()  # lock for thread-safety when writing to match_urls
-
-if config["use_proxy"]:
-    proxy_list = []
-    with open(config["proxy_location"], "r") as file:
-        for line in file:
-            proxy_list.append(line.strip())
-
-
-# Get random proxy from list
-def get_proxy():
-    proxy = random.choice(proxy_list)
-    if config["use_proxy_once"]:
-        proxy_list.remove(proxy)
-    proxy = proxy.split(":")
-    server = proxy[0] + ":" + proxy[1]
-    username = proxy[2]
-    password = proxy[3]
-    proxy_dict = {"server": server, "username": username, "password": password}
-    return proxy_dict
-
-
-async def scrape_match_urls(session_id, offsets, headless, url=recent_matches_url):
-    proxy = get_proxy() if config["use_proxy"] else None
-    async with AsyncCamoufox(
-        headless=headless,
-        screen=config["screen"],
-        geoip=True,
-        proxy=proxy,
-    ) as browser:
-        context = await browser.new_context()
-        if config["use_proxy"]:
-            status(
-                f"[+] [Session {session_id}] Successfully connected with proxy ({proxy['server']})",
-                bcolors.OKCYAN,
-            )
-        else:
-            status(
-                f"[+] [Session {session_id}] Successfully started without proxy",
-                bcolors.OKCYAN,
-            )
-
-        # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
-        with open(config["user_agents_location"], "r") as f:
-            user_agents = json.load(f)
-        user_agent_entry = random.choice(user_agents)
-        user_agent = user_agent_entry["ua"]
-        await context.set_extra_http_headers({"User-Agent": user_agent})
-
-        # Auto-login & add necessary cookies
-        with open(config["cookie_location"], "r") as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
-
-        page = await context.new_page()
-
-        for offset in offsets:
-            try:
-                start_time = time.perf_counter()
-
-                offset_url = f"{url}?offset={offset}"
-                await page.goto(offset_url)
-                html = await page.inner_html("div.results")
-                soup = BeautifulSoup(html, "html.parser")
-
-                recent_matches = soup.select_one("div.allres")
-                new_urls = 0
-                if recent_matches:
-                    result_con = recent_matches.select("div.result-con")
-                    before = len(match_urls)
-
-                    new_links = []
-                    for match in result_con:
-                        result = match.find("a", href=True)
-                        if result:
-                            full_url = f"https://www.hltv.org{result['href']}"
-                            new_links.append(full_url)
-
-                    # thread-safe
-                    async with lock:
-                        for link in new_links:
-                            if link not in match_urls:
-                                match_urls.append(link)
-                    after = len(match_urls)
-                    new_urls = after - before
-
-                end_time = time.perf_counter()
-                elapsed = end_time - start_time
-
-                status(
-                    f"[+] [Session {session_id}] {new_urls} URLs scraped! ({len(match_urls)} / {config['url_amount']}) ({elapsed:.2f}s)",
-                    bcolors.SUCCESS,
-                )
-
-                if type(config["session_timeout"]) == list:
-                    await asyncio.sleep(
-                        random.uniform(
-                            config["session_timeout"][0], config["session_timeout"][1]
-                        )
-                    )
-                else:
-                    await asyncio.sleep(config["session_timeout"])
-
-            except Exception as e:
-                status(
-                    f"[-] Session {session_id}: Exception at Offset {offset} - {e}",
-                    bcolors.FAIL,
-                )
-                break
-
-
-def distribute_offsets(url_amount, session_amount, step=100):
-    # Create empty lists for each session
-    offset_lists = [[] for _ in range(session_amount)]
-
-    # Generate all offsets
-    all_offsets = list(range(0, url_amount, step))
-
-    for offset in all_offsets:
-        # find the list with the smallest length
-        smallest_list = min(offset_lists, key=len)
-        # add offset to the smallest list
-        smallest_list.append(offset)
-
-    return offset_lists
-
-
-async def main():
-    total_start_time = time.perf_counter()
-
-    if config["url_amount"] == -1:
-        status(
-            "[!] Scraping all URLs (will probably take forever, not recommended)",
-            bcolors.WARNING,
-        )
-        return
-    else:
-        status(f"[!] Scraping {config['url_amount']} URLs", bcolors.WARNING)
-
-    offsets_per_session = distribute_offsets(
-        config["url_amount"], config["session_amount"]
-    )
-
-    tasks = []
-    for i in range(config["session_amount"]):
-
-        if not config["headless"]:
-            is_headless = False if i < config["screen_amount"] else True
-        else:
-            is_headless = True
-
-        tasks.append(
-            asyncio.create_task(
-                scrape_match_urls(
-                    session_id=i,
-                    offsets=offsets_per_session[i],
-                    headless=is_headless,
-                    url=recent_matches_url,
-                )
-            )
-        )
-
-    await asyncio.gather(*tasks)
-
-    total_elapsed = time.perf_counter() - total_start_time
-
-    # save results
-    final_df = pd.DataFrame(match_urls, columns=["match_url"])
-    filepath = Path(config["savefile_location"])
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    final_df.to_csv(filepath, index=False)
-
-    status(
-        f"[+] Successfully saved to file ({config['savefile_location']}) (took {total_elapsed:.2f}s)",
-        bcolors.SUCCESS,
-    )
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import RetryPolicy, make_queue, run_workers
+from dead_letters import DeadLetters
+from checkpoint import Journal
+from html_cache import HtmlCache
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from dedup import DedupIndex, entity_id
+from parser_backend import make_soup
+from datetime import datetime, timezone
+from pathlib import Path
+import pandas as pd
+import argparse
+import asyncio
+import json
+import time
+import math
+
+config = {
+    "savefile_location": "data/recent_match_urls.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
+    "journal_location": "data/recent_match_urls.journal.jsonl",  # results get appended here while scraping, used by --resume
+    "journal_batch_size": 20,  # amount of results that get written to the journal at once
+    "dead_letter_location": "data/recent_match_urls.dead_letters.jsonl",  # offsets that still failed after all retries, scraped again with --replay (None = not kept)
+    "html_cache_location": "data/html_cache",  # ".../.../html_cache" folder that keeps the raw HTML of every page (needed for --offline), None = disabled
+    "html_cache_ttl": 0,  # seconds a cached page gets reused instead of opening it again (0 = always open the page)
+    "state_location": "data/recent_match_urls.state.json",  # newest match that got scraped (high-water mark), --incremental stops there
+    "dedup_location": None,  # ".../.../match_ids.txt" keeps seen match IDs between runs, new URLs get appended to the savefile (None = only this run)
+    "url_amount": 5000,  # amount of urls to scrape, rounded to next 100 (with --incremental: the most that gets scraped before the newest known match is found)
+    "headless": True,  # hide browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions take over its work
+    "retry_attempts": 3,  # tries per offset for network errors/challenges, every retry on another session if possible (1 = no retries, parse errors never get retried)
+    "retry_backoff": 2,  # seconds before the first retry, doubles with every retry (+-50% jitter)
+    "retry_backoff_max": 60,  # seconds a retry waits at most
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+if config["url_amount"] > 0:
+    config["url_amount"] = int(math.ceil(config["url_amount"] / 100.0) * 100)
+
+recent_matches_url = "https://www.hltv.org/results"
+match_urls = []  # list for all urls (will get saved to csv)
+lock = asyncio.Lock()  # lock for thread-safety when writing to match_urls
+log = get_logger("results")  # structured records, written by a background thread
+journal = Journal(config["journal_location"], config["journal_batch_size"])  # on-disk checkpoint
+dead_letters = DeadLetters(config["dead_letter_location"])  # work items that failed for good
+retry_policy = RetryPolicy(
+    config["retry_attempts"], config["retry_backoff"], config["retry_backoff_max"]
+)
+page_cache = HtmlCache(config["html_cache_location"], config["html_cache_ttl"])  # raw HTML of every page
+match_index = DedupIndex(config["dedup_location"])  # match IDs that are already known
+newest_match = {}  # first result on offset 0, becomes the new high-water mark
+
+
+def session_started(session):
+    if session.proxy:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully connected with proxy ({session.proxy['server']})",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    else:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully started without proxy",
+            session=session.session_id,
+        )
+
+
+def session_finished(session):
+    if not session.limiter:  # offline, no page got opened
+        return
+    summary = session.limiter.summary(session.proxy_server)
+    if session.blocker:
+        summary += f", {session.blocker.summary()}"
+    if session.proxies and session.proxy:
+        summary += f", proxy: {session.proxies.summary(session.proxy_server)}"
+    log.info(
+        f"[+] [Session {session.session_id}] Finished, {summary}",
+        session=session.session_id,
+        proxy=session.proxy_server,
+    )
+
+
+def session_error(session, offset, e, kind="parse", retry_in=None):
+    next_step = "giving up" if retry_in is None else f"retrying in {retry_in:.1f}s"
+    # Retries are only a warning, the item is not lost yet
+    report = log.error if retry_in is None else log.warning
+    report(
+        f"[-] Session {session.session_id}: {kind} error at Offset {offset} ({next_step}) - {e}",
+        session=session.session_id,
+        url=f"{recent_matches_url}?offset={offset}",
+        kind=kind,
+        retry_in=retry_in,
+        error=f"{type(e).__name__}: {e}",
+    )
+
+
+def parse_result_entries(html, backend=config["parser_backend"]):
+    # (url, unix time in ms) of every result, newest first, None if the page has no results
+    soup = make_soup(html, backend)
+
+    recent_matches = soup.select_one("div.allres")
+    if not recent_matches:
+        return None
+
+    entries = []
+    for match in recent_matches.select("div.result-con"):
+        result = match.find("a", href=True)
+        if result:
+            full_url = f"https://www.hltv.org{result['href']}"
+            unix = match.get("data-zonedgrouping-entry-unix")
+            entries.append((full_url, int(unix) if unix and unix.isdigit() else None))
+    return entries
+
+
+def parse_results(html, backend=config["parser_backend"]):
+    entries = parse_result_entries(html, backend)
+    if entries is None:
+        return None
+    return [url for url, _ in entries]
+
+
+def load_state(state_location=config["state_location"]):
+    # High-water mark of the last run, empty if there was none
+    if not state_location or not Path(state_location).exists():
+        return {}
+    with open(state_location, "r") as f:
+        return json.load(f)
+
+
+def save_state(state, state_location=config["state_location"]):
+    if not state_location:
+        return
+    filepath = Path(state_location)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def remember_newest(entries):
+    # Top result of offset 0 is the newest match of this run
+    if entries and not newest_match:
+        url, unix = entries[0]
+        newest_match.update(
+            {
+                "newest_match_id": entity_id(url),
+                "newest_match_url": url,
+                "newest_match_unix": unix,
+            }
+        )
+
+
+async def scrape_match_urls(session, offset, url=recent_matches_url):
+    session_id = session.session_id
+
+    start_time = time.perf_counter()
+
+    # Get HTML (from the cache if possible)
+    offset_url = f"{url}?offset={offset}"
+    html = await page_cache.fetch(session, offset_url, "div.results")
+    with metrics.timer("parse_seconds", stage="results"):
+        entries = parse_result_entries(html)
+    new_links = [link for link, _ in entries] if entries is not None else None
+    if offset == 0:
+        remember_newest(entries)
+
+    added = []  # URLs that weren't known yet
+    if new_links is not None:
+        # thread-safe
+        async with metrics.locked(lock, stage="results"):
+            for link in new_links:
+                if match_index.add(link):
+                    match_urls.append(link)
+                    added.append(link)
+            journal.append(offset, new_links)
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+    metrics.observe("item_seconds", elapsed, stage="results")
+
+    log.success(
+        f"[+] [Session {session_id}] {len(added)} URLs scraped! ({len(match_urls)} / {config['url_amount']}) ({elapsed:.2f}s)",
+        session=session_id,
+        url=offset_url,
+        elapsed=elapsed,
+    )
+    return added
+
+
+def reached_known(url, unix, known, state):
+    # Stop condition of --incremental: a match that is already in the dataset or older than the high-water mark.
+    # After an incomplete run the dataset has a gap below the URLs it saved, only the high-water mark counts then
+    if not state.get("incomplete") and match_index.key(url) in known:
+        return True
+    if entity_id(url) == state.get("newest_match_id"):
+        return True
+    newest_unix = state.get("newest_match_unix")
+    # Results are sorted by date, a day older than the newest known match can't be new anymore
+    return bool(unix and newest_unix and unix < newest_unix - 24 * 60 * 60 * 1000)
+
+
+async def scrape_new_match_urls(session, offset, state, known, url=recent_matches_url):
+    # One results page of --incremental, True once it reached known matches (or has no results)
+    start_time = time.perf_counter()
+
+    offset_url = f"{url}?offset={offset}"
+    html = await page_cache.fetch(session, offset_url, "div.results")
+    with metrics.timer("parse_seconds", stage="results"):
+        entries = parse_result_entries(html)
+    if not entries:
+        return True
+    if offset == 0:
+        remember_newest(entries)
+
+    reached = False
+    new_links = []
+    async with metrics.locked(lock, stage="results"):
+        for link, unix in entries:
+            if reached_known(link, unix, known, state):
+                reached = True
+                continue
+            new_links.append(link)
+            if match_index.add(link):
+                match_urls.append(link)
+        journal.append(offset, new_links)
+
+    elapsed = time.perf_counter() - start_time
+    metrics.observe("item_seconds", elapsed, stage="results")
+    log.success(
+        f"[+] [Session {session.session_id}] {len(new_links)} new URLs at offset {offset} ({elapsed:.2f}s)",
+        session=session.session_id,
+        url=offset_url,
+        elapsed=elapsed,
+    )
+    return reached
+
+
+async def crawl_incremental(sessions, state, known, step=100):
+    # Walks the offsets one by one and stops on the first page that reaches known matches. Every
+    # page goes through run_workers like the offsets of a full crawl (retries on other sessions,
+    # dead letters). Returns False if a page failed for good, the crawl stops there
+    reached = {}  # offset -> page reached known matches
+
+    async def scrape_offset(session, offset):
+        reached[offset] = await scrape_new_match_urls(session, offset, state, known)
+
+    offset = 0
+    while config["url_amount"] == -1 or offset < config["url_amount"]:
+        await run_workers(
+            sessions,
+            make_queue([offset]),
+            scrape_offset,
+            on_error=session_error,
+            max_errors=config["session_max_errors"],
+            retry=retry_policy,
+            dead_letters=dead_letters,
+        )
+        if offset not in reached:
+            return False
+        if reached[offset]:
+            break
+        offset += step
+    return True
+
+
+def merge_results(new_urls, filepath):
+    # New URLs on top (newest first), followed by the ones from earlier runs
+    existing = []
+    if filepath.exists():
+        existing = pd.read_csv(filepath)["match_url"].tolist()
+    seen = DedupIndex()
+    merged = [link for link in new_urls + existing if seen.add(link)]
+    return pd.DataFrame(merged, columns=["match_url"])
+
+
+def distribute_offsets(url_amount, step=100, done=()):
+    # Generate all offsets
+    all_offsets = list(range(0, url_amount, step))
+
+    # Offsets that are already in the journal don't get scraped again
+    all_offsets = [offset for offset in all_offsets if offset not in done]
+
+    # All sessions pull from this queue until it's empty
+    return make_queue(all_offsets)
+
+
+async def main(
+    pool=None, resume=False, offline=False, incremental=False, replay=False
+):
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+
+    filepath = Path(config["savefile_location"])
+    state = load_state(config["state_location"]) if incremental else {}
+    if incremental and not state.get("newest_match_id"):
+        log.warning(
+            "[!] No high-water mark from an earlier run yet, scraping everything once"
+        )
+        incremental = False
+
+    if incremental:
+        log.warning(
+            f"[!] Scraping new URLs until match {state['newest_match_id']} is reached"
+        )
+    elif config["url_amount"] == -1:
+        log.warning(
+            "[!] Scraping all URLs (will probably take forever, not recommended)"
+        )
+        stop_logging()
+        return
+    else:
+        log.warning(f"[!] Scraping {config['url_amount']} URLs")
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+
+    # A pool handed in by the caller stays open for the next stage
+    own_pool = pool is None and not offline
+    page_cache.offline = offline
+    if offline:
+        # Parsers only run on cached pages, no browser gets launched
+        sessions = [Session("offline", None, None, None, None, True)]
+    else:
+        if own_pool:
+            pool = BrowserPool(config)
+        await pool.start()
+        sessions = pool.sessions[: config["session_amount"]]
+
+        for session in sessions:
+            session_started(session)
+
+    if incremental:
+        # Matches of the existing dataset mark where the new ones end (not the
+        # URLs of a resumed run, the matches below them are still missing)
+        if filepath.exists():
+            for link in pd.read_csv(filepath)["match_url"]:
+                match_index.add(link)
+        known = set(match_index.ids)
+
+    # Results of an earlier (crashed) run get reused with --resume and --replay
+    done = set()
+    if resume or replay:
+        done, records = journal.load()
+        for links in records:
+            for link in links:
+                if match_index.add(link):
+                    match_urls.append(link)
+        if incremental:
+            done = set()  # only a few pages, offset 0 is needed for the high-water mark anyway
+        log.warning(f"[!] Resuming, {len(done)} offsets already done")
+    else:
+        journal.reset()
+        dead_letters.reset()
+
+    complete = True
+    try:
+        if incremental:
+            complete = await crawl_incremental(sessions, state, known)
+        else:
+            # Sessions pull from one shared queue instead of a fixed slice each
+            if replay:
+                # Only what failed for good last time, everything else is in the journal already
+                queue = make_queue(
+                    offset for offset in dead_letters.load() if offset not in done
+                )
+                dead_letters.reset()
+                log.warning(f"[!] Replaying {queue.qsize()} failed offsets")
+            else:
+                queue = distribute_offsets(config["url_amount"], done=done)
+            await run_workers(
+                sessions,
+                queue,
+                scrape_match_urls,
+                on_error=session_error,
+                max_errors=config["session_max_errors"],
+                retry=retry_policy,
+                dead_letters=dead_letters,
+            )
+    finally:
+        journal.flush()
+        for session in sessions:
+            session_finished(session)
+        if own_pool:
+            await pool.close()
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+
+    # save results
+    final_df = pd.DataFrame(match_urls, columns=["match_url"])
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    if incremental:
+        # Only the new URLs got scraped, merge them into the existing dataset
+        merge_results(match_urls, filepath).to_csv(filepath, index=False)
+    elif config["dedup_location"] and filepath.exists():
+        # IDs from earlier runs got skipped, so only the new URLs get added to the file
+        final_df.to_csv(filepath, mode="a", header=False, index=False)
+    else:
+        final_df.to_csv(filepath, index=False)
+    match_index.save()
+
+    # Next --incremental run stops at the newest match of this one. Cached pages of an offline
+    # run can be older than the last online run, so they don't move it. A crawl that stopped on a
+    # failed page keeps the old mark, the next one walks down to it again
+    if not complete:
+        log.error(
+            "[-] Incremental crawl stopped on a failed page, the high-water mark stays where it was"
+        )
+        state["incomplete"] = True
+    elif newest_match and not offline:
+        state.update(newest_match)
+        state.pop("incomplete", None)
+    if state and not offline:
+        state["updated_at"] = datetime.now(timezone.utc).isoformat()
+        save_state(state, config["state_location"])
+
+    log.success(
+        f"[+] Successfully saved to file ({config['savefile_location']}) (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a crashed run, offsets that are already in the journal get skipped",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the pages in the HTML cache without opening a browser",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only scrape results newer than the last run and merge them into the savefile",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="only scrape the offsets in the dead letter file again, the results get added to the last run",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            resume=args.resume,
+            offline=args.offline,
+            incremental=args.incremental,
+            replay=args.replay,
+        )
+    )
@@ -1,358 +1,331 @@
-from camoufox.async_api import AsyncCamoufox
-from browserforge.fingerprints import Screen
-from bs4 import BeautifulSoup
-from pathlib import Path
-import pandas as pd
-import asyncio
-import random
-import time
-import json
-
-config = {
-    "file_to_read": "data/team_urls.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
-    "savefile_location": "data/team_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
-    "team_amount": 100,  # -1 = all
-    "headless": True,  # hide the browser
-    "screen": Screen(max_width=1920, max_height=1080),
-    "screen_amount": 1,  # only matters if headless = False
-    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
-    "session_timeout": 1,  # timeout between sessions ([0.8, 1.2] also possible for a random timeout in a range)
-    "use_proxy": False,  # use proxy
-    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
-    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
-    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
-    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
-}
-
-
-class bcolors:  # colors to print in color
-    HEADER = "\033[95m"
-    OKBLUE = "\033[94m"
-    OKCYAN = "\033[96m"
-    SUCCESS = "\033[92m"
-    WARNING = "\033[93m"
-    FAIL = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-
-def status(msg, color=bcolors.ENDC):
-    print(color + msg + bcolors.ENDC)
-
-
-df = pd.read_csv(config["file_to_read"])
-team_data = []  # List that gets turned into the savefile
-lock = asyncio.Lock()  # lock for thread-safety when writing to data list
-
-if config["use_proxy"]:
-    proxy_list = []
-    with open(config["proxy_location"], "r") as file:
-        for line in file:
-            proxy_list.append(line.strip())
-
-
-# Get random proxy from list
-def get_proxy():
-    proxy = random.choice(proxy_list)
-    if config["use_proxy_once"]:
-        proxy_list.remove(proxy)
-    proxy = proxy.split(":")
-    server = proxy[0] + ":" + proxy[1]
-    username = proxy[2]
-    password = proxy[3]
-    proxy_dict = {"server": server, "username": username, "password": password}
-    return proxy_dict
-
-
-def get_avg_player_age(soup):
-    team_stats = soup.select("div.profile-team-stat")
-
-    for stat in team_stats:
-        b_tag = stat.find("b")
-        if b_tag and "Average player age" in b_tag.text:
-            age = stat.select_one("span.right")
-            if age:
-                return age.text
-            break
-
-
-def get_player_urls(soup):
-    team_container = soup.select_one("div.bodyshot-team-bg")
-    player_links = team_container.select("a[href*='/player/']")
-    player_urls = []
-    for link in player_links:
-        if link:
-            href = link.get("href")
-            if href and "/player/" in href:
-                full_url = (
-                    f"https://www.hltv.org{href}" if href.startswith("/") else href
-                )
-                player_urls.append(full_url)
-    return player_urls
-
-
-def get_coach_url(soup):
-    coach_link = soup.select_one("a[href*='/coach/']")
-    if coach_link:
-        href = coach_link.get("href")
-        if href and "/coach/" in href:
-            full_url = f"https://www.hltv.org{href}" if href.startswith("/") else href
-            return full_url
-
-
-def get_winstreak(soup):
-    matchesBox = soup.select_one("#matchesBox")
-    if matchesBox:
-        highlighted_stats = matchesBox.select("div.highlighted-stat")
-
-        for stat in highlighted_stats:
-            description = stat.find("div", class_="description")
-            if description and "Current win streak" in description.text:
-                stat_value = stat.find("div", class_="stat")
-                if stat_value:
-                    return stat_value.text
-
-
-def get_winrate(soup):  # from last 3 months
-    matchesBox = soup.select_one("#matchesBox")
-    if matchesBox:
-        highlighted_stats = matchesBox.select("div.highlighted-stat")
-
-        for stat in highlighted_stats:
-            description = stat.find("div", class_="description")
-            if description and "Win rate" in description.text:
-                stat_value = stat.find("div", class_="stat")
-                if stat_value:
-                    return stat_value.text.replace("%", "")
-
-
-# improvement possible, only scrapes winrate of best 6 maps on team profile
-def get_map_winrate(soup, map):
-    map_statistics = soup.select_one("div.map-statistics")
-    if map_statistics:
-        map_statistics_container = map_statistics.select("div.map-statistics-container")
-
-        for container in map_statistics_container:
-            map_element = container.select_one("div.map-statistics-row-map-mapname")
-            if map_element:
-                map_name = map_element.text.strip()
-
-                if map_name == map:
-                    winrate_element = container.select_one(
-                        "div.map-statistics-row-win-percentage"
-                    )
-                    if winrate_element:
-                        return winrate_element.text.replace("%", "").strip()
-
-    return None  # if map is not in the best 6
-
-
-async def scrape_team(session_id, headless, url_list):
-    proxy = get_proxy() if config["use_proxy"] else None
-    async with AsyncCamoufox(
-        headless=headless,
-        screen=config["screen"],
-        geoip=True,
-        proxy=proxy,
-    ) as browser:
-        context = await browser.new_context()
-        if config["use_proxy"]:
-            status(
-                f"[+] [Session {session_id}] Successfully connected with proxy ({proxy['server']})",
-                bcolors.OKCYAN,
-            )
-        else:
-            status(
-                f"[+] [Session {session_id}] Successfully started without proxy",
-                bcolors.OKCYAN,
-            )
-
-        # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
-        with open(config["user_agents_location"], "r") as f:
-            user_agents = json.load(f)
-        user_agent_entry = random.choice(user_agents)
-        user_agent = user_agent_entry["ua"]
-        await context.set_extra_http_headers({"User-Agent": user_agent})
-
-        # Auto-login & add necessary cookies
-        with open(config["cookie_location"], "r") as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
-
-        page = await context.new_page()
-
-        for url in url_list:
-            try:
-                start_time = time.perf_counter()
-
-                # Get HTML
-                await page.goto(url)
-                html = await page.inner_html("div.colCon")
-                soup = BeautifulSoup(html, "html.parser")
-
-                team_name_element = soup.select_one("h1.profile-team-name")
-                team_name = (
-                    team_name_element.text.strip().replace(" ", "")
-                    if team_name_element
-                    else None
-                )
-
-                team_region_element = soup.select_one("div.team-country")
-                team_region = (
-                    team_region_element.text.strip() if team_region_element else None
-                )
-
-                world_ranking_element = soup.select_one("a[href*='/ranking/teams/']")
-                world_ranking = (
-                    world_ranking_element.text.strip()
-                    if world_ranking_element
-                    else None
-                )
-
-                valve_ranking_element = soup.select_one(
-                    "a[href*='/valve-ranking/teams']"
-                )
-                valve_ranking = (
-                    valve_ranking_element.text.strip()
-                    if valve_ranking_element
-                    else None
-                )
-
-                average_age = get_avg_player_age(soup)
-                player_urls = get_player_urls(soup)
-                coach_url = get_coach_url(soup)
-                current_winstreak = get_winstreak(soup)
-                winrate = get_winrate(soup)  # from last 3 months
-
-                map_winrates = {  # only 6 best maps get scraped
-                    "Ancient": get_map_winrate(soup, "Ancient"),
-                    "Anubis": get_map_winrate(soup, "Anubis"),
-                    "Dust2": get_map_winrate(soup, "Dust2"),
-                    "Inferno": get_map_winrate(soup, "Inferno"),
-                    "Mirage": get_map_winrate(soup, "Mirage"),
-                    "Nuke": get_map_winrate(soup, "Nuke"),
-                    "Overpass": get_map_winrate(soup, "Overpass"),
-                    "Train": get_map_winrate(soup, "Train"),
-                    "Vertigo": get_map_winrate(soup, "Vertigo"),
-                }
-
-                team_info = {
-                    # "team_url": url,
-                    "team_name": team_name,
-                    "team_region": team_region,
-                    "world_ranking": world_ranking,
-                    "valve_ranking": valve_ranking,
-                    "avg_player_age": average_age,
-                    "current_winstreak": current_winstreak,
-                    "winrate": winrate,
-                    "map_winrates": map_winrates,
-                    "coach_url": coach_url,
-                    "player_urls": player_urls,
-                }
-
-                # thread-safe
-                async with lock:
-                    if team_info not in team_data:
-                        team_data.append(team_info)
-
-                end_time = time.perf_counter()
-                elapsed = end_time - start_time
-
-                if config["team_amount"] == -1:
-                    status(
-                        f"[+] [Session {session_id}] Successfully scraped {team_info["team_name"]} ({team_info["world_ranking"]} World) ({len(team_data)} / {len(df["team_url"])}) ({elapsed:.2f}s)",
-                        bcolors.SUCCESS,
-                    )
-                else:
-                    status(
-                        f"[+] [Session {session_id}] Successfully scraped {team_info["team_name"]} ({team_info["world_ranking"]} World) ({len(team_data)} / {config["team_amount"]}) ({elapsed:.2f}s)",
-                        bcolors.SUCCESS,
-                    )
-
-                if type(config["session_timeout"]) == list:
-                    await asyncio.sleep(
-                        random.uniform(
-                            config["session_timeout"][0], config["session_timeout"][1]
-                        )
-                    )
-                else:
-                    await asyncio.sleep(config["session_timeout"])
-
-            except Exception as e:
-                status(
-                    f"[-] Session {session_id}: Exception - {e}",
-                    bcolors.FAIL,
-                )
-                return  # or break
-
-
-def distribute_urls(
-    df, team_amount=config["team_amount"], session_amount=config["session_amount"]
-):
-    # Create a list of empty lists for each session
-    url_lists = [[] for _ in range(session_amount)]
-
-    # Get all URLs
-    urls = df["team_url"].tolist()
-
-    # Distribute the URLs evenly across the sessions
-    for url in urls[:team_amount]:
-        smallest_list = min(url_lists, key=len)
-        smallest_list.append(url)
-
-    return url_lists
-
-
-async def main():
-    total_start_time = time.perf_counter()
-
-    if config["team_amount"] == -1:
-        status(
-            f"[!] Scraping all teams ({len(df["team_url"])})",
-            bcolors.WARNING,
-        )
-    else:
-        status(f"[!] Scraping {config["team_amount"]} teams", bcolors.WARNING)
-
-    urls_per_session = distribute_urls(
-        df, config["team_amount"], config["session_amount"]
-    )
-
-    tasks = []
-    for i in range(config["session_amount"]):
-
-        if not config["headless"]:
-            is_headless = False if i < config["screen_amount"] else True
-        else:
-            is_headless = True
-
-        tasks.append(
-            asyncio.create_task(
-                scrape_team(
-                    session_id=i,
-                    headless=is_headless,
-                    url_list=urls_per_session[i],
-                )
-            )
-        )
-
-    await asyncio.gather(*tasks)
-
-    total_elapsed = time.perf_counter() - total_start_time
-
-    final_df = pd.DataFrame(team_data)
-    filepath = Path(config["savefile_location"])
-    # Creates directory if it's not existing
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    # Change "to_csv" to something else to save it in a different format (need to change savefile ending too)
-    final_df.to_csv(filepath, index=False)
-
-    status(
-        f"[+] Successfully saved to file ({config["savefile_location"]}) (took {total_elapsed:.2f}s)",
-        bcolors.SUCCESS,
-    )
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import RetryPolicy, make_queue, run_workers
+from dead_letters import DeadLetters
+from checkpoint import Journal
+from html_cache import HtmlCache
+from freshness import FreshnessStore, section_hash
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from parse_pool import ParsePool
+from dedup import DedupIndex
+from columnar import write_parquet
+from sqlite_sink import write_sqlite
+from extractors import parse_team
+from pathlib import Path
+import pandas as pd
+import argparse
+import asyncio
+import time
+
+config = {
+    "file_to_read": "data/team_urls.csv",  # ".../.../example.csv" (file to read from, e.g. urls)
+    "savefile_location": "data/team_data.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
+    "journal_location": "data/team_data.journal.jsonl",  # results get appended here while scraping, used by --resume
+    "journal_batch_size": 20,  # amount of results that get written to the journal at once
+    "dead_letter_location": "data/team_data.dead_letters.jsonl",  # URLs that still failed after all retries, scraped again with --replay (None = not kept)
+    "html_cache_location": "data/html_cache",  # ".../.../html_cache" folder that keeps the raw HTML of every page (needed for --offline), None = disabled
+    "html_cache_ttl": 0,  # seconds a cached page gets reused instead of opening it again (0 = always open the page)
+    "freshness_location": "data/team_data.freshness.jsonl",  # last scrape time, section hash and record of every team, fresh teams get skipped and unchanged pages don't get parsed again (None = always scrape everything)
+    "freshness_ttl": 21600,  # seconds a team counts as fresh after it got scraped, its page doesn't get opened again until then (0 = always open it, only skip the parsing if it didn't change)
+    "team_amount": 100,  # -1 = all
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "session_amount": 2,  # amount of parallel sessions (you will get rate limited if you set this too high)
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions take over its work
+    "retry_attempts": 3,  # tries per URL for network errors/challenges, every retry on another session if possible (1 = no retries, parse errors never get retried)
+    "retry_backoff": 2,  # seconds before the first retry, doubles with every retry (+-50% jitter)
+    "retry_backoff_max": 60,  # seconds a retry waits at most
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "output_format": "csv",  # "csv" or "parquet" (typed, flattened columns, needs pyarrow, savefile ending becomes .parquet)
+    "sqlite_location": None,  # "data/hltv.sqlite" = also upsert the records into normalized tables (matches, match_maps, teams, team_map_winrates, players, player_side_stats) keyed on HLTV IDs (None = off)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "parse_workers": 4,  # processes that parse pages while the sessions open the next ones (0 = parse in the main process)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+df = None  # input CSV, gets read in main() so the parsers can be imported without it
+team_data = []  # List that gets turned into the savefile
+url_total = "?"  # amount of teams in this run, set in main() (unknown while streaming)
+lock = asyncio.Lock()  # lock for thread-safety when writing to data list
+log = get_logger("team")  # structured records, written by a background thread
+journal = Journal(config["journal_location"], config["journal_batch_size"])  # on-disk checkpoint
+dead_letters = DeadLetters(config["dead_letter_location"])  # work items that failed for good
+retry_policy = RetryPolicy(
+    config["retry_attempts"], config["retry_backoff"], config["retry_backoff_max"]
+)
+page_cache = HtmlCache(config["html_cache_location"], config["html_cache_ttl"])  # raw HTML of every page
+freshness = FreshnessStore(config["freshness_location"], config["freshness_ttl"])  # last record of every team
+parse_pool = ParsePool(config["parse_workers"], config["parser_backend"])  # worker processes for the parsers
+team_index = DedupIndex()  # team IDs that are already in team_data
+
+
+def session_started(session):
+    if session.proxy:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully connected with proxy ({session.proxy['server']})",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    else:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully started without proxy",
+            session=session.session_id,
+        )
+
+
+def session_finished(session):
+    if not session.limiter:  # offline, no page got opened
+        return
+    summary = session.limiter.summary(session.proxy_server)
+    if session.blocker:
+        summary += f", {session.blocker.summary()}"
+    if session.proxies and session.proxy:
+        summary += f", proxy: {session.proxies.summary(session.proxy_server)}"
+    log.info(
+        f"[+] [Session {session.session_id}] Finished, {summary}",
+        session=session.session_id,
+        proxy=session.proxy_server,
+    )
+
+
+def session_error(session, url, e, kind="parse", retry_in=None):
+    next_step = "giving up" if retry_in is None else f"retrying in {retry_in:.1f}s"
+    # Retries are only a warning, the item is not lost yet
+    report = log.error if retry_in is None else log.warning
+    report(
+        f"[-] Session {session.session_id}: {kind} error on {url} ({next_step}) - {e}",
+        session=session.session_id,
+        url=url,
+        kind=kind,
+        retry_in=retry_in,
+        error=f"{type(e).__name__}: {e}",
+    )
+
+
+async def scrape_team(session, url):
+    session_id = session.session_id
+
+    start_time = time.perf_counter()
+
+    # Scraped recently enough, the page doesn't get opened at all
+    team_info = freshness.fresh(url)
+    result = "fresh"
+    if team_info is None:
+        # Get HTML (from the cache if possible)
+        html = await page_cache.fetch(session, url, "div.colCon")
+        digest = section_hash(html)
+        # Same section as last time, the last record is still right
+        team_info = freshness.unchanged(url, digest)
+        result = "unchanged"
+        if team_info is None:
+            with metrics.timer("parse_seconds", stage="team"):
+                team_info = await parse_pool.run(parse_team, html)
+            result = "parsed"
+        freshness.put(url, digest, team_info)
+    metrics.inc("freshness_total", stage="team", result=result)
+    team_info = {"team_url": url, **team_info}  # its HLTV ID is the key of the SQLite rows
+
+    # thread-safe
+    async with metrics.locked(lock, stage="team"):
+        if team_index.add(url):
+            team_data.append(team_info)
+        journal.append(url, team_info)
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+    metrics.observe("item_seconds", elapsed, stage="team")
+
+    log.success(
+        f"[+] [Session {session_id}] Successfully scraped {team_info["team_name"]} ({team_info["world_ranking"]} World) ({len(team_data)} / {url_total}) ({result}) ({elapsed:.2f}s)",
+        session=session_id,
+        url=url,
+        elapsed=elapsed,
+        freshness=result,
+    )
+    return team_info
+
+
+def distribute_urls(df, team_amount=config["team_amount"], done=()):
+    # Get all URLs
+    urls = df["team_url"].tolist()
+    if team_amount != -1:
+        urls = urls[:team_amount]
+
+    # URLs that are already in the journal don't get scraped again
+    urls = [url for url in urls if url not in done]
+
+    # All sessions pull from this queue until it's empty
+    return make_queue(urls)
+
+
+def save_data(
+    data,
+    savefile_location=config["savefile_location"],
+    output_format=config["output_format"],
+    sqlite_location=config["sqlite_location"],
+):
+    # Returns the path of the file that got written
+    filepath = Path(savefile_location)
+    # Creates directory if it's not existing
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    if sqlite_location:
+        # Rows of earlier runs get updated in place, on top of the savefile
+        write_sqlite("team", data, sqlite_location)
+    if output_format == "parquet":
+        # Flattened, typed columns, falls back to CSV if pyarrow is missing
+        parquet_path = filepath.with_suffix(".parquet")
+        if write_parquet("team", data, parquet_path):
+            return parquet_path
+    final_df = pd.DataFrame(data)
+    final_df.to_csv(filepath, index=False)
+    return filepath
+
+
+async def main(pool=None, resume=False, offline=False, replay=False, full=False):
+    global df, url_total
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+    df = pd.read_csv(config["file_to_read"])
+
+    if config["team_amount"] == -1:
+        log.warning(f"[!] Scraping all teams ({len(df["team_url"])})")
+    else:
+        log.warning(f"[!] Scraping {config["team_amount"]} teams")
+
+    # A pool handed in by the caller stays open for the next stage
+    own_pool = pool is None and not offline
+    page_cache.offline = offline
+    freshness.offline = offline
+    freshness.refresh = full
+    if offline:
+        # Parsers only run on cached pages, no browser gets launched. One session per
+        # parse worker, so the cached pages get parsed on all of them at once
+        sessions = [Session("offline", None, None, None, None, True)] * max(
+            1, config["parse_workers"]
+        )
+    else:
+        if own_pool:
+            pool = BrowserPool(config)
+        await pool.start()
+        sessions = pool.sessions[: config["session_amount"]]
+
+        for session in sessions:
+            session_started(session)
+
+    # Results of an earlier (crashed) run get reused with --resume and --replay
+    done = set()
+    if resume or replay:
+        done, records = journal.load()
+        team_data.extend(records)
+        for url in done:
+            team_index.add(url)
+        log.warning(f"[!] Resuming, {len(done)} teams already done")
+    else:
+        journal.reset()
+        dead_letters.reset()
+
+    # Sessions pull from one shared queue instead of a fixed slice each
+    if replay:
+        # Only what failed for good last time, everything else is in the journal already
+        queue = make_queue(url for url in dead_letters.load() if url not in done)
+        dead_letters.reset()
+        log.warning(f"[!] Replaying {queue.qsize()} failed URLs")
+    else:
+        queue = distribute_urls(df, config["team_amount"], done)
+    url_total = len(done) + queue.qsize()
+
+    try:
+        await run_workers(
+            sessions,
+            queue,
+            scrape_team,
+            on_error=session_error,
+            max_errors=config["session_max_errors"],
+            retry=retry_policy,
+            dead_letters=dead_letters,
+        )
+    finally:
+        journal.flush()
+        freshness.compact()
+        parse_pool.close()
+        for session in sessions:
+            session_finished(session)
+        if own_pool:
+            await pool.close()
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+
+    savefile = save_data(team_data)
+
+    log.success(
+        f"[+] Successfully saved to file ({savefile}) (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a crashed run, teams that are already in the journal get skipped",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the pages in the HTML cache without opening a browser",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="only scrape the URLs in the dead letter file again, the results get added to the last run",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="open and parse every team again, even the fresh/unchanged ones",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            resume=args.resume,
+            offline=args.offline,
+            replay=args.replay,
+            full=args.full,
+        )
+    )
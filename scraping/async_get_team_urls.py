@@ -1,176 +1,237 @@
-from camoufox.async_api import AsyncCamoufox
-from browserforge.fingerprints import Screen
-from bs4 import BeautifulSoup
-from pathlib import Path
-import pandas as pd
-import asyncio
-import random
-import time
-import json
-
-config = {
-    "savefile_location": "data/team_urls.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
-    "team_amount": -1,  # -1 = all (Recommended here)
-    "headless": True,  # hide the browser
-    "screen": Screen(max_width=1920, max_height=1080),
-    # only 1 session is needed here (it's only one page to scrape)
-    "use_proxy": False,  # use proxy
-    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
-    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
-    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
-    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
-}
-
-
-class bcolors:  # colors to print in color
-    HEADER = "\033[95m"
-    OKBLUE = "\033[94m"
-    OKCYAN = "\033[96m"
-    SUCCESS = "\033[92m"
-    WARNING = "\033[93m"
-    FAIL = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-
-def status(msg, color=bcolors.ENDC):
-    print(color + msg + bcolors.ENDC)
-
-
-world_ranking_url = (
-    "https://www.hltv.org/ranking/teams"  # automatically adds current date when opening
-)
-team_urls = []  # List that gets turned into the savefile
-lock = asyncio.Lock()  # lock for thread-safety when writing to data list
-
-if config["use_proxy"]:
-    proxy_list = []
-    with open("rework/data/proxies.txt", "r") as file:
-        for line in file:
-            proxy_list.append(line.strip())
-
-
-# Get random proxy from list
-def get_proxy():
-    proxy = random.choice(proxy_list)
-    if config["use_proxy_once"]:
-        proxy_list.remove(proxy)
-    proxy = proxy.split(":")
-    server = proxy[0] + ":" + proxy[1]
-    username = proxy[2]
-    password = proxy[3]
-    proxy_dict = {"server": server, "username": username, "password": password}
-    return proxy_dict
-
-
-async def scrape_team_urls(session_id, headless, url):
-    proxy = get_proxy() if config["use_proxy"] else None
-    async with AsyncCamoufox(
-        headless=headless,
-        screen=config["screen"],
-        geoip=True,
-        proxy=proxy,
-    ) as browser:
-        context = await browser.new_context()
-        status(
-            f"[+] [Session {session_id}] Successfully connected with proxy ({proxy['server']})",
-            bcolors.OKCYAN,
-        )
-
-        # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
-        with open(config["user_agents_location"], "r") as f:
-            user_agents = json.load(f)
-        user_agent_entry = random.choice(user_agents)
-        user_agent = user_agent_entry["ua"]
-        await context.set_extra_http_headers({"User-Agent": user_agent})
-
-        # Auto-login & add necessary cookies
-        with open(config["cookie_location"], "r") as f:
-            cookies = json.load(f)
-        await context.add_cookies(cookies)
-
-        page = await context.new_page()
-
-        try:
-            start_time = time.perf_counter()
-            await page.goto(url)
-
-            # Get HTML
-            status(
-                f"[+] [Session {session_id}] Successfully opened URL ({world_ranking_url})",
-                bcolors.SUCCESS,
-            )
-            html = await page.inner_html("div.ranking")
-            soup = BeautifulSoup(html, "html.parser")
-            status(
-                f"[+] [Session {session_id}] Successfully parsed HTML", bcolors.SUCCESS
-            )
-
-            team_links = soup.select("a[href*='/team/']")
-
-            for link in team_links[: config["team_amount"]]:
-                href = link.get("href")
-                if href and "/team/" in href:
-                    full_url = (
-                        f"https://www.hltv.org{href}" if href.startswith("/") else href
-                    )
-                    # thread-safe
-                    async with lock:
-                        if full_url not in team_urls:
-                            team_urls.append(full_url)
-
-            end_time = time.perf_counter()
-            elapsed = end_time - start_time
-
-            status(
-                f"[+] [Session {session_id}] Found Team-URLs: {len(team_urls)} ({elapsed:.2f}s)",
-                bcolors.SUCCESS,
-            )
-
-        except Exception as e:
-            status(
-                f"[-] Session {session_id}: Exception - {e}",
-                bcolors.FAIL,
-            )
-            return  # or break
-
-
-async def main():
-    total_start_time = time.perf_counter()
-
-    if config["team_amount"] == -1:
-        status(
-            "[!] Scraping all teams (recommended)",
-            bcolors.WARNING,
-        )
-    else:
-        status(
-            f"[!] Scraping {config['team_amount']} teams (scraping all teams is recommended)",
-            bcolors.WARNING,
-        )
-
-    task = asyncio.create_task(
-        scrape_team_urls(
-            session_id=0, headless=config["headless"], url=world_ranking_url
-        )
-    )
-    await task
-
-    total_elapsed = time.perf_counter() - total_start_time
-
-    final_df = pd.DataFrame(team_urls, columns=["team_url"])
-    filepath = Path(config["savefile_location"])
-    # Creates directory if it's not existing
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    # Change "to_csv" to something else to save it in a different format (need to change savefile ending too)
-    final_df.to_csv(filepath, index=False)
-
-    status(
-        f"[+] Successfully saved to file ({config["savefile_location"]}) (took {total_elapsed:.2f}s)",
-        bcolors.SUCCESS,
-    )
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import RetryPolicy, make_queue, run_workers
+from html_cache import HtmlCache
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from dedup import DedupIndex
+from parser_backend import make_soup
+from pathlib import Path
+import pandas as pd
+import argparse
+import asyncio
+import time
+
+config = {
+    "savefile_location": "data/team_urls.csv",  # ".../.../example.csv" (file that will get created/updated when finished)
+    "team_amount": -1,  # -1 = all (Recommended here)
+    "html_cache_location": "data/html_cache",  # ".../.../html_cache" folder that keeps the raw HTML of every page (needed for --offline), None = disabled
+    "html_cache_ttl": 0,  # seconds a cached page gets reused instead of opening it again (0 = always open the page)
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    # only 1 session is needed here (it's only one page to scrape)
+    "retry_attempts": 3,  # tries for network errors/challenges (1 = no retries, parse errors never get retried)
+    "retry_backoff": 2,  # seconds before the first retry, doubles with every retry (+-50% jitter)
+    "retry_backoff_max": 60,  # seconds a retry waits at most
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+world_ranking_url = (
+    "https://www.hltv.org/ranking/teams"  # automatically adds current date when opening
+)
+team_urls = []  # List that gets turned into the savefile
+team_index = DedupIndex()  # team IDs that are already in team_urls
+page_cache = HtmlCache(config["html_cache_location"], config["html_cache_ttl"])  # raw HTML of every page
+lock = asyncio.Lock()  # lock for thread-safety when writing to data list
+log = get_logger("ranking")  # structured records, written by a background thread
+retry_policy = RetryPolicy(
+    config["retry_attempts"], config["retry_backoff"], config["retry_backoff_max"]
+)
+
+
+def parse_ranking(
+    html, team_amount=config["team_amount"], backend=config["parser_backend"]
+):
+    soup = make_soup(html, backend)
+
+    team_links = soup.select("a[href*='/team/']")
+    if team_amount != -1:
+        team_links = team_links[:team_amount]
+
+    links = []
+    for link in team_links:
+        href = link.get("href")
+        if href and "/team/" in href:
+            full_url = f"https://www.hltv.org{href}" if href.startswith("/") else href
+            links.append(full_url)
+    return links
+
+
+async def scrape_team_urls(session, url):
+    if session.proxy:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully connected with proxy ({session.proxy['server']})",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    elif session.page:
+        log.info(
+            f"[+] [Session {session.session_id}] Successfully started without proxy",
+            session=session.session_id,
+        )
+
+    session_id = session.session_id
+
+    start_time = time.perf_counter()
+
+    # Get HTML (from the cache if possible)
+    html = await page_cache.fetch(session, url, "div.ranking")
+    log.success(
+        f"[+] [Session {session_id}] Successfully opened URL ({world_ranking_url})",
+        session=session_id,
+        url=url,
+    )
+    with metrics.timer("parse_seconds", stage="ranking"):
+        links = parse_ranking(html)
+    log.success(
+        f"[+] [Session {session_id}] Successfully parsed HTML",
+        session=session_id,
+        url=url,
+    )
+
+    added = []  # URLs that weren't known yet
+    # thread-safe
+    async with metrics.locked(lock, stage="ranking"):
+        for full_url in links:
+            if team_index.add(full_url):
+                team_urls.append(full_url)
+                added.append(full_url)
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+    metrics.observe("item_seconds", elapsed, stage="ranking")
+
+    log.success(
+        f"[+] [Session {session_id}] Found Team-URLs: {len(team_urls)} ({elapsed:.2f}s)",
+        session=session_id,
+        url=url,
+        elapsed=elapsed,
+    )
+    return added
+
+
+def session_finished(session):
+    if not session.limiter:  # offline, no page got opened
+        return
+    summary = session.limiter.summary(session.proxy_server)
+    if session.blocker:
+        summary += f", {session.blocker.summary()}"
+    if session.proxies and session.proxy:
+        summary += f", proxy: {session.proxies.summary(session.proxy_server)}"
+    log.info(
+        f"[+] [Session {session.session_id}] Finished, {summary}",
+        session=session.session_id,
+        proxy=session.proxy_server,
+    )
+
+
+def session_error(session, url, e, kind="parse", retry_in=None):
+    next_step = "giving up" if retry_in is None else f"retrying in {retry_in:.1f}s"
+    # Retries are only a warning, the item is not lost yet
+    report = log.error if retry_in is None else log.warning
+    report(
+        f"[-] Session {session.session_id}: {kind} error on {url} ({next_step}) - {e}",
+        session=session.session_id,
+        url=url,
+        kind=kind,
+        retry_in=retry_in,
+        error=f"{type(e).__name__}: {e}",
+    )
+
+
+async def scrape_ranking(session):
+    # The one ranking page, retried on network errors/challenges
+    await run_workers(
+        [session],
+        make_queue([world_ranking_url]),
+        scrape_team_urls,
+        on_error=session_error,
+        max_errors=config["retry_attempts"],
+        retry=retry_policy,
+    )
+
+
+async def main(pool=None, offline=False):
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+
+    if config["team_amount"] == -1:
+        log.warning("[!] Scraping all teams (recommended)")
+    else:
+        log.warning(
+            f"[!] Scraping {config['team_amount']} teams (scraping all teams is recommended)"
+        )
+
+    page_cache.offline = offline
+    if offline:
+        # Parser only runs on the cached page, no browser gets launched
+        session = Session("offline", None, None, None, None, True)
+        await scrape_ranking(session)
+    else:
+        # A pool handed in by the caller stays open for the next stage
+        own_pool = pool is None
+        if own_pool:
+            pool = BrowserPool(config, size=1)
+        await pool.start()
+
+        session = await pool.acquire()
+        try:
+            await scrape_ranking(session)
+        finally:
+            session_finished(session)
+            pool.release(session)
+            if own_pool:
+                await pool.close()
+
+    metrics.stop()
+    for line in metrics.summary():
+        log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+
+    final_df = pd.DataFrame(team_urls, columns=["team_url"])
+    filepath = Path(config["savefile_location"])
+    # Creates directory if it's not existing
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    # Change "to_csv" to something else to save it in a different format (need to change savefile ending too)
+    final_df.to_csv(filepath, index=False)
+
+    log.success(
+        f"[+] Successfully saved to file ({config["savefile_location"]}) (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the ranking page in the HTML cache without opening a browser",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(offline=args.offline))
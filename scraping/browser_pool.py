@@ -0,0 +1,334 @@
+from resource_blocking import ResourceBlocker
+from contextlib import AsyncExitStack
+from rate_limiter import RateLimiter
+from proxy_manager import ProxyManager
+from storage_state import StorageStates
+from structured_log import get_logger
+from metrics import metrics
+import asyncio
+import random
+import json
+import time
+
+# Shown instead of the page while Cloudflare checks the browser
+CHALLENGE_TITLES = ["Just a moment", "Attention Required"]
+CHALLENGE = "Cloudflare challenge"
+
+log = get_logger("browser")  # proxy switches and quarantine waits of the sessions
+
+
+class BlockedError(Exception):  # HLTV answered with a 429 or a Cloudflare challenge instead of the page
+    def __init__(self, url, reason):
+        super().__init__(f"Blocked ({reason}) on {url}")
+        self.url = url
+        self.reason = reason
+
+
+class Session:  # one warm browser + context + tab, handed out to work items
+    def __init__(
+        self,
+        session_id,
+        browser,
+        context,
+        page,
+        proxy,
+        headless,
+        blocker=None,
+        limiter=None,
+        proxies=None,
+        relaunch=None,
+        states=None,
+        user_agent=None,
+    ):
+        self.session_id = session_id
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.tabs = [page]  # extra tabs of the same context (shared cookies), opened on first use
+        self.proxy = proxy
+        self.headless = headless
+        self.blocker = blocker  # ResourceBlocker of the context, None = nothing gets blocked
+        self.limiter = limiter  # RateLimiter shared by the pool, None = no waiting between pages
+        self.proxies = proxies  # ProxyManager shared by the pool, None = no proxies
+        self.relaunch = relaunch  # coroutine that gives the session a new browser + proxy
+        self.states = states  # StorageStates shared by the pool, None = nothing gets saved
+        self.user_agent = user_agent
+        self.state_saved = False  # storage state saved since the last challenge
+        self._stack = AsyncExitStack()  # keeps the browser open until the session gets closed/relaunched
+        self._relaunch_lock = asyncio.Lock()
+
+    @property
+    def proxy_server(self):
+        return self.proxy["server"] if self.proxy else None
+
+    async def get_tab(self, tab):
+        # Tab 0 is the session's page, the others get opened in the same context when first needed
+        while len(self.tabs) <= tab:
+            self.tabs.append(await self.context.new_page())
+        return self.tabs[tab]
+
+    async def _check_blocked(self, page, url, response):
+        if response is None:
+            return
+        if response.status == 429:
+            raise BlockedError(url, "429 Too Many Requests")
+        if response.headers.get("cf-mitigated") == "challenge":
+            raise BlockedError(url, CHALLENGE)
+        if response.status in (403, 503):
+            title = await page.title()
+            if any(challenge in title for challenge in CHALLENGE_TITLES):
+                raise BlockedError(url, CHALLENGE)
+
+    async def _leave_quarantine(self):
+        # A quarantined proxy doesn't get used for more pages, the session moves to a healthy one.
+        # Without one a new browser would get a quarantined proxy too, so the session waits for the
+        # first quarantine to end instead (if that's its own proxy, it keeps its browser)
+        async with self._relaunch_lock:  # both tabs can notice it at the same time
+            while self.proxies.is_quarantined(self.proxy_server):
+                if self.proxies.healthy():
+                    await self.relaunch(self)
+                    return
+                wait = max(0.0, self.proxies.quarantine_ends() - time.time())
+                log.warning(
+                    f"[!] [Session {self.session_id}] All proxies are quarantined, waiting {wait:.0f}s",
+                    session=self.session_id,
+                    proxy=self.proxy_server,
+                )
+                await asyncio.sleep(wait)
+                metrics.observe(
+                    "sleep_seconds",
+                    wait,
+                    session=self.session_id,
+                    proxy=self.proxy_server or "direct",
+                )
+
+    async def save_state(self):
+        # Cookies (incl. Cloudflare clearance) + local storage, so the next launch on this proxy skips the challenge
+        if not self.states or not self.context:
+            return
+        self.states.save(
+            self.proxy_server, self.user_agent, await self.context.storage_state()
+        )
+        self.state_saved = True
+
+    async def get_html(self, url, selector, tab=0):
+        if self.proxies and self.relaunch:
+            await self._leave_quarantine()
+
+        # Different tabs of one session can load pages at the same time, the limiter still decides when
+        page = await self.get_tab(tab)
+        labels = {"session": self.session_id, "proxy": self.proxy_server or "direct"}
+        if self.limiter:
+            waited = await self.limiter.acquire(self.proxy_server)
+            metrics.observe("sleep_seconds", waited, **labels)
+
+        start = time.perf_counter()
+        try:
+            response = await page.goto(url)
+            await self._check_blocked(page, url, response)
+        except BlockedError as e:
+            if e.reason == CHALLENGE and self.states:
+                self.states.invalidate(self.proxy_server)
+                self.state_saved = False
+            if self.limiter:
+                self.limiter.record(self.proxy_server, blocked=True)
+            if self.proxies:
+                self.proxies.record(self.proxy_server, blocked=True, session=self.session_id)
+            metrics.inc("pages_total", result="blocked", **labels)
+            raise
+        except Exception:
+            # Timeouts/connection errors, most likely the proxy
+            if self.proxies:
+                self.proxies.record(self.proxy_server, error=True, session=self.session_id)
+            metrics.inc("pages_total", result="error", **labels)
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.observe("navigation_seconds", elapsed, **labels)
+        metrics.inc("pages_total", result="ok", **labels)
+        if self.limiter:
+            self.limiter.record(self.proxy_server, elapsed)
+        if self.proxies:
+            self.proxies.record(self.proxy_server, elapsed, session=self.session_id)
+
+        with metrics.timer("inner_html_seconds", **labels):
+            html = await page.inner_html(selector)
+        metrics.inc("html_chars_total", len(html), **labels)  # of the selected element, not the response body
+        if self.states and not self.state_saved:
+            await self.save_state()  # first clean page, it gets saved again when the session closes
+        return html
+
+
+class BrowserPool:
+    def __init__(self, config, size=None):
+        self.config = config
+        self.size = size if size else config.get("session_amount", 1)
+        self.sessions = []
+        self._idle = asyncio.Queue()  # sessions that are free to use
+        self._user_agents = None
+        self._cookies = None
+        # Lives as long as the pool, so the next stage starts with the rate the last one ended on
+        self.limiter = RateLimiter(
+            rate=config.get("rate_limit", 1.0),
+            min_rate=config.get("rate_limit_min", 0.1),
+            max_rate=config.get("rate_limit_max", 5.0),
+            proxy_rate=config.get("proxy_rate_limit", 0.5),
+            proxy_max_rate=config.get("proxy_rate_limit_max", 2.0),
+            increase=config.get("rate_increase", 0.05),
+            decrease=config.get("rate_decrease", 0.5),
+            slow_response=config.get("slow_response", 8.0),
+        )
+        # Storage state of the last clean session of every proxy, new sessions start with it
+        self.states = None
+        if config.get("storage_state_location"):
+            self.states = StorageStates(
+                config["storage_state_location"],
+                config.get("storage_state_max_age", 86400),
+            )
+        # Health of every proxy, scores of earlier runs get loaded from proxy_scores_location
+        self.proxies = None
+        if config.get("use_proxy", False):
+            self.proxies = ProxyManager(
+                config["proxy_location"],
+                config.get("proxy_scores_location"),
+                use_once=config.get("use_proxy_once", False),
+                max_errors=config.get("proxy_max_errors", 3),
+                quarantine=config.get("proxy_quarantine", 60),
+                quarantine_max=config.get("proxy_quarantine_max", 3600),
+                shard=config.get("proxy_shard"),
+            )
+
+    def _is_headless(self, session_id):
+        # Only the first "screen_amount" browsers get a window
+        if not self.config["headless"]:
+            return session_id >= self.config.get("screen_amount", 1)
+        return True
+
+    async def _launch(self, session_id):
+        from camoufox.async_api import AsyncCamoufox  # offline modes never need a browser
+
+        proxy = self.proxies.get_proxy(session_id) if self.proxies else None
+        headless = self._is_headless(session_id)
+        stack = AsyncExitStack()
+        browser = await stack.enter_async_context(
+            AsyncCamoufox(
+                headless=headless,
+                screen=self.config["screen"],
+                geoip=True,
+                proxy=proxy,
+            )
+        )
+        # Last clean session on this proxy, with the user agent it had (the clearance cookie only works with it)
+        saved = None
+        if self.states:
+            saved = self.states.load(proxy["server"] if proxy else None)
+        if saved:
+            context = await browser.new_context(storage_state=saved["storage_state"])
+            user_agent = saved["user_agent"]
+        else:
+            context = await browser.new_context()
+            # User-Agent rotation (https://www.useragents.me/#most-common-desktop-useragents-json-csv)
+            user_agent = random.choice(self._user_agents)["ua"]
+        await context.set_extra_http_headers({"User-Agent": user_agent})
+
+        # Auto-login & add necessary cookies
+        await context.add_cookies(self._cookies)
+
+        # Abort images/fonts/ads/trackers, we only ever read one div of the HTML
+        blocker = None
+        if self.config.get("block_resources", False):
+            blocker = ResourceBlocker(
+                self.config.get("blocked_resource_types"),
+                self.config.get("blocked_hosts"),
+            )
+            await blocker.install(context)
+
+        page = await context.new_page()
+        session = Session(
+            session_id,
+            browser,
+            context,
+            page,
+            proxy,
+            headless,
+            blocker,
+            self.limiter,
+            self.proxies,
+            self.relaunch,
+            self.states,
+            user_agent,
+        )
+        session.state_saved = saved is not None
+        session._stack = stack
+        return session
+
+    async def relaunch(self, session):
+        # Closes the session's browser and opens a new one with the best proxy there is right now,
+        # the Session object stays the same so the workers holding it keep going
+        old_proxy = session.proxy_server
+        await session._stack.aclose()
+        fresh = await self._launch(session.session_id)
+        for attribute in (
+            "browser",
+            "context",
+            "page",
+            "tabs",
+            "proxy",
+            "blocker",
+            "user_agent",
+            "state_saved",
+            "_stack",
+        ):
+            setattr(session, attribute, getattr(fresh, attribute))
+        log.warning(
+            f"[!] [Session {session.session_id}] Proxy {old_proxy} is quarantined, switched to {session.proxy_server}",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+
+    async def start(self):
+        if self.sessions:  # already warm, e.g. reused by the next stage
+            return self.sessions
+
+        # Files only get read once per pool, not once per session
+        with open(self.config["user_agents_location"], "r") as f:
+            self._user_agents = json.load(f)
+        with open(self.config["cookie_location"], "r") as f:
+            self._cookies = json.load(f)
+
+        # Launch all browsers in parallel, geoip resolution is the slow part
+        self.sessions = list(
+            await asyncio.gather(*(self._launch(i) for i in range(self.size)))
+        )
+        for session in self.sessions:
+            self._idle.put_nowait(session)
+        return self.sessions
+
+    async def acquire(self):
+        return await self._idle.get()
+
+    def release(self, session):
+        self._idle.put_nowait(session)
+
+    async def close(self):
+        for session in self.sessions:
+            if session.state_saved:  # no challenge since the last save, keep the newest cookies
+                try:
+                    await session.save_state()
+                except Exception as e:
+                    log.warning(
+                        f"[!] [Session {session.session_id}] Storage state not saved ({e})",
+                        session=session.session_id,
+                        proxy=session.proxy_server,
+                    )
+            await session._stack.aclose()
+        if self.proxies:
+            self.proxies.save()
+        self.sessions = []
+        self._idle = asyncio.Queue()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,62 @@
+from pathlib import Path
+import json
+import os
+
+
+class Journal:  # append-only JSONL file of finished work items, survives crashes/Ctrl-C
+    def __init__(self, path, batch_size=20):
+        self.path = Path(path)
+        self.batch_size = batch_size  # records are written to disk in batches of this size
+        self._buffer = []
+
+    def load(self):
+        # Returns the keys (URLs/offsets) that are already done and their records
+        records = self.load_by_key()
+        return set(records), list(records.values())
+
+    def load_by_key(self):
+        # Same as load(), but as key -> record
+        records = {}
+        if not self.path.exists():
+            return records
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # last line can be cut off if the process got killed mid-write
+                if entry["key"] in records:
+                    continue
+                records[entry["key"]] = entry["record"]
+
+        # Don't glue the next batch onto a cut off line
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        return records
+
+    def reset(self):
+        # New run without --resume, don't mix old results into it
+        self._buffer = []
+        if self.path.exists():
+            self.path.unlink()
+
+    def append(self, key, record):
+        self._buffer.append({"key": key, "record": record})
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in self._buffer:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
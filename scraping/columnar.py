@@ -0,0 +1,201 @@
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+import warnings
+
+# Column types of every record, first matching pattern wins. Nested dicts become one column
+# per value ("ct-side.firepower.overall"), lists stay list columns
+MAP_FIELDS = [
+    ("map", "string"),
+    ("picked_by", "string"),
+    ("winner", "string"),
+    ("score_team_1", "int"),
+    ("score_team_2", "int"),
+]
+
+SCHEMAS = {
+    "match": [
+        ("match_url", "string"),
+        ("team_1", "string"),
+        ("team_2", "string"),
+        ("score_team_1", "int"),
+        ("score_team_2", "int"),
+        ("winner", "string"),
+        ("date", "date"),
+        ("hour", "int"),
+        ("event", "string"),
+        ("mode", "string"),
+        ("maps", "maps"),
+    ],
+    "team": [
+        ("team_url", "string"),
+        ("team_name", "string"),
+        ("team_region", "string"),
+        ("world_ranking", "int"),
+        ("valve_ranking", "int"),
+        ("avg_player_age", "float"),
+        ("current_winstreak", "int"),
+        ("winrate", "float"),
+        ("map_winrates.*", "float"),
+        ("coach_url", "string"),
+        ("player_urls", "strings"),
+    ],
+    "player": [
+        ("player_url", "string"),
+        ("name", "string"),
+        ("country", "string"),
+        ("team", "string"),
+        ("age", "int"),
+        ("window", "string"),  # one row per stats window
+        ("start_date", "string"),
+        ("end_date", "string"),
+        ("maps", "strings"),
+        ("event", "string"),
+        ("overall.kills", "int"),
+        ("overall.deaths", "int"),
+        ("overall.maps_played", "int"),
+        ("overall.rounds_played", "int"),
+        ("opening.kills", "int"),
+        ("opening.deaths", "int"),
+        ("round.*", "int"),
+        ("weapon.*", "int"),
+        ("*.overall", "int"),  # role scores out of 100
+        ("*.time_alive_per_round_seconds", "int"),
+        ("*", "float"),
+    ],
+}
+
+
+def column_type(dataset, column):
+    for pattern, kind in SCHEMAS[dataset]:
+        if fnmatch(column, pattern):
+            return kind
+    return "string"
+
+
+def flatten(record, prefix=""):
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            row.update(flatten(value, f"{prefix}{key}."))
+        else:
+            row[f"{prefix}{key}"] = value
+    return row
+
+
+def to_number(value, kind):
+    # "87.5%", "#1", "4,521" -> number, None if there is no number
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if kind == "int" else float(value)
+    text = str(value).strip().replace("%", "").replace("#", "").replace(",", "")
+    try:
+        return int(float(text)) if kind == "int" else float(text)
+    except ValueError:
+        return None
+
+
+def split_score(score):
+    # "13:8" -> (13, 8)
+    parts = str(score).split(":") if score else []
+    if len(parts) != 2:
+        return None, None
+    return to_number(parts[0], "int"), to_number(parts[1], "int")
+
+
+def convert(value, kind):
+    if kind in ("int", "float"):
+        return to_number(value, kind)
+    if kind == "date":
+        try:
+            return datetime.strptime(value, "%d/%m/%Y").date()
+        except (TypeError, ValueError):
+            return None
+    if kind == "maps":
+        maps = []
+        for map_info in value or []:
+            score_team_1, score_team_2 = split_score(map_info.get("score"))
+            maps.append(
+                {
+                    "map": map_info.get("map"),
+                    "picked_by": map_info.get("picked_by"),
+                    "winner": map_info.get("winner"),
+                    "score_team_1": score_team_1,
+                    "score_team_2": score_team_2,
+                }
+            )
+        return maps
+    if kind == "strings":
+        return [str(item) for item in value or []]
+    return None if value is None else str(value)
+
+
+def typed_rows(dataset, records):
+    # Flattened records with every value converted to the type of its column
+    rows = []
+    types = {}  # column -> type, patterns only get matched once per column
+    for record in records:
+        row = flatten(record)
+        for column in row:
+            if column not in types:
+                types[column] = column_type(dataset, column)
+        rows.append(
+            {column: convert(value, types[column]) for column, value in row.items()}
+        )
+    return rows
+
+
+def arrow_schema(dataset, columns):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "date": pa.date32(),
+        "strings": pa.list_(pa.string()),
+        "maps": pa.list_(
+            pa.struct(
+                [
+                    (name, pa.string() if kind == "string" else pa.int64())
+                    for name, kind in MAP_FIELDS
+                ]
+            )
+        ),
+    }
+    return pa.schema(
+        [(column, types[column_type(dataset, column)]) for column in columns]
+    )
+
+
+def write_parquet(dataset, records, filepath):
+    # Returns False (nothing written) if pyarrow is not installed
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        warnings.warn("pyarrow is not installed, can't write Parquet")
+        return False
+
+    rows = typed_rows(dataset, records)
+    columns = {}  # every column of every row, in order of appearance
+    for row in rows:
+        for column in row:
+            columns.setdefault(column)
+    if not columns:  # no records, the columns without wildcards still get written
+        columns = [pattern for pattern, _ in SCHEMAS[dataset] if "*" not in pattern]
+    table = pa.Table.from_pylist(rows, schema=arrow_schema(dataset, columns))
+    pq.write_table(table, Path(filepath))
+    return True
+
+
+def read_table(filepath, output_format="csv"):
+    # Savefile the way save_data() wrote it with this output_format: the Parquet file next to the
+    # CSV path, or the CSV (also what gets written if pyarrow is missing)
+    import pandas as pd
+
+    parquet_path = Path(filepath).with_suffix(".parquet")
+    if output_format == "parquet" and parquet_path.exists():
+        return pd.read_parquet(parquet_path)
+    return pd.read_csv(filepath)
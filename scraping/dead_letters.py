@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+
+
+class DeadLetters:  # JSONL file of work items that failed for good, can be replayed with --replay
+    def __init__(self, path):
+        self.path = Path(path) if path else None  # None = failed items only get printed
+
+    def add(self, key, kind, error=None, attempts=0):
+        # Written right away, there are few of them and they must not get lost in a crash
+        if not self.path:
+            return
+        if error and not isinstance(error, str):  # job stores keep errors as text already
+            error = f"{type(error).__name__}: {error}"
+        entry = {
+            "key": key,
+            "kind": kind,  # "network", "challenge", "parse", "not cached" or "no session left"
+            "error": error,
+            "attempts": attempts,
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def load(self):
+        # Keys of all failed items, every key once, in the order they failed
+        keys = {}
+        if not self.path or not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    keys.setdefault(json.loads(line)["key"])
+                except json.JSONDecodeError:
+                    continue
+        return list(keys)
+
+    def reset(self):
+        if self.path and self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,54 @@
+from pathlib import Path
+import re
+
+# https://www.hltv.org/matches/2382626/..., /team/9565/..., /player/11893/..., /stats/players/11893/...
+ENTITY_ID_PATTERN = re.compile(
+    r"/(?:matches|team|player|coach|stats/players(?:/individual)?)/(\d+)(?:[/?#]|$)"
+)
+
+
+def entity_id(url):
+    # Numeric HLTV ID of a match/team/player URL, None if the URL has none
+    match = ENTITY_ID_PATTERN.search(url)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+class DedupIndex:  # set of HLTV IDs, O(1) "did we already see this?" instead of scanning lists
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None  # None = only kept for this run
+        self.ids = set()
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.ids.add(int(line) if line.isdigit() else line)
+
+    def key(self, url):
+        # Falls back to the full URL if there is no ID in it
+        id = entity_id(url)
+        return id if id is not None else url
+
+    def add(self, url):
+        # Returns True if the URL is new
+        key = self.key(url)
+        if key in self.ids:
+            return False
+        self.ids.add(key)
+        return True
+
+    def __contains__(self, url):
+        return self.key(url) in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            for key in self.ids:
+                f.write(f"{key}\n")
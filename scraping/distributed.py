@@ -0,0 +1,290 @@
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool
+from work_queue import run_leased_workers
+from job_store import make_job_store
+from checkpoint import Journal
+from parse_pool import ParsePool
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from pipeline import save_urls
+from columnar import read_table
+import async_get_recent_match_urls as results_stage
+import async_get_match_data as match_stage
+import async_get_team_data as team_stage
+import async_get_player_data as player_stage
+import argparse
+import asyncio
+import socket
+import time
+import os
+
+# Amounts, input files, savefiles and parsers of every stage come from the config of its own script
+config = {
+    "job_store": "data/jobs.sqlite",  # "data/jobs.sqlite" (SQLite file, for workers on the same host or a shared disk) or "redis://host:6379/0" (Redis or anything that speaks its protocol, for workers on several machines, needs the redis package)
+    "job_lease": 120,  # seconds a worker holds a job, another worker takes it over if it isn't finished or renewed by then
+    "job_heartbeat": 30,  # seconds between two lease renewals while a job is being scraped (well below job_lease)
+    "job_poll_interval": 5,  # seconds the coordinator/an idle worker waits before looking at the job store again
+    "worker_id": None,  # name of this worker in the job store (None = hostname-pid)
+    "session_amount": 2,  # sessions of this worker, they take jobs of every stage it works on
+    "parse_workers": 4,  # processes that parse pages while the sessions open the next ones (0 = parse in the main process)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions/workers take over its work
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_shard": None,  # "2/3" = this worker only uses every 3rd proxy of proxy_location starting with the 2nd, so workers sharing one list use different IPs (None = all of them)
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+# In this order, every stage reads the savefile of the one before
+STAGES = {
+    "results": results_stage,
+    "match": match_stage,
+    "team": team_stage,
+    "player": player_stage,
+}
+HANDLERS = {
+    "results": results_stage.scrape_match_urls,
+    "match": match_stage.scrape_match,
+    "team": team_stage.scrape_team,
+    "player": player_stage.scrape_player,
+}
+
+# Stage -> script that writes the file it reads (team URLs come from async_get_team_urls.py, always CSV)
+INPUTS = {"match": results_stage, "team": None, "player": team_stage}
+
+log = get_logger("distributed")  # structured records, written by a background thread
+
+
+def job_keys(name):
+    # Same URLs/offsets the script would put into its queue
+    if name == "results":
+        queue = results_stage.distribute_offsets(results_stage.config["url_amount"])
+    else:
+        stage = STAGES[name]
+        # File the stage reads, in the format the script that wrote it uses
+        writer = INPUTS[name]
+        output_format = writer.config.get("output_format", "csv") if writer else "csv"
+        df = read_table(stage.config["file_to_read"], output_format)
+        amount = stage.config["match_amount" if name == "match" else "team_amount"]
+        queue = stage.distribute_urls(df, amount)
+    return [queue.get_nowait() for _ in range(queue.qsize())]
+
+
+def collect(name, results):
+    # Records the workers wrote back -> the same savefile the script writes
+    if name == "results":
+        for links in results.values():
+            for link in links or []:
+                if results_stage.match_index.add(link):
+                    results_stage.match_urls.append(link)
+        savefile = results_stage.config["savefile_location"]
+        save_urls(results_stage.match_urls, "match_url", savefile)
+        return savefile
+    stage = STAGES[name]
+    index = getattr(stage, f"{name}_index")
+    data = getattr(stage, f"{name}_data")
+    for key, record in results.items():
+        if index.add(key):
+            data.append(record)
+    return stage.save_data(data)
+
+
+async def wait_for_workers(store, name):
+    # Until every job of the stage is done or failed for good
+    last = None
+    while True:
+        counts = await asyncio.to_thread(store.counts, name)
+        if counts != last:
+            log.info(
+                f"[+] {name}: {counts['done']} done, {counts['leased']} being scraped, {counts['pending']} waiting, {counts['failed']} failed",
+                queue=name,
+                **counts,
+            )
+            last = counts
+        if not counts["pending"] and not counts["leased"]:
+            return
+        await asyncio.sleep(config["job_poll_interval"])
+
+
+async def coordinate(stages, resume=False, replay=False):
+    # Puts the URLs/offsets of every stage into the job store, waits for the workers and saves
+    # their results. Stages run one after another, a stage's jobs come from the savefile of the one before
+    store = make_job_store(config["job_store"])
+    # Workers wait for open stages instead of stopping when they are empty
+    for name in stages:
+        store.set_open(name, True)
+    try:
+        for name in stages:
+            stage = STAGES[name]
+            if replay:
+                # Only what failed for good last time, the results of the rest are still in the store
+                keys = stage.dead_letters.load()
+            else:
+                if not resume:
+                    store.reset(name)
+                keys = job_keys(name)
+            stage.dead_letters.reset()
+            await asyncio.to_thread(store.add, name, keys)
+            log.warning(f"[!] {len(keys)} {name} jobs in {config['job_store']}")
+
+            await wait_for_workers(store, name)
+            store.set_open(name, False)
+
+            failures = store.failures(name)
+            for key, (kind, error, attempts) in failures.items():
+                stage.dead_letters.add(key, kind, error, attempts)
+            results = store.results(name)
+            savefile = collect(name, results)
+            log.success(
+                f"[+] Saved {len(results)} {name} results to {savefile} ({len(failures)} failed)"
+            )
+    finally:
+        for name in stages:
+            store.set_open(name, False)
+        store.close()
+
+
+async def work(stages, pool=None):
+    # Leases jobs of every stage until the coordinator closed it and nothing is left, the records
+    # go back into the job store and the coordinator saves them
+    store = make_job_store(config["job_store"])
+    worker_id = config["worker_id"] or f"{socket.gethostname()}-{os.getpid()}"
+
+    # A pool handed in by the caller stays open for the next stage
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(config)
+    await pool.start()
+    sessions = pool.sessions[: config["session_amount"]]
+    for session in sessions:
+        log.info(
+            f"[+] [Session {session.session_id}] Started",
+            session=session.session_id,
+            proxy=session.proxy_server,
+        )
+    # One set of parse workers for all stages instead of one per script
+    parse_pool = ParsePool(config["parse_workers"], config["parser_backend"])
+    for name in ("match", "team", "player"):
+        STAGES[name].parse_pool = parse_pool
+
+    try:
+        for name in stages:
+            stage = STAGES[name]
+            # Leases keep track of what's done, the journal of the script (its --resume state)
+            # stays as it is. The handlers write to a journal of their own instead
+            path = stage.journal.path
+            stage.journal = Journal(
+                path.with_name(f"{path.stem}.distributed{path.suffix}"),
+                stage.journal.batch_size,
+            )
+            stage.journal.reset()
+            log.warning(f"[!] Worker {worker_id} takes {name} jobs from {config['job_store']}")
+            await run_leased_workers(
+                sessions,
+                store,
+                name,
+                HANDLERS[name],
+                on_error=stage.session_error,
+                max_errors=config["session_max_errors"],
+                retry=stage.retry_policy,
+                worker_id=worker_id,
+                lease=config["job_lease"],
+                heartbeat=config["job_heartbeat"],
+                poll_interval=config["job_poll_interval"],
+            )
+            stage.journal.flush()
+    finally:
+        for name in ("team", "player"):
+            STAGES[name].freshness.compact()
+        player_stage.window_cache.compact()
+        parse_pool.close()
+        for session in sessions:
+            team_stage.session_finished(session)
+        if own_pool:
+            await pool.close()
+        store.close()
+
+
+async def main(role, stages=tuple(STAGES), pool=None, resume=False, replay=False):
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+
+    stages = [name for name in STAGES if name in stages]
+    try:
+        if role == "coordinator":
+            await coordinate(stages, resume, replay)
+        else:
+            await work(stages, pool)
+    finally:
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    total_elapsed = time.perf_counter() - total_start_time
+    log.success(
+        f"[+] {role.capitalize()} finished (took {total_elapsed:.2f}s)",
+        elapsed=total_elapsed,
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scrape on several machines: the coordinator puts the URLs into a shared job store, workers lease them and write the results back"
+    )
+    parser.add_argument(
+        "role",
+        choices=["coordinator", "worker"],
+        help="coordinator = fill the job store and save the results (start it first), worker = scrape jobs from it",
+    )
+    parser.add_argument(
+        "stages",
+        nargs="*",
+        choices=list(STAGES),
+        default=list(STAGES),
+        help="stages to coordinate/work on, in this order (default: all)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="(coordinator) keep the jobs of the last run, only the unfinished ones get scraped",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="(coordinator) only put the jobs in the dead letter files into the store again",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.role, tuple(args.stages), resume=args.resume, replay=args.replay)
+    )
@@ -0,0 +1,715 @@
+# Extractors of the match, team and player pages. They only need the parser backends, so the
+# parse worker processes (parse_pool.py) import this instead of the scripts with their configs,
+# caches and browsers
+from parser_backend import make_soup
+import re
+
+default_backend = "selectolax"  # of parse_* without a backend, ParsePool sets the configured one
+
+
+def use_backend(backend):
+    # parser_backend of the script, in this process
+    global default_backend
+    default_backend = backend
+
+
+# async_get_match_data.py
+MONTHS = {
+    "January": "01",
+    "February": "02",
+    "March": "03",
+    "April": "04",
+    "May": "05",
+    "June": "06",
+    "July": "07",
+    "August": "08",
+    "September": "09",
+    "October": "10",
+    "November": "11",
+    "December": "12",
+}
+
+
+# Every get_* function gets the section it needs, parse_match locates each section only once
+
+
+def get_teams(teamsBox):
+    # [(name, score, won), (name, score, won)] from both team gradients
+    teams = []
+    for team_number in (1, 2):
+        name = None
+        score = None
+        won = False
+
+        gradient = teamsBox.select_one(f"div.team{team_number}-gradient")
+        if gradient:
+            team_name = gradient.select_one("div.teamName")
+            if team_name:
+                name = team_name.text.strip().replace(" ", "")
+
+            result = gradient.select_one("div.lost, div.won")
+            if result:
+                score = result.text.strip()
+                won = "won" in result.get("class", [])
+            won = won or "won" in gradient.get("class", [])
+
+        teams.append((name, score, won))
+    return teams
+
+
+def get_winner(teams):
+    (team_1, _, team_1_won), (team_2, _, team_2_won) = teams
+    if team_1_won:
+        return team_1
+    if team_2_won:
+        return team_2
+    return None  # not played yet / draw
+
+
+def get_date(timeAndEvent):
+    date = timeAndEvent.select_one("div.date")
+    if date:
+        # "1st of June 2025" -> "01/06/2025"
+        found = re.search(r"(\d+)\w*\s+of\s+(\w+)\s+(\d{4})", date.text)
+        if found and found.group(2) in MONTHS:
+            day, month, year = found.groups()
+            return f"{day.zfill(2)}/{MONTHS[month]}/{year}"
+
+
+def get_hour(timeAndEvent):
+    time = timeAndEvent.select_one("div.time")
+    if time:
+        time = time.text.strip()
+        if time:
+            hour = time.split(":")[0]
+            return hour
+
+
+def get_event(timeAndEvent):
+    event = timeAndEvent.select_one("a[href*='/events/']")
+    if event:
+        event = event.text.strip()
+        if event:
+            return event
+
+
+def get_mode(maps_grid):
+    mode = maps_grid.select_one("div.preformatted-text")
+    if mode:
+        numbers = re.findall(r"\d+", mode.text.strip())
+        if numbers:
+            num = numbers[0]  # First number found
+            return f"Bo{num}"
+    return "N/A"
+
+
+def get_maps_info(maps_grid, team_1, team_2):
+    maps_list = []
+    for map in maps_grid.select("div.mapholder"):
+        if not map.select_one("div.played"):
+            continue
+
+        map_info = {}
+        map_info["map"] = map.select_one("div.mapname").text.strip()
+
+        results_left = map.select_one("div.results-left, span.results-left")
+        results_right = map.select_one("div.results-right, span.results-right")
+        classes_left = results_left.get("class", []) if results_left else []
+        classes_right = results_right.get("class", []) if results_right else []
+
+        if "pick" in classes_left:
+            map_info["picked_by"] = team_1
+        elif "pick" in classes_right:
+            map_info["picked_by"] = team_2
+        else:
+            map_info["picked_by"] = "N/A"
+
+        if "won" in classes_left:
+            map_info["winner"] = team_1
+        elif "won" in classes_right:
+            map_info["winner"] = team_2
+        else:
+            map_info["winner"] = "N/A"
+
+        score_left = score_right = None
+        if results_left:
+            score_left = results_left.select_one("div.results-team-score")
+        if results_right:
+            score_right = results_right.select_one("div.results-team-score")
+        if score_left and score_right:
+            map_info["score"] = (
+                f"{score_left.text.strip()}:{score_right.text.strip()}"
+            )
+
+        maps_list.append(map_info)
+
+    return maps_list
+
+
+def parse_match(html, backend=None):
+    return extract_match(make_soup(html, backend or default_backend))
+
+
+def extract_match(soup):
+    # Locate every section once
+    teamsBox = soup.select_one("div.teamsBox")
+    timeAndEvent = soup.select_one("div.timeAndEvent")
+    maps_grid = soup.select_one("div.maps")
+
+    teams = get_teams(teamsBox) if teamsBox else [(None, None, False)] * 2
+    (team_1, score_team_1, _), (team_2, score_team_2, _) = teams
+    winner = get_winner(teams)
+    date = get_date(timeAndEvent) if timeAndEvent else None
+    hour = get_hour(timeAndEvent) if timeAndEvent else None
+    event = get_event(timeAndEvent) if timeAndEvent else None
+    mode = get_mode(maps_grid) if maps_grid else "N/A"
+    maps = get_maps_info(maps_grid, team_1, team_2) if maps_grid else []
+
+    match_info = {
+        "team_1": team_1,
+        "team_2": team_2,
+        "score_team_1": score_team_1,
+        "score_team_2": score_team_2,
+        "winner": winner,
+        "date": date,
+        "hour": hour,
+        "event": event,
+        "mode": mode,
+        "maps": maps,
+    }
+
+    """ maps format (not configurable here):
+    "maps": [
+        {"map": "Dust2", "picked_by": "team_1", "winner": "team_1", "score": "16-14"},
+        {"map": "Mirage", "picked_by": "team_2", "winner": "team_2", "score": "16-12"},
+        {"map": "Inferno", "picked_by": "random", "winner": "team_1", "score": "16-10"}
+    ]
+    """
+
+    return match_info
+
+
+# async_get_team_data.py
+def get_avg_player_age(soup):
+    team_stats = soup.select("div.profile-team-stat")
+
+    for stat in team_stats:
+        b_tag = stat.find("b")
+        if b_tag and "Average player age" in b_tag.text:
+            age = stat.select_one("span.right")
+            if age:
+                return age.text
+            break
+
+
+def get_player_urls(soup):
+    team_container = soup.select_one("div.bodyshot-team-bg")
+    player_links = team_container.select("a[href*='/player/']")
+    player_urls = []
+    for link in player_links:
+        if link:
+            href = link.get("href")
+            if href and "/player/" in href:
+                full_url = (
+                    f"https://www.hltv.org{href}" if href.startswith("/") else href
+                )
+                player_urls.append(full_url)
+    return player_urls
+
+
+def get_coach_url(soup):
+    coach_link = soup.select_one("a[href*='/coach/']")
+    if coach_link:
+        href = coach_link.get("href")
+        if href and "/coach/" in href:
+            full_url = f"https://www.hltv.org{href}" if href.startswith("/") else href
+            return full_url
+
+
+MAP_POOL = [
+    "Ancient",
+    "Anubis",
+    "Dust2",
+    "Inferno",
+    "Mirage",
+    "Nuke",
+    "Overpass",
+    "Train",
+    "Vertigo",
+]
+
+
+def get_highlighted_stats(soup):
+    # Current win streak and win rate (from last 3 months) in one pass over #matchesBox
+    current_winstreak = None
+    winrate = None
+
+    matchesBox = soup.select_one("#matchesBox")
+    if matchesBox:
+        for stat in matchesBox.select("div.highlighted-stat"):
+            description = stat.find("div", class_="description")
+            stat_value = stat.find("div", class_="stat")
+            if not description or not stat_value:
+                continue
+            if "Current win streak" in description.text:
+                current_winstreak = stat_value.text
+            elif "Win rate" in description.text:
+                winrate = stat_value.text.replace("%", "")
+
+    return current_winstreak, winrate
+
+
+# improvement possible, only scrapes winrate of best 6 maps on team profile
+def get_map_winrates(soup):
+    map_winrates = {map: None for map in MAP_POOL}  # None if map is not in the best 6
+
+    map_statistics = soup.select_one("div.map-statistics")
+    if map_statistics:
+        for container in map_statistics.select("div.map-statistics-container"):
+            map_element = container.select_one("div.map-statistics-row-map-mapname")
+            if not map_element:
+                continue
+            map_name = map_element.text.strip()
+            if map_name in map_winrates:
+                winrate_element = container.select_one(
+                    "div.map-statistics-row-win-percentage"
+                )
+                if winrate_element:
+                    map_winrates[map_name] = winrate_element.text.replace(
+                        "%", ""
+                    ).strip()
+
+    return map_winrates
+
+
+def parse_team(html, backend=None):
+    return extract_team(make_soup(html, backend or default_backend))
+
+
+def extract_team(soup):
+    team_name_element = soup.select_one("h1.profile-team-name")
+    team_name = (
+        team_name_element.text.strip().replace(" ", "")
+        if team_name_element
+        else None
+    )
+
+    team_region_element = soup.select_one("div.team-country")
+    team_region = (
+        team_region_element.text.strip() if team_region_element else None
+    )
+
+    world_ranking_element = soup.select_one("a[href*='/ranking/teams/']")
+    world_ranking = (
+        world_ranking_element.text.strip()
+        if world_ranking_element
+        else None
+    )
+
+    valve_ranking_element = soup.select_one(
+        "a[href*='/valve-ranking/teams']"
+    )
+    valve_ranking = (
+        valve_ranking_element.text.strip()
+        if valve_ranking_element
+        else None
+    )
+
+    average_age = get_avg_player_age(soup)
+    player_urls = get_player_urls(soup)
+    coach_url = get_coach_url(soup)
+    current_winstreak, winrate = get_highlighted_stats(soup)  # winrate from last 3 months
+    map_winrates = get_map_winrates(soup)  # only 6 best maps get scraped
+
+    team_info = {
+        "team_name": team_name,
+        "team_region": team_region,
+        "world_ranking": world_ranking,
+        "valve_ranking": valve_ranking,
+        "avg_player_age": average_age,
+        "current_winstreak": current_winstreak,
+        "winrate": winrate,
+        "map_winrates": map_winrates,
+        "coach_url": coach_url,
+        "player_urls": player_urls,
+    }
+
+    return team_info
+
+
+# async_get_player_data.py
+def get_overall_stats(soup):
+
+    featured_rows = soup.select("div.summaryStatBreakdownRow")
+    featured_stats_1 = featured_rows[0].select("div.summaryStatBreakdown")
+    featured_stats_2 = featured_rows[1].select("div.summaryStatBreakdown")
+
+    rating = featured_stats_1[0].select_one("div.summaryStatBreakdownDataValue").text
+    dpr = featured_stats_1[1].select_one("div.summaryStatBreakdownDataValue").text
+    kast = (
+        featured_stats_1[2]
+        .select_one("div.summaryStatBreakdownDataValue")
+        .text.replace("%", "")
+    )
+    impact = featured_stats_2[0].select_one("div.summaryStatBreakdownDataValue").text
+
+    stats_rows = soup.select("div.stats-rows")
+    stats_1 = stats_rows[0].select("div.stats-row")
+    stats_2 = stats_rows[1].select("div.stats-row")
+
+    kills = stats_1[0].select("span")[1].text
+    hs_percentage = stats_1[1].select("span")[1].text.replace("%", "")
+    deaths = stats_1[2].select("span")[1].text
+    kd = stats_1[3].select("span")[1].text
+    adr = stats_1[4].select("span")[1].text
+    grenade_adr = stats_1[5].select("span")[1].text
+    maps_played = stats_1[6].select("span")[1].text
+
+    rounds_played = stats_2[0].select("span")[1].text
+    kr = stats_2[1].select("span")[1].text
+    ar = stats_2[2].select("span")[1].text
+    dr = stats_2[3].select("span")[1].text
+    sbtr = stats_2[4].select("span")[1].text
+    str = stats_2[5].select("span")[1].text
+
+    overall = {
+        "rating": rating,  # Rating 2.1
+        "dpr": dpr,  # Deaths per round
+        "kast": kast,  # Percentage of rounds in which the player either had a kill, assist, survived or was traded
+        "impact": impact,  # Measures the impact made from multikills, opening kills, and clutches
+        "kills": kills,
+        "hs_percentage": hs_percentage,
+        "deaths": deaths,
+        "kd": kd,  # Kills / Deaths
+        "adr": adr,  # Average Damage per Round
+        "grenade_adr": grenade_adr,
+        "maps_played": maps_played,
+        "rounds_played": rounds_played,
+        "kpr": kr,  # Kills / Round
+        "apr": ar,  # Assists / Round
+        "dpr": dr,  # Deaths / Round
+        "saved_by_teammates_pr": sbtr,  # Saved by teammates / round
+        "saved_teammates_pr": str,  # Saved teammates / round
+    }
+
+    return overall
+
+
+def get_individual_stats(soup):
+    stats_rows = soup.select("div.stats-rows")
+    boxes_1 = stats_rows[0].select("div.standard-box")
+    boxes_2 = stats_rows[1].select("div.standard-box")
+
+    opening_stats = boxes_1[1].select("div.stats-row")
+    kills = opening_stats[0].select("span")[1].text
+    deaths = opening_stats[1].select("span")[1].text
+    kd = opening_stats[2].select("span")[1].text
+    kill_rating = opening_stats[3].select("span")[1].text
+    win_percent_after_first_kill = (
+        opening_stats[4].select("span")[1].text.replace("%", "")
+    )
+    first_kill_in_won_rounds = opening_stats[5].select("span")[1].text.replace("%", "")
+
+    opening = {
+        "kills": kills,
+        "deaths": deaths,
+        "kd": kd,
+        "kill_rating": kill_rating,
+        "win_percent_after_first_kill": win_percent_after_first_kill,
+        "first_kill_in_won_rounds": first_kill_in_won_rounds,
+    }
+
+    round_stats = boxes_2[0].select("div.stats-row")
+    kill_0 = round_stats[0].select("span")[1].text
+    kill_1 = round_stats[1].select("span")[1].text
+    kill_2 = round_stats[2].select("span")[1].text
+    kill_3 = round_stats[3].select("span")[1].text
+    kill_4 = round_stats[4].select("span")[1].text
+    kill_5 = round_stats[5].select("span")[1].text
+
+    rounds = {
+        "0_kill": kill_0,
+        "1_kill": kill_1,
+        "2_kill": kill_2,
+        "3_kill": kill_3,
+        "4_kill": kill_4,
+        "5_kill": kill_5,
+    }
+
+    weapon_stats = boxes_2[1].select("div.stats-row")
+    rifle = weapon_stats[0].select("span")[1].text
+    sniper = weapon_stats[1].select("span")[1].text
+    smg = weapon_stats[2].select("span")[1].text
+    pistol = weapon_stats[3].select("span")[1].text
+    grenade = weapon_stats[4].select("span")[1].text
+    other = weapon_stats[5].select("span")[1].text
+
+    weapon_kills = {
+        "rifle": rifle,
+        "sniper": sniper,
+        "smg": smg,
+        "pistol": pistol,
+        "grenade": grenade,
+        "other": other,
+    }
+
+    return opening, rounds, weapon_kills
+
+
+ROLES = ["firepower", "entrying", "trading", "opening", "clutching", "sniping", "utility"]
+SIDE_CLASSES = ("stats-side-both", "stats-side-ct", "stats-side-t")
+
+
+def class_of(node, names):
+    # First class of the node or one of its parents that is in names
+    while node is not None:
+        for name in node.get("class") or ():
+            if name in names:
+                return name
+        node = node.parent
+    return None
+
+
+def get_role_sections(soup):
+    # One pass over the role boxes: (role, side class) -> (overall score, stat texts in page order)
+    stats_container = soup.select_one("div.role-stats-container")
+    role_classes = {f"role-{role}" for role in ROLES}
+    sections = {}
+    for score in stats_container.select("div.row-stats-section-score"):
+        key = (class_of(score, role_classes)[5:], class_of(score, SIDE_CLASSES))
+        sections[key] = (score.text.split("/")[0], [])
+    for data in stats_container.select("div.role-stats-data"):
+        key = (class_of(data, role_classes)[5:], class_of(data, SIDE_CLASSES))
+        sections[key][1].append(data.text)
+    return sections
+
+
+def get_side_stats(sections, side):
+    if side == "ct":
+        div_class = "stats-side-ct"
+    elif side == "t":
+        div_class = "stats-side-t"
+
+    # Firepower:
+    f_overall, stats = sections["firepower", div_class]
+
+    # Stats are not in order as in dictionary, hltv html is left->right->left->right and not from top to bottom and next column
+    f_kpr = stats[0]
+    f_rounds_with_kill_pct = stats[1].replace("%", "")
+    f_kpr_win = stats[2]
+    f_rating = stats[3]
+    f_adr = stats[4]
+    f_rounds_with_multikill_pct = stats[5].replace("%", "")
+    f_adr_win = stats[6]
+    f_pistol_rating = stats[7]
+
+    firepower = {
+        "overall": f_overall,  # Based on kills, damage, and multi-kills - raw fragging power rating/100
+        "kills_per_round": f_kpr,
+        "kills_per_round_win": f_kpr_win,  # KPR in won rounds only
+        "damage_per_round": f_adr,
+        "damage_per_round_win": f_adr_win,  # ADR in won rounds only
+        "rounds_with_kill_pct": f_rounds_with_kill_pct,  # Percentage of rounds where player got at least one kill
+        "rating_2_1": f_rating,  # HLTV Rating 2.1
+        "multi_kill_rounds_pct": f_rounds_with_multikill_pct,  # Percentage of rounds with 2+ kills
+        "pistol_round_rating": f_pistol_rating,  # Rating 2.1 in pistol rounds only
+    }
+
+    # Entrying:
+    e_overall, stats = sections["entrying", div_class]
+
+    e_sbt_pr = stats[0]
+    e_td_pr = stats[1]
+    e_td_pct = stats[2].replace("%", "")
+    e_odt_pct = stats[3].replace("%", "")
+    e_apr = stats[4]
+    e_sr_pct = stats[5].replace("%", "")
+
+    entrying = {
+        "overall": e_overall,  # Based on traded deaths (% and per round) and saves by teammates rating/100
+        "saved_by_teammate_per_round": e_sbt_pr,  # How often teammates save this player per round
+        "traded_deaths_per_round": e_td_pr,  # Deaths that get traded by teammates per round
+        "traded_deaths_pct": e_td_pct,  # Percentage of deaths that get traded
+        "opening_deaths_traded_pct": e_odt_pct,  # Percentage of opening deaths that get traded
+        "assists_per_round": e_apr,
+        "support_rounds_pct": e_sr_pct,  # Percentage of rounds where player provided support
+    }
+
+    # Trading:
+    t_overall, stats = sections["trading", div_class]
+
+    t_st_pr = stats[0]
+    t_tk_pr = stats[1]
+    t_tk_pct = stats[2].replace("%", "")
+    t_ak_pct = stats[3].replace("%", "")
+    t_dpk = stats[4]
+
+    trading = {
+        "overall": t_overall,  # Based on trade kills (% and per round) and teammate saves rating/100
+        "saved_teammate_per_round": t_st_pr,  # How often this player saves teammates per round
+        "trade_kills_per_round": t_tk_pr,  # Kills that trade teammate deaths per round
+        "trade_kills_pct": t_tk_pct,  # Percentage of kills that are trades
+        "assisted_kills_pct": t_ak_pct,  # Percentage of kills where player got assist
+        "damage_per_kill": t_dpk,  # Average damage dealt per kill
+    }
+
+    # Opening:
+    o_overall, stats = sections["opening", div_class]
+
+    o_ok_pr = stats[0]
+    o_od_pr = stats[1]
+    o_oa_pct = stats[2].replace("%", "")
+    o_os_pct = stats[3].replace("%", "")
+    o_w_pct_aok = stats[4].replace("%", "")
+    o_apr = stats[5]
+
+    opening = {
+        "overall": o_overall,  # Based on opening kills per round and opening attempts rating/100
+        "opening_kills_per_round": o_ok_pr,  # First kills of the round per round
+        "opening_deaths_per_round": o_od_pr,  # First deaths of the round per round
+        "opening_attempts_pct": o_oa_pct,  # Percentage of rounds where player attempts opening duel
+        "opening_success_pct": o_os_pct,  # Success rate in opening duels
+        "win_pct_after_opening_kill": o_w_pct_aok,  # Team win rate after this player gets opening kill
+        "attacks_per_round": o_apr,  # Aggressive actions per round
+    }
+
+    # Clutching:
+    c_overall, stats = sections["clutching", div_class]
+
+    c_ppr = stats[0]
+    c_la_pct = stats[1].replace("%", "")
+    c_1v1_win_pct = stats[2].replace("%", "")
+    c_ta_pr_s = stats[3]
+
+    # turn it into seconds without ending "1m 4s" -> "64"
+    minutes = seconds = 0  # "45s" has no minutes, "1m" no seconds
+    m = re.search(r"(\d+)\s*m", c_ta_pr_s)
+    s_ = re.search(r"(\d+)\s*s", c_ta_pr_s)
+    if m:
+        minutes = int(m.group(1))
+    if s_:
+        seconds = int(s_.group(1))
+    c_ta_pr_s = minutes * 60 + seconds
+
+    c_spr_loss_pct = stats[4].replace("%", "")
+
+    clutching = {
+        "overall": c_overall,  # Based on clutches won and time alive per round rating/100
+        "clutch_points_per_round": c_ppr,  # Clutch situation points per round
+        "last_alive_pct": c_la_pct,  # Percentage of rounds where player is last alive
+        "one_vs_one_win_pct": c_1v1_win_pct,  # Win rate in 1v1 situations
+        "time_alive_per_round_seconds": c_ta_pr_s,  # Average survival time per round in seconds
+        "saves_per_round_loss_pct": c_spr_loss_pct,  # Percentage of lost rounds where player saved
+    }
+
+    # Sniping:
+    s_overall, stats = sections["sniping", div_class]
+
+    s_kpr = stats[0]
+    s_sk_pct = stats[1].replace("%", "")
+    s_rw_sk_pct = stats[2].replace("%", "")
+    s_rw_smk_pct = stats[3].replace("%", "")
+    s_ok_pr = stats[4]
+
+    sniping = {
+        "overall": s_overall,  # Based on AWP/SSG kills and multi-kills rating/100
+        "sniper_kills_per_round": s_kpr,  # AWP/SSG kills per round
+        "sniper_kills_pct": s_sk_pct,  # Percentage of kills with AWP/SSG
+        "rounds_with_sniper_kills_pct": s_rw_sk_pct,  # Percentage of rounds with AWP/SSG kill
+        "sniper_multi_kill_rounds": s_rw_smk_pct,  # Rounds with 2+ AWP/SSG kills per round
+        "sniper_opening_kills_per_round": s_ok_pr,  # Opening kills with AWP/SSG per round
+    }
+
+    # Utility:
+    u_overall, stats = sections["utility", div_class]
+
+    u_dpr = stats[0]
+    u_uk_p100r = stats[1]
+    u_ft_pr = stats[2]
+    u_fa_pr = stats[3]
+    u_tof_pr = stats[4]
+
+    utility = {
+        "overall": u_overall,  # Based on flashbang stats and grenade damage per round rating/100
+        "utility_damage_per_round": u_dpr,  # HE/Molotov/Incendiary damage per round
+        "utility_kills_per_100_rounds": u_uk_p100r,  # Grenade kills per 100 rounds
+        "flashes_thrown_per_round": u_ft_pr,  # Flashbangs thrown per round
+        "flash_assists_per_round": u_fa_pr,  # Assists from flashbangs per round
+        "time_opponent_flashed_per_round": u_tof_pr,  # Seconds enemies blinded per round
+    }
+
+    return firepower, entrying, trading, opening, clutching, sniping, utility
+
+
+def parse_player(html, individual_html, backend=None):
+    backend = backend or default_backend
+    return extract_player(make_soup(html, backend), make_soup(individual_html, backend))
+
+
+def extract_player(soup, individual_soup):
+    name = (
+        soup.select_one("h1.summaryNickname").text.strip().replace(" ", "")
+    )
+    country = soup.select_one("img.flag").get("title")
+    team = (
+        soup.select_one("div.SummaryTeamname a")
+        .text.strip()
+        .replace(" ", "")
+    )
+    age = soup.select_one("div.summaryPlayerAge").text.split(" ")[0]
+
+    overall = get_overall_stats(soup)
+
+    opening, rounds, weapon_kills = get_individual_stats(individual_soup)
+
+    sections = get_role_sections(soup)
+    (
+        ct_firepower,
+        ct_entrying,
+        ct_trading,
+        ct_opening,
+        ct_clutching,
+        ct_sniping,
+        ct_utility,
+    ) = get_side_stats(sections, "ct")
+
+    (
+        t_firepower,
+        t_entrying,
+        t_trading,
+        t_opening,
+        t_clutching,
+        t_sniping,
+        t_utility,
+    ) = get_side_stats(sections, "t")
+
+    player_info = {
+        "name": name,
+        "country": country,
+        "team": team,
+        "age": age,
+        "overall": overall,
+        "opening": opening,
+        "round": rounds,
+        "weapon": weapon_kills,
+        "ct-side": {
+            "firepower": ct_firepower,
+            "entrying": ct_entrying,
+            "trading": ct_trading,
+            "opening": ct_opening,
+            "clutching": ct_clutching,
+            "sniping": ct_sniping,
+            "utility": ct_utility,
+        },
+        "t-side": {
+            "firepower": t_firepower,
+            "entrying": t_entrying,
+            "trading": t_trading,
+            "opening": t_opening,
+            "clutching": t_clutching,
+            "sniping": t_sniping,
+            "utility": t_utility,
+        },
+    }
+
+    return player_info
@@ -0,0 +1,92 @@
+from pathlib import Path
+from dedup import entity_id
+import hashlib
+import json
+import time
+import os
+import re
+
+# Parts of a section that change without the data changing (inline scripts, comments, indentation)
+NOISE_PATTERN = re.compile(r"<script\b.*?</script>|<!--.*?-->", re.S | re.I)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def section_hash(*htmls):
+    # sha256 of the section(s) a record gets parsed from, same data = same hash
+    digest = hashlib.sha256()
+    for html in htmls:
+        text = WHITESPACE_PATTERN.sub(" ", NOISE_PATTERN.sub("", html))
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")  # ("ab", "c") and ("a", "bc") aren't the same pages
+    return digest.hexdigest()
+
+
+class FreshnessStore:  # last scrape time, section hash and record of every team/player
+    def __init__(self, location=None, ttl=0, by_url=False):
+        self.location = Path(location) if location else None  # None = every entity gets scraped every run
+        self.ttl = ttl  # seconds an entity counts as fresh after its last scrape, its page doesn't get opened at all
+        self.refresh = False  # ignore fresh entities and known hashes (--full), results still get stored
+        self.offline = False  # records of cached pages say nothing about the live ones, not read or written
+        self.by_url = by_url  # entries per full URL (e.g. the date range of a stats window) instead of per ID
+        self.entries = {}  # HLTV ID (or URL) -> {"scraped_at", "hash", "record"}
+        self._lines = 0  # lines in the file, more than entries = old versions that compact() drops
+
+        if self.location and self.location.exists():
+            with open(self.location, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # last line can be cut off if the process got killed mid-write
+                    self._lines += 1
+                    self.entries[entry.pop("key")] = entry  # newest line of an entity wins
+
+    def key(self, url):
+        if self.by_url:
+            return url
+        # Player stats URLs carry dates, the ID stays the same
+        id = entity_id(url)
+        return id if id is not None else url
+
+    def _entry(self, url):
+        if not self.location or self.refresh or self.offline:
+            return None
+        return self.entries.get(self.key(url))
+
+    def fresh(self, url):
+        # Record of the last scrape if it's younger than ttl, None = open the page
+        entry = self._entry(url)
+        if entry is None or time.time() - entry["scraped_at"] > self.ttl:
+            return None
+        return entry["record"]
+
+    def unchanged(self, url, digest):
+        # Record of the last scrape if the section still has the same hash, None = parse it
+        entry = self._entry(url)
+        if entry is None or entry["hash"] != digest:
+            return None
+        return entry["record"]
+
+    def put(self, url, digest, record):
+        # Also for unchanged sections, so the entity counts as fresh again
+        if not self.location or self.offline:
+            return
+        key = self.key(url)
+        entry = {"scraped_at": time.time(), "hash": digest, "record": record}
+        self.entries[key] = entry
+        # Appended right away like the HTML cache index, a crash doesn't lose what got scraped
+        self.location.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.location, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, **entry}) + "\n")
+        self._lines += 1
+
+    def compact(self):
+        # One line per entity again, written next to it first so a crash doesn't lose the store
+        if not self.location or self._lines <= len(self.entries):
+            return
+        temp_path = self.location.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for key, entry in self.entries.items():
+                f.write(json.dumps({"key": key, **entry}) + "\n")
+        os.replace(temp_path, self.location)
+        self._lines = len(self.entries)
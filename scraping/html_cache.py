@@ -0,0 +1,100 @@
+from pathlib import Path
+import hashlib
+import json
+import gzip
+import time
+
+
+class CacheMiss(LookupError):  # page isn't cached and --offline doesn't allow opening it
+    pass
+
+
+class HtmlCache:  # compressed copy of every fetched page, so parsers can be re-run without HLTV
+    def __init__(self, location=None, ttl=0, offline=False):
+        self.location = Path(location) if location else None  # None = cache disabled
+        self.ttl = ttl  # seconds a cached page gets reused instead of fetching it again (0 = always fetch)
+        self.offline = offline  # only read from the cache, never open a page
+        self._latest = {}  # url -> (fetched_at, sha256)
+        self._latest_by_key = {}  # key of the page (fetch(key=...)) -> (fetched_at, sha256)
+        self._index_file = None
+
+        if self.location:
+            self._index_file = self.location / "index.jsonl"
+            if self._index_file.exists():
+                with open(self._index_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._remember(
+                            entry["url"],
+                            entry["fetched_at"],
+                            entry["sha256"],
+                            entry.get("key"),
+                        )
+
+    def _remember(self, url, fetched_at, sha256, key=None):
+        entries = [(self._latest, url)]
+        if key is not None:
+            entries.append((self._latest_by_key, key))
+        for index, name in entries:
+            if name not in index or index[name][0] <= fetched_at:
+                index[name] = (fetched_at, sha256)
+
+    def _blob_path(self, sha256):
+        return self.location / "objects" / sha256[:2] / f"{sha256}.html.gz"
+
+    def get(self, url, max_age=None, key=None):
+        # Newest cached HTML of the URL, None if missing or older than max_age
+        # key: when offline, the newest page cached with the same key is fine even if its URL
+        # differs (stats URLs of a rolling window contain today's date, the key is the window)
+        if not self.location:
+            return None
+        entry = self._latest.get(url)
+        if entry is None and key is not None and self.offline:
+            entry = self._latest_by_key.get(key)
+        if entry is None:
+            return None
+
+        fetched_at, sha256 = entry
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        blob = self._blob_path(sha256)
+        if not blob.exists():
+            return None
+        with gzip.open(blob, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, url, html, key=None):
+        if not self.location:
+            return
+        data = html.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        # Same content = same file, unchanged pages don't take extra space
+        blob = self._blob_path(sha256)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(blob, "wb") as f:
+                f.write(data)
+
+        fetched_at = time.time()
+        entry = {"url": url, "fetched_at": fetched_at, "sha256": sha256}
+        if key is not None:
+            entry["key"] = key
+        with open(self._index_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._remember(url, fetched_at, sha256, key)
+
+    async def fetch(self, session, url, selector, key=None, tab=0):
+        # Cached page if it's fresh enough (or any cached page when offline), otherwise open it
+        html = self.get(url, None if self.offline else self.ttl, key)
+        if html is not None:
+            return html
+        if self.offline:
+            raise CacheMiss(f"{url} is not in the cache")
+
+        html = await session.get_html(url, selector, tab)
+        self.put(url, html, key)
+        return html
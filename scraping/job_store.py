@@ -0,0 +1,399 @@
+from pathlib import Path
+import threading
+import sqlite3
+import json
+import time
+
+# A job is one work item (URL/offset) of one stage's queue:
+#   pending -> leased (by a worker, until its lease runs out) -> done (with its record) / failed
+# A lease that runs out puts the job back to pending, so a worker that dies doesn't lose it.
+# Keys are stored as JSON, offsets stay ints and URLs stay strings
+
+
+def make_job_store(location):
+    # "redis://host:6379/0" (Redis or anything that speaks its protocol), everything else is a SQLite file
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore(location)
+    return SqliteJobStore(location)
+
+
+class SqliteJobStore:  # job store in one SQLite file, for workers on the same host or a shared disk
+    def __init__(self, path, timeout=30):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection for the whole process, calls come from worker threads (asyncio.to_thread)
+        self._db = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            # Rollback journal, not WAL: WAL needs shared memory, which a file on a network disk doesn't have.
+            # Also switches back files that an earlier version put into WAL mode
+            self._db.execute("PRAGMA journal_mode=DELETE")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    queue TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    not_before REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    record TEXT,
+                    kind TEXT,
+                    error TEXT,
+                    PRIMARY KEY (queue, key)
+                )"""
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_state ON jobs (queue, state, not_before)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS queues (queue TEXT PRIMARY KEY, open INTEGER NOT NULL)"
+            )
+
+    def _transaction(self, function):
+        # BEGIN IMMEDIATE takes the write lock right away, two workers can't lease the same job
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def add(self, queue, keys):
+        # New keys become pending jobs, failed ones get another chance, done/running ones stay as they are
+        rows = [(queue, json.dumps(key)) for key in keys]
+        self._transaction(
+            lambda db: db.executemany(
+                """INSERT INTO jobs (queue, key, state) VALUES (?, ?, 'pending')
+                ON CONFLICT (queue, key) DO UPDATE SET
+                    state = 'pending', worker = NULL, not_before = 0, attempts = 0, kind = NULL, error = NULL
+                WHERE jobs.state = 'failed'""",
+                rows,
+            )
+        )
+
+    def lease(self, queue, worker, lease, max_attempts):
+        # (key, attempt) of the next job that is due, None if there is none right now
+        def take(db):
+            now = time.time()
+            # Leases of workers that died and already used up their attempts
+            db.execute(
+                """UPDATE jobs SET state = 'failed', kind = 'lease expired', error = 'worker ' || worker || ' stopped renewing the lease'
+                WHERE queue = ? AND state = 'leased' AND lease_until < ? AND attempts >= ?""",
+                (queue, now, max_attempts),
+            )
+            row = db.execute(
+                """SELECT key, attempts FROM jobs
+                WHERE queue = ? AND ((state = 'pending' AND not_before <= ?) OR (state = 'leased' AND lease_until < ?))
+                ORDER BY not_before, rowid LIMIT 1""",
+                (queue, now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            key, attempts = row
+            db.execute(
+                """UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1
+                WHERE queue = ? AND key = ?""",
+                (worker, now + lease, queue, key),
+            )
+            return json.loads(key), attempts + 1
+
+        return self._transaction(take)
+
+    def heartbeat(self, queue, key, worker, lease):
+        # Renews the lease, False if it ran out and another worker took the job over
+        with self._lock:
+            cursor = self._db.execute(
+                """UPDATE jobs SET lease_until = ?
+                WHERE queue = ? AND key = ? AND state = 'leased' AND worker = ?""",
+                (time.time() + lease, queue, json.dumps(key), worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, queue, key, worker, record):
+        # Even with a lost lease the record is fine, the first one that comes back wins
+        with self._lock:
+            self._db.execute(
+                """UPDATE jobs SET state = 'done', worker = ?, lease_until = NULL, record = ?, kind = NULL, error = NULL
+                WHERE queue = ? AND key = ? AND state != 'done'""",
+                (worker, json.dumps(record), queue, json.dumps(key)),
+            )
+
+    def retry(self, queue, key, worker, delay, kind, error):
+        # Back to pending after its backoff, any worker can take it then
+        with self._lock:
+            self._db.execute(
+                """UPDATE jobs SET state = 'pending', worker = NULL, lease_until = NULL, not_before = ?, kind = ?, error = ?
+                WHERE queue = ? AND key = ? AND state = 'leased' AND worker = ?""",
+                (time.time() + delay, kind, error, queue, json.dumps(key), worker),
+            )
+
+    def fail(self, queue, key, worker, kind, error):
+        with self._lock:
+            self._db.execute(
+                """UPDATE jobs SET state = 'failed', worker = ?, lease_until = NULL, kind = ?, error = ?
+                WHERE queue = ? AND key = ? AND state != 'done'""",
+                (worker, kind, error, queue, json.dumps(key)),
+            )
+
+    def counts(self, queue):
+        # {"pending", "leased", "done", "failed"} -> amount of jobs
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state", (queue,)
+            ).fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(rows)
+        return counts
+
+    def results(self, queue):
+        # key -> record of every done job, in the order they were added
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, record FROM jobs WHERE queue = ? AND state = 'done' ORDER BY rowid",
+                (queue,),
+            ).fetchall()
+        return {json.loads(key): json.loads(record) for key, record in rows}
+
+    def failures(self, queue):
+        # key -> (kind, error, attempts) of every failed job
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, kind, error, attempts FROM jobs WHERE queue = ? AND state = 'failed' ORDER BY rowid",
+                (queue,),
+            ).fetchall()
+        return {
+            json.loads(key): (kind, error, attempts)
+            for key, kind, error, attempts in rows
+        }
+
+    def set_open(self, queue, open):
+        # Open = the coordinator may still add jobs, workers wait for them instead of stopping
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO queues (queue, open) VALUES (?, ?) ON CONFLICT (queue) DO UPDATE SET open = excluded.open",
+                (queue, int(open)),
+            )
+
+    def is_open(self, queue):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT open FROM queues WHERE queue = ?", (queue,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def reset(self, queue):
+        # New run without --resume, don't mix old jobs into it
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE queue = ?", (queue,))
+
+    def close(self):
+        self._db.close()
+
+
+# Every script runs atomically on the server, two workers can't take the same job
+LEASE_SCRIPT = """
+local now = tonumber(ARGV[1])
+-- Leases of workers that died: back to pending, or failed if they used up their attempts
+for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], key)
+    local job = cjson.decode(redis.call('HGET', KEYS[3], key))
+    if job.attempts >= tonumber(ARGV[4]) then
+        redis.call('HSET', KEYS[4], key, cjson.encode({
+            kind = 'lease expired',
+            error = 'worker ' .. job.worker .. ' stopped renewing the lease',
+            attempts = job.attempts,
+        }))
+    else
+        redis.call('ZADD', KEYS[1], now, key)
+    end
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, 1)
+if #due == 0 then
+    return nil
+end
+local key = due[1]
+local job = cjson.decode(redis.call('HGET', KEYS[3], key))
+job.attempts = job.attempts + 1
+job.worker = ARGV[2]
+redis.call('HSET', KEYS[3], key, cjson.encode(job))
+redis.call('ZREM', KEYS[1], key)
+redis.call('ZADD', KEYS[2], ARGV[3], key)
+return {key, job.attempts}
+"""
+
+# KEYS: leased, jobs - ARGV: key, worker, new lease end
+HEARTBEAT_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+local job = cjson.decode(redis.call('HGET', KEYS[2], ARGV[1]))
+if job.worker ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: pending, leased, jobs - ARGV: key, worker, not before
+RETRY_SCRIPT = """
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+    return 0
+end
+local job = cjson.decode(redis.call('HGET', KEYS[3], ARGV[1]))
+if job.worker ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: pending, leased, done, failed - ARGV: key, "done"/"failed", record/failure
+FINISH_SCRIPT = """
+if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 1 then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[2] == 'done' then
+    redis.call('HDEL', KEYS[4], ARGV[1])
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+else
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[3])
+end
+return 1
+"""
+
+# KEYS: pending, jobs, done, failed - ARGV: score, key
+ADD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[3], ARGV[2]) == 1 then
+    return 0
+end
+if redis.call('HEXISTS', KEYS[4], ARGV[2]) == 1 then
+    redis.call('HDEL', KEYS[4], ARGV[2])
+elseif redis.call('HEXISTS', KEYS[2], ARGV[2]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[2], cjson.encode({attempts = 0, worker = '', added = tonumber(ARGV[1])}))
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+
+class RedisJobStore:  # same job store on a Redis(-compatible) server, for workers on several machines
+    def __init__(self, url, prefix="hltv:jobs"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "redis is not installed (pip install redis), use a SQLite job store instead"
+            )
+        self.prefix = prefix  # all keys of the store start with this
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._lease = self._redis.register_script(LEASE_SCRIPT)
+        self._heartbeat = self._redis.register_script(HEARTBEAT_SCRIPT)
+        self._retry = self._redis.register_script(RETRY_SCRIPT)
+        self._finish = self._redis.register_script(FINISH_SCRIPT)
+        self._add = self._redis.register_script(ADD_SCRIPT)
+
+    def _keys(self, queue, *names):
+        # pending/leased: sorted sets by due time/lease end, jobs/done/failed: hashes by key
+        return [f"{self.prefix}:{queue}:{name}" for name in names]
+
+    def add(self, queue, keys):
+        names = self._keys(queue, "pending", "jobs", "done", "failed")
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=False)
+        for i, key in enumerate(keys):
+            # A microsecond apart, so jobs get leased in the order they were added
+            self._add(keys=names, args=[now + i * 1e-6, json.dumps(key)], client=pipe)
+        pipe.execute()
+
+    def lease(self, queue, worker, lease, max_attempts):
+        now = time.time()
+        job = self._lease(
+            keys=self._keys(queue, "pending", "leased", "jobs", "failed"),
+            args=[now, worker, now + lease, max_attempts],
+        )
+        if job is None:
+            return None
+        return json.loads(job[0]), int(job[1])
+
+    def heartbeat(self, queue, key, worker, lease):
+        renewed = self._heartbeat(
+            keys=self._keys(queue, "leased", "jobs"),
+            args=[json.dumps(key), worker, time.time() + lease],
+        )
+        return renewed == 1
+
+    def complete(self, queue, key, worker, record):
+        self._finish(
+            keys=self._keys(queue, "pending", "leased", "done", "failed"),
+            args=[json.dumps(key), "done", json.dumps(record)],
+        )
+
+    def retry(self, queue, key, worker, delay, kind, error):
+        self._retry(
+            keys=self._keys(queue, "pending", "leased", "jobs"),
+            args=[json.dumps(key), worker, time.time() + delay],
+        )
+
+    def fail(self, queue, key, worker, kind, error):
+        job = self._redis.hget(self._keys(queue, "jobs")[0], json.dumps(key))
+        attempts = json.loads(job)["attempts"] if job else 0
+        failure = {"kind": kind, "error": error, "attempts": attempts}
+        self._finish(
+            keys=self._keys(queue, "pending", "leased", "done", "failed"),
+            args=[json.dumps(key), "failed", json.dumps(failure)],
+        )
+
+    def counts(self, queue):
+        pending, leased, done, failed = self._keys(
+            queue, "pending", "leased", "done", "failed"
+        )
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zcard(pending)
+        pipe.zcard(leased)
+        pipe.hlen(done)
+        pipe.hlen(failed)
+        return dict(zip(("pending", "leased", "done", "failed"), pipe.execute()))
+
+    def results(self, queue):
+        # key -> record of every done job, in the order they were added
+        jobs, done = self._keys(queue, "jobs", "done")
+        records = self._redis.hgetall(done)
+        added = {
+            key: json.loads(job).get("added", 0)
+            for key, job in self._redis.hgetall(jobs).items()
+        }
+        return {
+            json.loads(key): json.loads(records[key])
+            for key in sorted(records, key=lambda key: added.get(key, 0))
+        }
+
+    def failures(self, queue):
+        failed = self._redis.hgetall(self._keys(queue, "failed")[0])
+        return {
+            json.loads(key): (entry["kind"], entry["error"], entry["attempts"])
+            for key, entry in ((key, json.loads(value)) for key, value in failed.items())
+        }
+
+    def set_open(self, queue, open):
+        self._redis.set(self._keys(queue, "open")[0], int(open))
+
+    def is_open(self, queue):
+        return self._redis.get(self._keys(queue, "open")[0]) == "1"
+
+    def reset(self, queue):
+        self._redis.delete(
+            *self._keys(queue, "pending", "leased", "jobs", "done", "failed")
+        )
+
+    def close(self):
+        self._redis.close()
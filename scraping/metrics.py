@@ -0,0 +1,280 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import threading
+import json
+import time
+
+# Upper bounds in seconds, from a cached page/parse (ms) to a Cloudflare challenge (s)
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+DESCRIPTIONS = {
+    "navigation_seconds": "page.goto() until the response is there",
+    "inner_html_seconds": "page.inner_html() of the selector",
+    "parse_seconds": "HTML -> record, incl. the way to the parse workers and back",
+    "lock_wait_seconds": "waiting for the lock of the data list",
+    "sleep_seconds": "waiting for the rate limiter",
+    "item_seconds": "one work item from start to finish",
+    "pages_total": "pages opened",
+    "html_chars_total": "characters of HTML read from the selected elements",
+    "retries_total": "work items that got tried again",
+    "failed_total": "work items that failed for good",
+    "freshness_total": "teams/players that were cached (already scraped in this run), fresh (not opened), closed (only closed stats windows, not opened), unchanged (not parsed) or parsed",
+}
+
+
+class Histogram:  # Prometheus-style: cumulative buckets + sum + count
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)  # per bucket, not cumulative
+        self.overflow = 0  # above the last bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.overflow += 1
+
+    def quantile(self, q):
+        # Estimated from the buckets, linear inside the bucket the quantile falls into
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(BUCKETS, self.counts):
+            if seen + count >= rank and count:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return BUCKETS[-1]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(map(str, BUCKETS), self.counts)),
+            "overflow": self.overflow,
+        }
+
+
+class Metrics:  # counters + histograms of the whole run, every scraper writes into the same one
+    def __init__(self):
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.started = time.time()
+        self._lock = threading.Lock()  # the HTTP/snapshot threads read while the loop writes
+        self._server = None
+        self._snapshots = None
+        self._stop = threading.Event()
+        self._running = False
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        # with metrics.timer("parse_seconds", stage="match"): ... (also works around awaits)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @asynccontextmanager
+    async def locked(self, lock, **labels):
+        # async with lock, but the time spent waiting for it ends up in lock_wait_seconds
+        start = time.perf_counter()
+        async with lock:
+            self.observe("lock_wait_seconds", time.perf_counter() - start, **labels)
+            yield
+
+    def prometheus(self):
+        # Text exposition format for /metrics
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        described = set()
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP hltv_{name} {DESCRIPTIONS.get(name, name)}")
+                    lines.append(f"# TYPE hltv_{name} counter")
+                lines.append(f"hltv_{name}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP hltv_{name} {DESCRIPTIONS.get(name, name)}")
+                    lines.append(f"# TYPE hltv_{name} histogram")
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f"hltv_{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}"
+                    )
+                lines.append(
+                    f"hltv_{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram.count}"
+                )
+                lines.append(f"hltv_{name}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"hltv_{name}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": datetime.now(timezone.utc).isoformat(),
+                "uptime_seconds": time.time() - self.started,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def write_snapshot(self):
+        if not self._snapshots:
+            return
+        self._snapshots.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._snapshots, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+    def start(self, port=None, location=None, interval=30):
+        # /metrics on localhost:port and/or a snapshot appended to location every interval seconds
+        if self._running:  # already started by the script/pipeline that called this one
+            return
+        self._running = True
+        self.started = time.time()
+        self._stop.clear()
+        metrics = self
+
+        if port:
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = metrics.prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):  # no line per scrape
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        if location:
+            self._snapshots = Path(location)
+
+            def write_every():
+                while not self._stop.wait(interval):
+                    self.write_snapshot()
+
+            threading.Thread(target=write_every, daemon=True).start()
+
+    def stop(self):
+        # Last snapshot, endpoint down
+        if not self._running:
+            return
+        self._running = False
+        self._stop.set()
+        self.write_snapshot()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def summary(self):
+        # Lines for the end of the run: where the time went and how fast every session/proxy was
+        elapsed = time.time() - self.started
+        minutes = max(elapsed / 60, 1e-9)
+        lines = [f"Run summary ({elapsed:.1f}s)"]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        for (name, labels), histogram in histograms:
+            if name in ("navigation_seconds", "inner_html_seconds", "sleep_seconds"):
+                continue  # per session, summed up below
+            label = ", ".join(v for _, v in labels)
+            lines.append(
+                f"  {name[:-8]}{f' ({label})' if label else ''}: {histogram.count}x, "
+                f"mean {histogram.sum / histogram.count:.3f}s, p95 {histogram.quantile(0.95):.3f}s, "
+                f"total {histogram.sum:.1f}s"
+            )
+
+        # navigation/inner_html/sleep over all sessions
+        for name in ("navigation_seconds", "inner_html_seconds", "sleep_seconds"):
+            total = Histogram()
+            for (other, _), histogram in histograms:
+                if other == name:
+                    total.count += histogram.count
+                    total.sum += histogram.sum
+                    total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+            if total.count:
+                lines.append(
+                    f"  {name[:-8]}: {total.count}x, mean {total.sum / total.count:.3f}s, "
+                    f"p95 {total.quantile(0.95):.3f}s, total {total.sum:.1f}s"
+                )
+
+        totals = {}  # name -> {label text: value}
+        pages = {}  # (session, proxy) -> pages
+        for (name, labels), value in counters:
+            labels = dict(labels)
+            if name == "pages_total":
+                key = (labels.get("session"), labels.get("proxy"))
+                pages[key] = pages.get(key, 0) + value
+            label = ", ".join(labels.values()) or "all"
+            totals.setdefault(name, {})
+            totals[name][label] = totals[name].get(label, 0) + value
+        html_chars = sum(totals.pop("html_chars_total", {}).values())
+        if html_chars:
+            lines.append(f"  html: {html_chars / 1_000_000:.1f}M characters")
+        totals.pop("pages_total", None)
+        for name, values in totals.items():
+            lines.append(
+                f"  {name[:-6]}: "
+                + ", ".join(f"{label} {value}" for label, value in values.items())
+            )
+        for (session, proxy), count in sorted(pages.items()):
+            lines.append(
+                f"  session {session} ({proxy}): {count} pages, {count / minutes:.1f} pages/min"
+            )
+        proxies = {}
+        for (_, proxy), count in pages.items():
+            proxies[proxy] = proxies.get(proxy, 0) + count
+        if len(proxies) > 1:
+            for proxy, count in sorted(proxies.items()):
+                lines.append(
+                    f"  proxy {proxy}: {count} pages, {count / minutes:.1f} pages/min"
+                )
+        return lines
+
+
+metrics = Metrics()  # one per process, shared by every script/stage
@@ -0,0 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+from extractors import use_backend
+import multiprocessing
+import asyncio
+
+
+class ParsePool:  # parses pages in worker processes, the event loop only drives the browsers
+    def __init__(self, workers=0, backend="selectolax"):
+        self.workers = workers  # 0 = parse in the main process, on the event loop
+        self.backend = backend  # parser_backend of the extractors, in every worker process too
+        self._executor = None
+        use_backend(backend)
+
+    def _start(self):
+        # "spawn" instead of fork: forking a process with running browser drivers isn't safe
+        # Workers only import extractors.py (and what the function needs), not the scripts
+        self._executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=use_backend,
+            initargs=(self.backend,),
+        )
+
+    async def run(self, function, *args):
+        # function(*args) in a worker process, it has to be a module-level function of an
+        # import-light module (extractors.py) that takes and returns plain data (HTML in, record out)
+        if not self.workers:
+            return function(*args)
+        if self._executor is None:
+            self._start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
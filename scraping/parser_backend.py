@@ -0,0 +1,90 @@
+from bs4 import BeautifulSoup
+import warnings
+
+# Fastest first, "html.parser" is part of Python and always works
+PARSER_BACKENDS = ["selectolax", "lxml", "html.parser"]
+
+_resolved = {}  # configured backend -> backend that is actually installed
+
+
+class Node:  # selectolax node with the small part of the BeautifulSoup API the extractors use
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, selector):
+        return [Node(node) for node in self._node.css(selector)]
+
+    def select_one(self, selector):
+        node = self._node.css_first(selector)
+        return Node(node) if node is not None else None
+
+    def find(self, name, class_=None, href=None):
+        selector = name
+        if class_:
+            selector += f".{class_}"
+        if href:
+            selector += "[href]"
+        return self.select_one(selector)
+
+    def get(self, attribute, default=None):
+        value = self._node.attributes.get(attribute)
+        if value is None:
+            return default
+        if attribute == "class":  # BeautifulSoup splits classes into a list
+            return value.split()
+        return value
+
+    def __getitem__(self, attribute):
+        value = self.get(attribute)
+        if value is None:
+            raise KeyError(attribute)
+        return value
+
+    @property
+    def text(self):
+        return self._node.text(deep=True)
+
+    @property
+    def parent(self):
+        parent = self._node.parent
+        return Node(parent) if parent is not None else None
+
+
+def _is_installed(backend):
+    try:
+        if backend == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif backend == "lxml":
+            import lxml  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_backend(backend):
+    # Configured backend if it is installed, otherwise the next one that is (at the latest html.parser)
+    if backend not in _resolved:
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(
+                f"Unknown parser backend {backend!r}, use one of {PARSER_BACKENDS}"
+            )
+        candidates = PARSER_BACKENDS[PARSER_BACKENDS.index(backend) :]
+        installed = next(b for b in candidates if _is_installed(b))
+        if installed != backend:
+            warnings.warn(
+                f"Parser backend {backend!r} is not installed, using {installed!r}"
+            )
+        _resolved[backend] = installed
+    return _resolved[backend]
+
+
+def make_soup(html, backend="html.parser"):
+    # Parsed page with select/select_one/find/get/text/parent, whatever the backend
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+
+        return Node(LexborHTMLParser(html).root)
+    return BeautifulSoup(html, backend)
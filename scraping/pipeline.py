@@ -0,0 +1,355 @@
+from browserforge.fingerprints import Screen
+from browser_pool import BrowserPool, Session
+from work_queue import DONE, run_stage
+from dedup import DedupIndex
+from parse_pool import ParsePool
+from metrics import metrics
+from structured_log import get_logger, start_logging, stop_logging
+from pathlib import Path
+import async_get_recent_match_urls as results_stage
+import async_get_team_urls as ranking_stage
+import async_get_match_data as match_stage
+import async_get_team_data as team_stage
+import async_get_player_data as player_stage
+import pandas as pd
+import argparse
+import asyncio
+import time
+
+# Amounts, savefiles, journals and the HTML cache of every stage come from the config of its own script
+config = {
+    "team_sessions": 1,  # sessions for ranking + team pages
+    "player_sessions": 2,  # sessions for player pages (2 pages per player in two tabs, the slowest stage)
+    "results_sessions": 1,  # sessions for the /results pages
+    "match_sessions": 2,  # sessions for match pages
+    "queue_size": 50,  # URLs that can wait between two stages, a faster stage waits when it's full
+    "parse_workers": 4,  # processes that parse pages for all stages while the sessions open the next ones (0 = parse in the main process)
+    "parser_backend": "selectolax",  # "selectolax", "lxml" or "html.parser" (falls back to the next one if it is not installed)
+    "headless": True,  # hide the browser
+    "screen": Screen(max_width=1920, max_height=1080),
+    "screen_amount": 1,  # only matters if headless = False
+    "rate_limit": 1,  # requests per second over all sessions at the start, goes up on clean pages and down on 429s/challenges/slow pages
+    "rate_limit_min": 0.1,  # the rate never goes below this
+    "rate_limit_max": 5,  # the rate never goes above this
+    "proxy_rate_limit": 0.5,  # requests per second of every proxy (or of your own IP) at the start
+    "proxy_rate_limit_max": 2,  # the rate of one proxy never goes above this
+    "rate_increase": 0.05,  # requests per second added after every clean page
+    "rate_decrease": 0.5,  # rate gets multiplied by this after a 429/challenge/slow page
+    "slow_response": 8,  # seconds, slower pages count like a warning from HLTV
+    "session_max_errors": 3,  # a session stops after this many network errors/challenges in a row, the other sessions of its stage take over its work
+    "use_proxy": False,  # use proxy
+    "use_proxy_once": False,  # enable this to use a different proxy for each session (if you have enough proxies)
+    "proxy_location": ".../.../proxies.txt",  # location of the proxy list (format: server:port:username:password), 1 every line
+    "proxy_scores_location": "data/proxy_scores.json",  # health of every proxy, kept between runs so the next one starts with the proxies that worked (None = not kept)
+    "proxy_max_errors": 3,  # failed/challenged pages in a row that put a proxy into quarantine, its session switches to another proxy
+    "proxy_quarantine": 60,  # seconds of the first quarantine, doubles every time the same proxy gets quarantined again
+    "proxy_quarantine_max": 3600,  # a quarantine never lasts longer than this
+    "user_agents_location": ".../.../user_agents.json",  # location of the user agents list # refer to the readme for more info
+    "cookie_location": ".../.../autologin_cookie.json",  # location of the cookies incl. autologin
+    "storage_state_location": "data/storage_states",  # cookies/local storage of the last clean session of every proxy, new sessions start with it so Cloudflare doesn't challenge them again (None = always start fresh)
+    "storage_state_max_age": 86400,  # seconds a saved storage state gets reused, it gets deleted as soon as Cloudflare challenges the session again
+    "block_resources": True,  # abort images/media/fonts/ads/trackers while loading pages (cloudflare is never blocked)
+    "blocked_resource_types": ["image", "media", "font"],  # resource types that get aborted
+    "blocked_hosts": [],  # extra hosts to block, e.g. ["ads.example.com"] (common ad/tracker hosts are blocked already)
+    "metrics_port": None,  # Prometheus metrics on http://127.0.0.1:<port>/metrics while scraping, e.g. 9100 (None = off)
+    "metrics_location": "data/metrics.jsonl",  # all metrics get appended here every metrics_interval seconds and at the end (None = off)
+    "metrics_interval": 30,  # seconds between two metrics snapshots
+    "log_format": "console",  # "console" (colored lines) or "json" (one JSON record per line with session, URL, entity ID, stage and durations, for log aggregators)
+    "log_location": None,  # ".../.../scraper.jsonl" file that gets the JSON records too, whatever log_format is (None = stdout only)
+}
+
+
+log = get_logger("pipeline")  # structured records, written by a background thread
+
+
+def load_done(stage, resume):
+    # key -> record of the stage's journal with --resume, otherwise a fresh journal
+    if resume:
+        done = stage.journal.load_by_key()
+        log.warning(f"[!] Resuming, {len(done)} already done in {stage.journal.path}")
+        return done
+    stage.journal.reset()
+    stage.dead_letters.reset()
+    return {}
+
+
+def resumable(handler, done, data, index):
+    # Items from the journal are not scraped again, their record is handed on as if they were
+    async def wrapped(session, url):
+        if url in done:
+            if index.add(url):
+                data.append(done[url])
+            return done[url]
+        return await handler(session, url)
+
+    return wrapped
+
+
+async def run_teams(team_sessions, player_sessions, resume):
+    # ranking -> team URLs -> team pages -> player URLs -> player pages
+    team_urls = asyncio.Queue(config["queue_size"])
+    player_urls = asyncio.Queue(config["queue_size"])
+    ranking = asyncio.Queue()
+    ranking.put_nowait(ranking_stage.world_ranking_url)
+    ranking.put_nowait(DONE)
+
+    done_teams = load_done(team_stage, resume)
+    done_players = load_done(player_stage, resume)
+    scheduled_players = DedupIndex()  # a player that changed teams mid-run only gets scraped once
+
+    def roster(team_info):
+        return [
+            url for url in team_info["player_urls"] if scheduled_players.add(url)
+        ]
+
+    await asyncio.gather(
+        # The ranking is one page, its session moves on to team pages as soon as the URLs are in
+        run_stage(
+            team_sessions[:1],
+            ranking,
+            ranking_stage.scrape_team_urls,
+            team_urls,
+            emit=list,  # one page, every new team URL on it is an item for the next stage
+            on_error=ranking_stage.session_error,
+            retry=ranking_stage.retry_policy,
+        ),
+        run_stage(
+            team_sessions,
+            team_urls,
+            resumable(
+                team_stage.scrape_team,
+                done_teams,
+                team_stage.team_data,
+                team_stage.team_index,
+            ),
+            player_urls,
+            emit=roster,
+            on_error=team_stage.session_error,
+            max_errors=config["session_max_errors"],
+            retry=team_stage.retry_policy,
+            dead_letters=team_stage.dead_letters,
+        ),
+        run_stage(
+            player_sessions,
+            player_urls,
+            resumable(
+                player_stage.scrape_player,
+                done_players,
+                player_stage.player_data,
+                player_stage.player_index,
+            ),
+            on_error=player_stage.session_error,
+            max_errors=config["session_max_errors"],
+            retry=player_stage.retry_policy,
+            dead_letters=player_stage.dead_letters,
+        ),
+    )
+
+
+async def run_matches(results_sessions, match_sessions, resume):
+    # /results offsets -> match URLs -> match pages
+    offsets = asyncio.Queue()
+    match_urls = asyncio.Queue(config["queue_size"])
+
+    done_offsets = load_done(results_stage, resume)
+    done_matches = load_done(match_stage, resume)
+    for offset in range(0, results_stage.config["url_amount"], 100):
+        offsets.put_nowait(offset)
+    offsets.put_nowait(DONE)
+
+    async def scrape_offset(session, offset):
+        if offset in done_offsets:
+            added = []
+            for link in done_offsets[offset]:
+                if results_stage.match_index.add(link):
+                    results_stage.match_urls.append(link)
+                    added.append(link)
+            return added
+        return await results_stage.scrape_match_urls(session, offset)
+
+    scheduled_matches = 0
+
+    def first_matches(links):
+        # match_amount of the match script is still the limit
+        nonlocal scheduled_matches
+        amount = match_stage.config["match_amount"]
+        if amount != -1:
+            links = links[: max(0, amount - scheduled_matches)]
+        scheduled_matches += len(links)
+        return links
+
+    await asyncio.gather(
+        run_stage(
+            results_sessions,
+            offsets,
+            scrape_offset,
+            match_urls,
+            emit=first_matches,
+            on_error=results_stage.session_error,
+            max_errors=config["session_max_errors"],
+            retry=results_stage.retry_policy,
+            dead_letters=results_stage.dead_letters,
+        ),
+        run_stage(
+            match_sessions,
+            match_urls,
+            resumable(
+                match_stage.scrape_match,
+                done_matches,
+                match_stage.match_data,
+                match_stage.match_index,
+            ),
+            on_error=match_stage.session_error,
+            max_errors=config["session_max_errors"],
+            retry=match_stage.retry_policy,
+            dead_letters=match_stage.dead_letters,
+        ),
+    )
+
+
+def save_urls(urls, column, savefile_location):
+    filepath = Path(savefile_location)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(urls, columns=[column]).to_csv(filepath, index=False)
+
+
+def save_results(chains):
+    # Same files as the single scripts write, so they can still be used on their own afterwards
+    if "teams" in chains:
+        save_urls(
+            ranking_stage.team_urls, "team_url", ranking_stage.config["savefile_location"]
+        )
+        team_stage.save_data(team_stage.team_data)
+        player_stage.save_data(player_stage.player_data)
+        log.success(
+            f"[+] Saved {len(team_stage.team_data)} teams and {len(player_stage.player_data)} players"
+        )
+    if "matches" in chains:
+        save_urls(
+            results_stage.match_urls,
+            "match_url",
+            results_stage.config["savefile_location"],
+        )
+        match_stage.save_data(match_stage.match_data)
+        log.success(f"[+] Saved {len(match_stage.match_data)} matches")
+
+
+async def main(
+    chains=("teams", "matches"), pool=None, resume=False, offline=False, full=False
+):
+    total_start_time = time.perf_counter()
+    start_logging(config["log_format"], config["log_location"])
+    metrics.start(
+        config["metrics_port"], config["metrics_location"], config["metrics_interval"]
+    )
+
+    # Every stage gets its own sessions, the stages of both chains run at the same time
+    stages = {
+        "teams": ["team_sessions", "player_sessions"],
+        "matches": ["results_sessions", "match_sessions"],
+    }
+
+    own_pool = pool is None and not offline
+    for stage in (ranking_stage, team_stage, player_stage, results_stage, match_stage):
+        stage.page_cache.offline = offline
+    # Fresh teams/players get skipped, unchanged ones don't get parsed again (unless --full)
+    for stage in (team_stage, player_stage):
+        stage.freshness.offline = offline
+        stage.freshness.refresh = full
+    player_stage.window_cache.offline = offline
+    player_stage.window_cache.refresh = full
+    # One set of parse workers for all stages instead of one per script
+    parse_pool = ParsePool(config["parse_workers"], config["parser_backend"])
+    for stage in (team_stage, player_stage, match_stage):
+        stage.parse_pool = parse_pool
+    keys = [key for chain in chains for key in stages[chain]]
+    sessions = {}
+    if offline:
+        # Parsers only run on cached pages, no browser gets launched. One session per
+        # parse worker, so the cached pages get parsed on all of them at once
+        offline_session = Session("offline", None, None, None, None, True)
+        for key in keys:
+            sessions[key] = [offline_session] * max(1, config["parse_workers"])
+    else:
+        if own_pool:
+            pool = BrowserPool(config, size=sum(config[key] for key in keys))
+        await pool.start()
+        start = 0
+        for key in keys:
+            sessions[key] = pool.sessions[start : start + config[key]]
+            start += config[key]
+        for session in pool.sessions[:start]:
+            log.info(
+                f"[+] [Session {session.session_id}] Started",
+                session=session.session_id,
+                proxy=session.proxy_server,
+            )
+
+    runs = {"teams": run_teams, "matches": run_matches}
+    try:
+        await asyncio.gather(
+            *(
+                runs[chain](*(sessions[key] for key in stages[chain]), resume)
+                for chain in chains
+            )
+        )
+    finally:
+        for stage in (team_stage, player_stage, results_stage, match_stage):
+            stage.journal.flush()
+        team_stage.freshness.compact()
+        player_stage.freshness.compact()
+        player_stage.window_cache.compact()
+        parse_pool.close()
+        if not offline:
+            for session in pool.sessions[:start]:
+                team_stage.session_finished(session)
+        if own_pool:
+            await pool.close()
+        metrics.stop()
+        for line in metrics.summary():
+            log.info(line)
+
+    save_results(chains)
+
+    total_elapsed = time.perf_counter() - total_start_time
+    log.success(
+        f"[+] Pipeline finished (took {total_elapsed:.2f}s)", elapsed=total_elapsed
+    )
+    stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the scrapers as one pipeline, every stage starts as soon as the one before yields its first URLs"
+    )
+    parser.add_argument(
+        "chains",
+        nargs="*",
+        choices=["teams", "matches"],
+        default=["teams", "matches"],
+        help="teams = ranking -> teams -> players, matches = results -> matches (default: both)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue a crashed run, URLs that are already in the journals get skipped",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="re-parse the pages in the HTML cache without opening a browser",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="open and parse every team/player again, even the fresh/unchanged ones",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            tuple(args.chains),
+            resume=args.resume,
+            offline=args.offline,
+            full=args.full,
+        )
+    )
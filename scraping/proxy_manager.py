@@ -0,0 +1,208 @@
+from collections import deque
+from structured_log import get_logger
+from pathlib import Path
+import random
+import json
+import time
+
+LATENCY_WINDOW = 100  # latencies per proxy that the percentiles get calculated from
+
+log = get_logger("proxies")  # quarantines, with the proxy and the session that saw the errors
+
+
+def percentile(values, q):
+    # q-th percentile (0-100) of values, nearest rank, None without values
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ProxyStats:  # health of one proxy, kept between runs
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0  # network errors/timeouts
+        self.challenges = 0  # 429s/Cloudflare challenges
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # seconds per page
+        self.errors_in_row = 0
+        self.strikes = 0  # quarantines in a row, every one lasts twice as long as the one before
+        self.quarantined_until = 0.0  # unix time
+
+    @property
+    def requests(self):
+        return self.successes + self.failures + self.challenges
+
+    def score(self):
+        # Higher is better: share of clean pages, divided by the typical page time.
+        # New proxies start with 1 of 2 pages clean, so they get tried without being preferred
+        success_rate = (self.successes + 1) / (self.requests + 2)
+        p50 = percentile(self.latencies, 50) or 1.0
+        return success_rate / max(p50, 0.1)
+
+    def to_dict(self):
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "challenges": self.challenges,
+            "latencies": list(self.latencies),
+            "strikes": self.strikes,
+            "quarantined_until": self.quarantined_until,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.successes = data.get("successes", 0)
+        stats.failures = data.get("failures", 0)
+        stats.challenges = data.get("challenges", 0)
+        stats.latencies.extend(data.get("latencies", []))
+        stats.strikes = data.get("strikes", 0)
+        stats.quarantined_until = data.get("quarantined_until", 0.0)
+        return stats
+
+
+class ProxyManager:  # picks healthy, fast proxies and quarantines the ones that keep failing
+    def __init__(
+        self,
+        proxy_location,
+        scores_location=None,
+        use_once=False,
+        max_errors=3,
+        quarantine=60,
+        quarantine_max=3600,
+        shard=None,
+    ):
+        self.scores_location = Path(scores_location) if scores_location else None
+        self.use_once = use_once  # every proxy only gets handed out once
+        self.max_errors = max_errors  # failed pages in a row that put a proxy into quarantine
+        self.quarantine = quarantine  # seconds of the first quarantine, doubled on every strike
+        self.quarantine_max = quarantine_max
+        self.proxies = {}  # server -> {"server", "username", "password"}
+        self.stats = {}  # server -> ProxyStats
+        self._in_use = set()  # servers handed out, only matters with use_once
+
+        # "2/3" = only every 3rd proxy of the list starting with the 2nd, so workers on several
+        # machines can share one proxy list without using the same IPs
+        index, count = map(int, shard.split("/")) if shard else (1, 1)
+
+        # format: server:port:username:password, 1 every line
+        with open(proxy_location, "r") as file:
+            lines = [line for line in file if len(line.strip().split(":")) == 4]
+            for line in lines[index - 1 :: count]:
+                parts = line.strip().split(":")
+                server = parts[0] + ":" + parts[1]
+                self.proxies[server] = {
+                    "server": server,
+                    "username": parts[2],
+                    "password": parts[3],
+                }
+                self.stats[server] = ProxyStats()
+
+        # Scores of earlier runs, so a run starts with the proxies that worked last time
+        if self.scores_location and self.scores_location.exists():
+            with open(self.scores_location, "r", encoding="utf-8") as f:
+                for server, data in json.load(f).items():
+                    if server in self.stats:
+                        self.stats[server] = ProxyStats.from_dict(data)
+
+    def is_quarantined(self, server):
+        stats = self.stats.get(server)
+        return stats is not None and stats.quarantined_until > time.time()
+
+    def healthy(self):
+        # Proxies that can be handed out without falling back to a quarantined one
+        return [
+            server
+            for server in self.proxies
+            if not self.is_quarantined(server)
+            and not (self.use_once and server in self._in_use)
+        ]
+
+    def quarantine_ends(self):
+        # Unix time the first quarantined proxy gets out, None if none is quarantined
+        ends = [
+            stats.quarantined_until
+            for server, stats in self.stats.items()
+            if self.is_quarantined(server)
+        ]
+        return min(ends, default=None)
+
+    def get_proxy(self, session=None):
+        # Weighted random pick among the healthy proxies, so sessions don't all end up on the same one
+        candidates = self.healthy()
+        if not candidates:
+            if self.use_once:
+                candidates = [s for s in self.proxies if s not in self._in_use]
+            if not candidates:
+                candidates = list(self.proxies)
+            if not candidates:
+                raise RuntimeError("No proxies left to use")
+            # Everything is quarantined, the one that gets out first is the best bet
+            server = min(candidates, key=lambda s: self.stats[s].quarantined_until)
+            log.warning(
+                f"[!] All proxies are quarantined, using {server} anyway",
+                session=session,
+                proxy=server,
+            )
+        else:
+            weights = [self.stats[server].score() for server in candidates]
+            server = random.choices(candidates, weights)[0]
+        self._in_use.add(server)
+        return self.proxies[server]
+
+    def record(self, server, elapsed=None, blocked=False, error=False, session=None):
+        # Outcome of one page on the proxy: clean (with its load time), blocked or failed
+        stats = self.stats.get(server)
+        if stats is None:  # no proxy
+            return
+        if not blocked and not error:
+            stats.successes += 1
+            if elapsed is not None:
+                stats.latencies.append(elapsed)
+            stats.errors_in_row = 0
+            stats.strikes = 0
+            return
+
+        if blocked:
+            stats.challenges += 1
+        else:
+            stats.failures += 1
+        stats.errors_in_row += 1
+        if stats.errors_in_row >= self.max_errors:
+            cool_down = min(self.quarantine_max, self.quarantine * 2**stats.strikes)
+            stats.quarantined_until = time.time() + cool_down
+            stats.strikes += 1
+            stats.errors_in_row = 0
+            log.warning(
+                f"[!] Proxy {server} quarantined for {cool_down:.0f}s",
+                session=session,
+                proxy=server,
+                strikes=stats.strikes,
+            )
+
+    def summary(self, server):
+        stats = self.stats.get(server)
+        if stats is None or not stats.requests:
+            return "no pages yet"
+        p50 = percentile(stats.latencies, 50)
+        p90 = percentile(stats.latencies, 90)
+        latency = f"p50 {p50:.2f}s, p90 {p90:.2f}s" if p50 is not None else "no latency"
+        summary = (
+            f"{stats.successes / stats.requests:.0%} clean, {latency}, "
+            f"{stats.challenges / stats.requests:.0%} challenged"
+        )
+        if self.is_quarantined(server):
+            summary += ", quarantined"
+        return summary
+
+    def save(self):
+        if not self.scores_location:
+            return
+        self.scores_location.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.scores_location, "w", encoding="utf-8") as f:
+            json.dump(
+                {server: stats.to_dict() for server, stats in self.stats.items()},
+                f,
+                indent=2,
+            )
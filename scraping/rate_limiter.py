@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+
+class TokenBucket:  # "rate" requests per second, at most "burst" at once
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # waiting requests get their token in order
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate):
+        self._refill()  # tokens up to now still count with the old rate
+        self.rate = rate
+
+    async def acquire(self):
+        # Returns the seconds spent waiting
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+                waited += wait
+                self._refill()
+            self.tokens -= 1
+        return waited
+
+
+class RateLimiter:  # shared by all sessions, one global and one per-proxy bucket, adapted with AIMD
+    def __init__(
+        self,
+        rate=1.0,
+        min_rate=0.1,
+        max_rate=5.0,
+        proxy_rate=0.5,
+        proxy_max_rate=2.0,
+        increase=0.05,
+        decrease=0.5,
+        slow_response=8.0,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.proxy_rate = proxy_rate  # start rate of every proxy
+        self.proxy_max_rate = proxy_max_rate
+        self.increase = increase  # requests/s added after a clean page
+        self.decrease = decrease  # rate gets multiplied by this after a 429/challenge/slow page
+        self.slow_response = slow_response  # seconds, slower pages count as a warning
+        self.bucket = TokenBucket(rate)
+        self.proxy_buckets = {}  # proxy server (None = no proxy) -> TokenBucket
+        self.throttled = 0  # pages that made the rate go down
+
+    def _proxy_bucket(self, proxy):
+        if proxy not in self.proxy_buckets:
+            self.proxy_buckets[proxy] = TokenBucket(self.proxy_rate)
+        return self.proxy_buckets[proxy]
+
+    async def acquire(self, proxy=None):
+        # Waits until both the proxy and the whole run are allowed another request
+        waited = await self._proxy_bucket(proxy).acquire()
+        waited += await self.bucket.acquire()
+        return waited
+
+    def record(self, proxy=None, elapsed=0.0, blocked=False):
+        # Additive increase on clean pages, multiplicative decrease on 429s/challenges/slow pages
+        proxy_bucket = self._proxy_bucket(proxy)
+        if blocked or elapsed > self.slow_response:
+            self.throttled += 1
+            proxy_bucket.set_rate(max(self.min_rate, proxy_bucket.rate * self.decrease))
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.decrease))
+        else:
+            proxy_bucket.set_rate(
+                min(self.proxy_max_rate, proxy_bucket.rate + self.increase)
+            )
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.increase))
+
+    def summary(self, proxy=None):
+        rate = self._proxy_bucket(proxy).rate
+        return (
+            f"{rate:.2f} req/s on this proxy, {self.bucket.rate:.2f} req/s overall, "
+            f"throttled {self.throttled} times"
+        )
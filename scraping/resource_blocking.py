@@ -0,0 +1,91 @@
+from urllib.parse import urlparse
+
+# Never needed to read div.colCon / div.results / div.stats-player / div.ranking
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+
+# Ads, analytics and embeds, blocked no matter the resource type
+BLOCKED_HOSTS = [
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "hotjar.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "platform.twitter.com",
+    "youtube.com",
+    "ytimg.com",
+    "twitch.tv",
+    "jtvnw.net",
+]
+
+# Cloudflare has to be able to run its challenge, these are never blocked
+ALLOWED = ["challenges.cloudflare.com", "/cdn-cgi/"]
+
+# Aborted requests have no size, so the saved bytes are an estimate per resource type
+AVERAGE_BYTES = {
+    "image": 35_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+
+
+class ResourceBlocker:  # route handler for one browser context, counts what got blocked
+    def __init__(self, resource_types=None, hosts=None):
+        self.resource_types = set(
+            BLOCKED_RESOURCE_TYPES if resource_types is None else resource_types
+        )
+        self.hosts = BLOCKED_HOSTS + list(hosts or [])
+        self.blocked_requests = 0
+        self.bytes_saved = 0  # estimated
+        self.bytes_loaded = 0  # from Content-Length of the responses that went through
+
+    def should_block(self, url, resource_type):
+        if any(allowed in url for allowed in ALLOWED):
+            return False
+        if resource_type in self.resource_types:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(
+            host == blocked or host.endswith("." + blocked) for blocked in self.hosts
+        )
+
+    async def _handle(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked_requests += 1
+            self.bytes_saved += AVERAGE_BYTES.get(request.resource_type, 10_000)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _count_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+
+    async def install(self, context):
+        await context.route("**/*", self._handle)
+        context.on("response", self._count_response)
+
+    def summary(self):
+        return (
+            f"blocked {self.blocked_requests} requests (~{self.bytes_saved / 1_000_000:.1f} MB saved), "
+            f"loaded {self.bytes_loaded / 1_000_000:.1f} MB"
+        )
@@ -0,0 +1,303 @@
+from datetime import datetime, timezone
+from columnar import typed_rows
+from dedup import entity_id
+from pathlib import Path
+import warnings
+import sqlite3
+import json
+
+BATCH_SIZE = 500  # records per transaction
+
+# Normalized tables keyed on HLTV IDs. Dates are ISO strings ("2025-06-01"), so they sort and
+# compare as dates: "all Mirage picks by team X in 2025" =
+#   SELECT * FROM match_maps JOIN matches USING (match_id)
+#   WHERE map = 'Mirage' AND picked_by = 'X' AND date BETWEEN '2025-01-01' AND '2025-12-31'
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    match_url TEXT,
+    team_1 TEXT,
+    team_2 TEXT,
+    score_team_1 INTEGER,
+    score_team_2 INTEGER,
+    winner TEXT,
+    date TEXT,
+    hour INTEGER,
+    event TEXT,
+    mode TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS matches_date ON matches (date);
+CREATE INDEX IF NOT EXISTS matches_team_1 ON matches (team_1, date);
+CREATE INDEX IF NOT EXISTS matches_team_2 ON matches (team_2, date);
+CREATE INDEX IF NOT EXISTS matches_event ON matches (event, date);
+
+CREATE TABLE IF NOT EXISTS match_maps (
+    match_id INTEGER NOT NULL REFERENCES matches (match_id),
+    map_number INTEGER NOT NULL,
+    map TEXT,
+    picked_by TEXT,
+    winner TEXT,
+    score_team_1 INTEGER,
+    score_team_2 INTEGER,
+    PRIMARY KEY (match_id, map_number)
+);
+CREATE INDEX IF NOT EXISTS match_maps_map ON match_maps (map, picked_by);
+CREATE INDEX IF NOT EXISTS match_maps_picked_by ON match_maps (picked_by);
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_id INTEGER PRIMARY KEY,
+    team_url TEXT,
+    team_name TEXT,
+    team_region TEXT,
+    world_ranking INTEGER,
+    valve_ranking INTEGER,
+    avg_player_age REAL,
+    current_winstreak INTEGER,
+    winrate REAL,
+    coach_url TEXT,
+    player_urls TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS teams_team_name ON teams (team_name);
+
+CREATE TABLE IF NOT EXISTS team_map_winrates (
+    team_id INTEGER NOT NULL REFERENCES teams (team_id),
+    map TEXT NOT NULL,
+    winrate REAL,
+    PRIMARY KEY (team_id, map)
+);
+CREATE INDEX IF NOT EXISTS team_map_winrates_map ON team_map_winrates (map);
+
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER NOT NULL,
+    "window" TEXT NOT NULL,
+    player_url TEXT,
+    name TEXT,
+    country TEXT,
+    team TEXT,
+    age INTEGER,
+    start_date TEXT,
+    end_date TEXT,
+    maps TEXT,
+    event TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (player_id, "window")
+);
+CREATE INDEX IF NOT EXISTS players_team ON players (team);
+CREATE INDEX IF NOT EXISTS players_name ON players (name);
+
+CREATE TABLE IF NOT EXISTS player_side_stats (
+    player_id INTEGER NOT NULL,
+    "window" TEXT NOT NULL,
+    side TEXT NOT NULL,
+    role TEXT NOT NULL,
+    stat TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (player_id, "window", side, role, stat),
+    FOREIGN KEY (player_id, "window") REFERENCES players (player_id, "window")
+);
+CREATE INDEX IF NOT EXISTS player_side_stats_stat ON player_side_stats ("window", side, role, stat);
+"""
+
+SQL_TYPES = {int: "INTEGER", float: "REAL"}  # everything else is TEXT
+SIDES = {"ct-side": "ct", "t-side": "t"}
+
+
+def connect(location):
+    path = Path(location)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")  # readers don't block the writer
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def upsert(connection, table, keys, rows):
+    # Inserts new rows, updates the columns of rows whose key already exists
+    if not rows:
+        return
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    names = ", ".join(f'"{column}"' for column in columns)
+    values = ", ".join("?" for _ in columns)
+    updates = ", ".join(
+        f'"{column}" = excluded."{column}"' for column in columns if column not in keys
+    )
+    conflict = ", ".join(f'"{key}"' for key in keys)
+    connection.executemany(
+        f"INSERT INTO {table} ({names}) VALUES ({values}) "
+        f"ON CONFLICT ({conflict}) DO UPDATE SET {updates}",
+        [[row.get(column) for column in columns] for row in rows],
+    )
+
+
+def replace_children(connection, table, keys, parents, rows):
+    # Maps/winrates/side stats of a record get replaced as a whole, a map that's gone stays gone
+    condition = " AND ".join(f'"{key}" = ?' for key in keys)
+    connection.executemany(
+        f"DELETE FROM {table} WHERE {condition}",
+        [[parent[key] for key in keys] for parent in parents],
+    )
+    if not rows:
+        return
+    columns = list(rows[0])
+    names = ", ".join(f'"{column}"' for column in columns)
+    values = ", ".join("?" for _ in columns)
+    connection.executemany(
+        f"INSERT INTO {table} ({names}) VALUES ({values})",
+        [[row[column] for column in columns] for row in rows],
+    )
+
+
+def add_columns(connection, table, columns):
+    # Player stats are whatever the extractors return, new ones become new columns
+    existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    for column, sql_type in columns.items():
+        if column not in existing:
+            connection.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {sql_type}')
+            existing.add(column)
+
+
+def column_types(rows):
+    # SQL type of every column: the type of its values that aren't missing, TEXT if they disagree
+    # (or are all missing), so the order of the rows doesn't matter
+    types = {}
+    for row in rows:
+        for column, value in row.items():
+            sql_type = None if value is None else SQL_TYPES.get(type(value), "TEXT")
+            if types.get(column) is None:
+                types[column] = sql_type
+            elif sql_type is not None and sql_type != types[column]:
+                types[column] = "TEXT"
+    return {column: sql_type or "TEXT" for column, sql_type in types.items()}
+
+
+def match_rows(rows, updated_at):
+    matches, maps = [], []
+    for row in rows:
+        match_id = row["match_id"]
+        date = row.get("date")
+        matches.append(
+            {
+                "match_id": match_id,
+                "match_url": row.get("match_url"),
+                "team_1": row.get("team_1"),
+                "team_2": row.get("team_2"),
+                "score_team_1": row.get("score_team_1"),
+                "score_team_2": row.get("score_team_2"),
+                "winner": row.get("winner"),
+                "date": date.isoformat() if date else None,
+                "hour": row.get("hour"),
+                "event": row.get("event"),
+                "mode": row.get("mode"),
+                "updated_at": updated_at,
+            }
+        )
+        for number, map_info in enumerate(row.get("maps") or [], 1):
+            maps.append({"match_id": match_id, "map_number": number, **map_info})
+    return {"matches": matches, "match_maps": maps}
+
+
+def team_rows(rows, updated_at):
+    teams, winrates = [], []
+    for row in rows:
+        team_id = row["team_id"]
+        team = {"team_id": team_id, "updated_at": updated_at}
+        for column, value in row.items():
+            if column.startswith("map_winrates."):
+                if value is not None:  # maps the team hasn't played lately
+                    winrates.append(
+                        {
+                            "team_id": team_id,
+                            "map": column.split(".", 1)[1],
+                            "winrate": value,
+                        }
+                    )
+            elif column == "player_urls":
+                team[column] = json.dumps(value)
+            else:
+                team[column] = value
+        teams.append(team)
+    return {"teams": teams, "team_map_winrates": winrates}
+
+
+def player_rows(rows, updated_at):
+    # One row per player and stats window. Side stats go into player_side_stats (one row per
+    # side/role/stat), everything else becomes a column of players ("overall.rating" -> overall_rating)
+    players, side_stats = [], []
+    for row in rows:
+        player_id = row["player_id"]
+        window = row["window"]
+        player = {"player_id": player_id, "window": window, "updated_at": updated_at}
+        for column, value in row.items():
+            side, _, rest = column.partition(".")
+            if side in SIDES:
+                role, _, stat = rest.partition(".")
+                side_stats.append(
+                    {
+                        "player_id": player_id,
+                        "window": window,
+                        "side": SIDES[side],
+                        "role": role,
+                        "stat": stat,
+                        "value": value,
+                    }
+                )
+            elif column == "maps":
+                player[column] = json.dumps(value)
+            elif column != "window":
+                player[column.replace(".", "_")] = value
+        players.append(player)
+    return {"players": players, "player_side_stats": side_stats}
+
+
+# dataset -> (ID column, key of the parent rows, builder of the table rows, parent table, child table)
+DATASETS = {
+    "match": ("match_id", ("match_id",), match_rows, "matches", "match_maps"),
+    "team": ("team_id", ("team_id",), team_rows, "teams", "team_map_winrates"),
+    "player": (
+        "player_id",
+        ("player_id", "window"),
+        player_rows,
+        "players",
+        "player_side_stats",
+    ),
+}
+
+
+def write_sqlite(dataset, records, location, batch_size=BATCH_SIZE):
+    # Upserts the records into the normalized tables, one transaction per batch.
+    # Returns the amount of rows written (players: one per stats window)
+    id_column, keys, build, parent, child = DATASETS[dataset]
+    url_column = f"{dataset}_url"
+
+    rows = []
+    for row in typed_rows(dataset, records):
+        id = entity_id(row.get(url_column) or "")
+        if id is None:
+            continue  # journals of older runs have no URL in their records
+        row = {id_column: id, **row}
+        if dataset == "player":
+            row["window"] = row.get("window") or ""  # records of older runs had one window
+        rows.append(row)
+    # The same key twice, last one wins
+    rows = list({tuple(row[key] for key in keys): row for row in rows}.values())
+    skipped = sum(1 for record in records if entity_id(record.get(url_column) or "") is None)
+    if skipped:
+        warnings.warn(
+            f"{skipped} {dataset} records without {url_column} weren't written to {location}"
+        )
+
+    updated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    connection = connect(location)
+    try:
+        for start in range(0, len(rows), batch_size):
+            tables = build(rows[start : start + batch_size], updated_at)
+            with connection:  # commits the batch, rolls it back on errors
+                if dataset == "player":
+                    add_columns(connection, "players", column_types(tables["players"]))
+                upsert(connection, parent, keys, tables[parent])
+                replace_children(connection, child, keys, tables[parent], tables[child])
+    finally:
+        connection.close()
+    return len(rows)
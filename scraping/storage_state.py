@@ -0,0 +1,60 @@
+from pathlib import Path
+import hashlib
+import json
+import time
+import os
+
+
+class StorageStates:  # cookies + local storage of the last clean session of every proxy, reused on the next launch
+    def __init__(self, location=None, max_age=86400):
+        self.location = Path(location) if location else None  # None = every launch starts fresh
+        self.max_age = max_age  # seconds a saved state gets reused, Cloudflare clearance runs out anyway
+
+    def _path(self, proxy_server):
+        # One file per proxy (or "direct" without one), clearance cookies only work from the same IP
+        if proxy_server is None:
+            return self.location / "direct.json"
+        digest = hashlib.sha1(proxy_server.encode("utf-8")).hexdigest()[:16]
+        return self.location / f"proxy-{digest}.json"
+
+    def load(self, proxy_server):
+        # {"user_agent", "saved_at", "storage_state"} of the proxy, None if missing or too old
+        if not self.location:
+            return None
+        path = self._path(proxy_server)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if time.time() - saved.get("saved_at", 0) > self.max_age:
+            return None
+        return saved
+
+    def save(self, proxy_server, user_agent, storage_state):
+        # The user agent is part of it, Cloudflare ties the clearance cookie to it
+        if not self.location:
+            return
+        path = self._path(proxy_server)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        saved = {
+            "proxy": proxy_server,
+            "user_agent": user_agent,
+            "saved_at": time.time(),
+            "storage_state": storage_state,
+        }
+        # Written next to it first, a crash mid-write doesn't leave a broken state behind
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(temp_path, path)
+
+    def invalidate(self, proxy_server):
+        # Cloudflare challenged the session again, the saved clearance is no good anymore
+        if not self.location:
+            return
+        path = self._path(proxy_server)
+        if path.exists():
+            path.unlink()
@@ -0,0 +1,144 @@
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+from pathlib import Path
+from dedup import entity_id
+import logging
+import atexit
+import queue
+import json
+import sys
+
+SUCCESS = 25  # between INFO and WARNING, a page/item that went through
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+
+class bcolors:  # colors to print in color
+    HEADER = "\033[95m"
+    OKBLUE = "\033[94m"
+    OKCYAN = "\033[96m"
+    SUCCESS = "\033[92m"
+    WARNING = "\033[93m"
+    FAIL = "\033[91m"
+    ENDC = "\033[0m"
+    BOLD = "\033[1m"
+    UNDERLINE = "\033[4m"
+
+
+LEVEL_COLORS = {
+    logging.DEBUG: bcolors.OKBLUE,
+    logging.INFO: bcolors.OKCYAN,
+    SUCCESS: bcolors.SUCCESS,
+    logging.WARNING: bcolors.WARNING,
+    logging.ERROR: bcolors.FAIL,
+    logging.CRITICAL: bcolors.FAIL,
+}
+
+
+class JsonFormatter(logging.Formatter):  # one JSON object per line, for log aggregators
+    # Fields: time, level, logger, message + whatever the call passed (stage, session,
+    # proxy, url, entity, elapsed, kind, retry_in, error, ...)
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage().strip(),  # warnings end with a newline
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):  # the colored lines the scripts always printed
+    def format(self, record):
+        message = record.getMessage()
+        if record.name == "py.warnings":  # warnings.warn() of the library modules
+            message = f"[!] {message.strip()}"
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return LEVEL_COLORS.get(record.levelno, bcolors.ENDC) + message + bcolors.ENDC
+
+
+class StageLogger:  # log.success(msg, session=..., url=..., elapsed=...) instead of print()
+    def __init__(self, stage):
+        self.stage = stage
+        self.logger = logging.getLogger(f"hltv.{stage}")
+
+    def log(self, level, msg, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        fields = {"stage": self.stage, **fields}
+        if "url" in fields and "entity" not in fields:
+            entity = entity_id(fields["url"])  # HLTV ID of the match/team/player
+            if entity is not None:
+                fields["entity"] = entity
+        # Rounded here, so every sink shows the same durations
+        for key in ("elapsed", "retry_in"):
+            if isinstance(fields.get(key), float):
+                fields[key] = round(fields[key], 3)
+        self.logger.log(level, msg, extra={"fields": fields})
+
+    def info(self, msg, **fields):
+        self.log(logging.INFO, msg, **fields)
+
+    def success(self, msg, **fields):
+        self.log(SUCCESS, msg, **fields)
+
+    def warning(self, msg, **fields):
+        self.log(logging.WARNING, msg, **fields)
+
+    def error(self, msg, **fields):
+        self.log(logging.ERROR, msg, **fields)
+
+
+def get_logger(stage):
+    return StageLogger(stage)
+
+
+_listener = None
+
+
+def start_logging(log_format="console", location=None, level="INFO"):
+    # Loggers only put records into a queue, a thread formats and writes them, so a slow
+    # stdout pipe or disk never blocks the event loop. log_format is how stdout looks
+    # ("console" = colored lines, "json" = one JSON record per line), location gets JSON
+    # records on top of that (None = stdout only)
+    global _listener
+    if _listener:  # already started by the script/pipeline that called this one
+        return
+
+    stdout = logging.StreamHandler(sys.stdout)
+    stdout.setFormatter(JsonFormatter() if log_format == "json" else ConsoleFormatter())
+    handlers = [stdout]
+    if location:
+        Path(location).parent.mkdir(parents=True, exist_ok=True)
+        to_file = logging.FileHandler(location, encoding="utf-8")
+        to_file.setFormatter(JsonFormatter())
+        handlers.append(to_file)
+
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.prepare = lambda record: record  # formatted by the listener thread, not in the loop
+    # Loggers of the scripts, browsers and proxies plus warnings.warn() of the other modules
+    logging.captureWarnings(True)
+    for name in ("hltv", "py.warnings"):
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.setLevel(level)
+        logger.propagate = False
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)  # a crash still gets its last records written
+
+
+def stop_logging():
+    # Writes what is still in the queue
+    global _listener
+    if not _listener:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
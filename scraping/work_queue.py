@@ -0,0 +1,273 @@
+from browser_pool import BlockedError
+from html_cache import CacheMiss
+from metrics import metrics
+import asyncio
+import random
+
+
+def make_queue(items):
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    return queue
+
+
+def classify_error(e):
+    # "challenge" (429/Cloudflare) and "network" (timeouts, connection/browser errors) are worth
+    # another try on another session, "parse" errors would only fail the same way again and
+    # "not cached" (--offline) pages can only be replayed online
+    if isinstance(e, BlockedError):
+        return "challenge"
+    if isinstance(e, CacheMiss):
+        return "not cached"
+    if isinstance(e, (TimeoutError, ConnectionError, OSError)):
+        return "network"
+    if type(e).__module__.startswith("playwright"):  # page.goto/inner_html timeouts, closed pages
+        return "network"
+    return "parse"
+
+
+class RetryPolicy:  # how often and after how long a failed item gets tried again
+    def __init__(self, attempts=3, backoff=2.0, backoff_max=60.0):
+        self.attempts = attempts  # tries per item in total, 1 = no retries
+        self.backoff = backoff  # seconds before the first retry, doubles with every retry
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt):
+        # Exponential backoff with jitter, so retries of many items don't all come back at once
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+
+NO_RETRIES = RetryPolicy(attempts=1)
+
+
+class Retry:  # item that failed before, goes back into the queue after its backoff
+    __slots__ = ("item", "attempt", "session", "error", "skipped")
+
+    def __init__(self, item, attempt, session, error):
+        self.item = item
+        self.attempt = attempt  # tries so far
+        self.session = session  # session it failed on last, another one gets it if possible
+        self.error = error  # last error, ends up in the dead letters if no session is left
+        self.skipped = False
+
+
+async def run_workers(
+    sessions,
+    queue,
+    handler,
+    on_error=None,
+    max_errors=3,
+    retry=NO_RETRIES,
+    dead_letters=None,
+):
+    # Every session pulls from the same queue, so fast sessions take more work and
+    # a session that dies only loses the item it was working on, not a whole slice
+    queue.put_nowait(DONE)
+    await run_stage(
+        sessions,
+        queue,
+        handler,
+        on_error=on_error,
+        max_errors=max_errors,
+        retry=retry,
+        dead_letters=dead_letters,
+    )
+
+
+DONE = object()  # end of a stream, every stage passes it on to the next one
+
+
+async def run_stage(
+    sessions,
+    inbox,
+    handler,
+    outbox=None,
+    emit=None,
+    on_error=None,
+    max_errors=3,
+    retry=NO_RETRIES,
+    dead_letters=None,
+):
+    # Streaming version of run_workers: items keep coming until DONE, whatever the handler
+    # returns gets turned into items for the next stage by emit() and put into outbox
+    # (bounded, so a fast stage waits for a slow one instead of filling up memory).
+    # Items that fail with a network/challenge error come back after a backoff, preferably on
+    # another session; items that fail for good go to dead_letters (DeadLetters or None)
+    alive = len(sessions)
+    pending = 0  # retries waiting for their backoff
+    settled = asyncio.Event()  # set while no retries are waiting
+    settled.set()
+    timers = set()  # keeps the backoff tasks alive
+
+    def give_up(item, kind, e, attempt):
+        metrics.inc("failed_total", kind=kind)
+        if dead_letters is not None:
+            dead_letters.add(item, kind, e, attempt)
+
+    async def requeue(entry, delay):
+        nonlocal pending
+        await asyncio.sleep(delay)
+        if alive:
+            await inbox.put(entry)
+        else:  # every session gave up in the meantime
+            give_up(entry.item, classify_error(entry.error), entry.error, entry.attempt)
+        pending -= 1
+        if not pending:
+            settled.set()
+
+    def schedule(entry, delay):
+        nonlocal pending
+        pending += 1
+        settled.clear()
+        timer = asyncio.create_task(requeue(entry, delay))
+        timers.add(timer)
+        timer.add_done_callback(timers.discard)
+
+    async def worker(session):
+        nonlocal alive
+        errors_in_row = 0
+        while True:
+            entry = await inbox.get()
+            if entry is DONE:
+                if pending or not inbox.empty():
+                    # Retries still come back or already came back behind DONE, it goes behind them
+                    await settled.wait()
+                    await inbox.put(DONE)
+                    continue
+                inbox.put_nowait(DONE)  # the other workers of this stage need to see it too
+                alive -= 1
+                return True
+
+            item, attempt = entry, 0
+            if isinstance(entry, Retry):
+                if entry.session is session and alive > 1 and not entry.skipped:
+                    # Back into the queue for another session, this one waits a moment so it
+                    # doesn't take it again. Only once, so it can't bounce between busy sessions forever
+                    entry.skipped = True
+                    schedule(entry, 0)
+                    await asyncio.sleep(0.5)
+                    continue
+                item, attempt = entry.item, entry.attempt
+
+            result = None
+            try:
+                result = await handler(session, item)
+                errors_in_row = 0
+            except Exception as e:
+                kind = classify_error(e)
+                if kind in ("network", "challenge"):
+                    errors_in_row += 1  # parse errors are the page's fault, not the session's
+                attempt += 1
+                if kind in ("network", "challenge") and attempt < retry.attempts:
+                    delay = retry.delay(attempt)
+                    schedule(Retry(item, attempt, session, e), delay)
+                    metrics.inc("retries_total", kind=kind)
+                    if on_error:
+                        on_error(session, item, e, kind, delay)
+                else:
+                    give_up(item, kind, e, attempt)
+                    if on_error:
+                        on_error(session, item, e, kind, None)
+
+            if outbox is not None and result is not None:
+                for next_item in emit(result) if emit else [result]:
+                    await outbox.put(next_item)
+
+            # probably blocked/broken, leave the rest of the stream to the other sessions
+            if errors_in_row >= max_errors:
+                alive -= 1
+                return False
+
+    finished = await asyncio.gather(*(worker(session) for session in sessions))
+
+    # Every session gave up: drop the rest, so the stage before doesn't wait on a full queue forever
+    if not any(finished):
+        await settled.wait()  # waiting retries go to the dead letters on their own
+        done = False
+        while not done or not inbox.empty():  # retries can be behind DONE
+            entry = await inbox.get()
+            if entry is DONE:
+                done = True
+            elif isinstance(entry, Retry):
+                give_up(entry.item, classify_error(entry.error), entry.error, entry.attempt)
+            else:
+                give_up(entry, "no session left", None, 0)
+
+    if outbox is not None:
+        await outbox.put(DONE)
+
+
+async def run_leased_workers(
+    sessions,
+    store,
+    queue,
+    handler,
+    on_error=None,
+    max_errors=3,
+    retry=NO_RETRIES,
+    worker_id="worker",
+    lease=120,
+    heartbeat=30,
+    poll_interval=5,
+):
+    # Distributed version of run_workers: items get leased from a shared job store (job_store.py)
+    # instead of an asyncio.Queue, so workers on several machines can share one queue. A lease
+    # gets renewed every heartbeat seconds while the handler works on the item, the lease of a
+    # worker that dies runs out and another worker takes the item over. Retries go back into the
+    # store with their backoff, so they can end up on another machine/proxy as well
+    async def call(function, *args):
+        # SQLite/Redis calls block, they run next to the loop instead of in it
+        return await asyncio.to_thread(function, *args)
+
+    async def keep_leased(key):
+        while True:
+            await asyncio.sleep(heartbeat)
+            if not await call(store.heartbeat, queue, key, worker_id, lease):
+                return  # ran out in the meantime, whoever finishes first wins
+
+    async def worker(session):
+        errors_in_row = 0
+        while True:
+            job = await call(store.lease, queue, worker_id, lease, retry.attempts)
+            if job is None:
+                counts = await call(store.counts, queue)
+                if not counts["pending"] and not counts["leased"]:
+                    if not await call(store.is_open, queue):
+                        return True  # nothing left and the coordinator won't add more
+                # Retries waiting for their backoff, leases of other workers that may still run
+                # out or a coordinator that hasn't added its jobs yet
+                await asyncio.sleep(poll_interval)
+                continue
+
+            key, attempt = job
+            renewing = asyncio.create_task(keep_leased(key))
+            try:
+                result = await handler(session, key)
+                errors_in_row = 0
+                await call(store.complete, queue, key, worker_id, result)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind in ("network", "challenge"):
+                    errors_in_row += 1  # parse errors are the page's fault, not the session's
+                error = f"{type(e).__name__}: {e}"
+                if kind in ("network", "challenge") and attempt < retry.attempts:
+                    delay = retry.delay(attempt)
+                    await call(store.retry, queue, key, worker_id, delay, kind, error)
+                    metrics.inc("retries_total", kind=kind)
+                    if on_error:
+                        on_error(session, key, e, kind, delay)
+                else:
+                    await call(store.fail, queue, key, worker_id, kind, error)
+                    metrics.inc("failed_total", kind=kind)
+                    if on_error:
+                        on_error(session, key, e, kind, None)
+            finally:
+                renewing.cancel()
+
+            # probably blocked/broken, leave the rest of the queue to the other sessions/workers
+            if errors_in_row >= max_errors:
+                return False
+
+    return await asyncio.gather(*(worker(session) for session in sessions))
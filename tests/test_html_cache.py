@@ -0,0 +1,30 @@
+from pathlib import Path
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scraping"))
+
+from html_cache import HtmlCache
+
+PLAYER = "https://www.hltv.org/stats/players/11893/zywoo"
+
+
+class HtmlCacheTest(unittest.TestCase):
+    def test_offline_fallback_stays_in_its_window(self):
+        # Rolling windows cached yesterday: today's URLs miss, the key finds the page of the same window only
+        with tempfile.TemporaryDirectory() as directory:
+            cache = HtmlCache(directory)
+            cache.put(f"{PLAYER}?startDate=2025-09-17&endDate=2025-10-17", "1 month", "1m")
+            cache.put(f"{PLAYER}?startDate=2024-10-17&endDate=2025-10-17", "1 year", "1y")
+
+            offline = HtmlCache(directory, offline=True)
+            today = f"{PLAYER}?startDate=2025-09-18&endDate=2025-10-18"
+            self.assertEqual(offline.get(today, key="1m"), "1 month")
+            self.assertEqual(offline.get(today, key="1y"), "1 year")
+            self.assertIsNone(offline.get(today, key="3m"))
+            self.assertIsNone(offline.get(today))
+
+
+if __name__ == "__main__":
+    unittest.main()
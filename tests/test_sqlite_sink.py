@@ -0,0 +1,54 @@
+from pathlib import Path
+import tempfile
+import unittest
+import sqlite3
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scraping"))
+
+from sqlite_sink import column_types, write_sqlite
+
+
+class ColumnTypesTest(unittest.TestCase):
+    def test_mixed_types_are_text_in_any_order(self):
+        rows = [
+            {"a": None, "b": None, "c": 1, "d": None},
+            {"a": 1, "b": 1.5, "c": "x"},
+            {"a": 2, "b": 2, "c": None},
+        ]
+        expected = {"a": "INTEGER", "b": "TEXT", "c": "TEXT", "d": "TEXT"}
+        self.assertEqual(column_types(rows), expected)
+        self.assertEqual(column_types(rows[::-1]), expected)
+
+    def test_player_columns_dont_depend_on_row_order(self):
+        # The first player has no value for the new columns, the second one has
+        records = [
+            {
+                "player_url": "https://www.hltv.org/player/1/a",
+                "name": "a",
+                "age": None,
+                "overall": {"rating": None},
+            },
+            {
+                "player_url": "https://www.hltv.org/player/2/b",
+                "name": "b",
+                "age": "24",
+                "overall": {"rating": "1.12"},
+            },
+        ]
+        schemas = []
+        with tempfile.TemporaryDirectory() as directory:
+            for order in (records, records[::-1]):
+                location = Path(directory) / f"{len(schemas)}.sqlite"
+                write_sqlite("player", order, location)
+                connection = sqlite3.connect(location)
+                schemas.append(
+                    {row[1]: row[2] for row in connection.execute("PRAGMA table_info(players)")}
+                )
+                connection.close()
+        self.assertEqual(schemas[0], schemas[1])
+        self.assertEqual(schemas[0]["overall_rating"], "REAL")
+
+
+if __name__ == "__main__":
+    unittest.main()
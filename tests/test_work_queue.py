@@ -0,0 +1,46 @@
+from pathlib import Path
+import tempfile
+import unittest
+import asyncio
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scraping"))
+
+from work_queue import RetryPolicy, make_queue, run_workers
+from dead_letters import DeadLetters
+
+
+class Session:
+    def __init__(self, session_id):
+        self.session_id = session_id
+
+
+class RunWorkersTest(unittest.TestCase):
+    def test_retry_of_the_only_session_gets_scraped(self):
+        # Item 0 times out once, its retry comes back behind DONE and must still get scraped
+        done, failed = [], set()
+
+        async def handler(session, item):
+            await asyncio.sleep(0.01)  # the retry's backoff runs out while other items load
+            if item == 0 and item not in failed:
+                failed.add(item)
+                raise TimeoutError("timeout")
+            done.append(item)
+
+        with tempfile.TemporaryDirectory() as directory:
+            dead_letters = DeadLetters(Path(directory) / "dead_letters.jsonl")
+            asyncio.run(
+                run_workers(
+                    [Session(0)],
+                    make_queue(range(5)),
+                    handler,
+                    retry=RetryPolicy(attempts=3, backoff=0.001),
+                    dead_letters=dead_letters,
+                )
+            )
+            self.assertEqual(sorted(done), [0, 1, 2, 3, 4])
+            self.assertEqual(dead_letters.load(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()